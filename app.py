@@ -1,38 +1,58 @@
+import functools
+import os
+import threading
+import time
+from dataclasses import replace
+
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
 import numpy as np
 
-st.set_page_config(page_title="Reporte de Desempeño - 2024", layout="wide")
-
-# --- Constantes y Configuración ---
-
-# Lista para la sección de Liderazgo
-COMPETENCIAS_LIDERAZGO = [
-    "Humildad", "Resolutividad", "Formador de Personas",
-    "Liderazgo Magnético", "Visión Estratégica",
-    "Generación de Redes y Relaciones Efectivas"
-]
-# Nueva lista para el gráfico de radar individual (transversales)
-COMPETENCIAS_TRANSVERSALES = [
-    "Productividad", "Calidad del Trabajo", "Iniciativa",
-    "Trabajo en Equipo", "Orientación al Cliente", "Resolutividad"
-]
-
-CATEGORIAS_ORDEN = [
-    "Excepcional", "Destacado", "Cumple", "Cumple Parcialmente", "No Cumple", "Pendiente"
-]
-COLORES_CATEGORIAS = {
-    "Excepcional": "#8A2BE2", # Violet
-    "Destacado": "#1E90FF",   # DodgerBlue
-    "Cumple": "#3CB371",      # MediumSeaGreen
-    "Cumple Parcialmente": "#FFD700", # Gold
-    "No Cumple": "#DC143C",   # Crimson
-    "Pendiente": "#D3D3D3"    # LightGray
-}
-COLORES_FEEDBACK = {"Completado": "#3CB371", "En Proceso": "#FFD700", "Pendiente": "#DC143C"}
+from desempeno.constantes import (
+    ANIO_REPORTE, COLUMNA_DOCUMENTO, COLUMNA_EVALUADOR, COMPETENCIAS_LIDERAZGO, COMPETENCIAS_TRANSVERSALES,
+    PATRON_CARGOS_LIDERAZGO
+)
+from desempeno import cache_disco
+from desempeno.almacen import AlmacenEvaluaciones
+from desempeno.busqueda import IndiceBusqueda
+from desempeno.calibracion import CALIBRACION_INDULGENTE, CALIBRACION_SEVERO, CalibracionEvaluadores
+from desempeno.cache_figuras import (
+    MAX_FIGURAS, NINGUNO, CacheFiguras, figura_feedback_nodo, precalentar, trazas_radar
+)
+from desempeno.cubo import CuboKPI, resumen_hojas
+from desempeno.datasets import MAX_DATASETS, RegistroDatasets
+from desempeno.exportacion import FORMATOS, MAX_FILAS_EXCEL, CacheExportaciones, clave_exportacion
+from desempeno.graficos import (
+    tabla_categorias, figura_categorias, figura_radar,
+    notas_historicas, figura_evolucion, figura_comparacion, figura_distribucion_pares
+)
+from desempeno.ingesta import leer_csv
+from desempeno.instrumentacion import (
+    RegistroSecciones, activar_perfilado_memoria, perfilado_memoria_activo, servir_metricas
+)
+from desempeno.jerarquia import IndiceJerarquia, TODAS, ordenar_por_jerarquia
+from desempeno.pares import EstadisticasPares
+from desempeno.paginacion import TAMANOS_PAGINA, TablaPaginada, paginar, total_paginas
+from desempeno.personas import IndicePersonas
+from desempeno.procesamiento import VERSION_PROCESAMIENTO, procesar_datos
+from desempeno.streaming import procesar_por_bloques
+from desempeno.recalculo import PERFILES_ORIGEN, PESO_METAS, MatrizCompetencias
+from desempeno.trabajos import ColaIngestas
+from desempeno.trayectorias import clasificar_trayectorias
+
+# Segundos que la página espera a la ingesta antes de mostrar su avance (la carga sigue en segundo plano)
+ESPERA_INGESTA = float(os.environ.get("DESEMPENO_ESPERA_INGESTA", "2"))
+
+# Puerto local donde se publican las métricas del proceso en formato Prometheus (desactivado si no se define)
+PUERTO_METRICAS = int(os.environ.get("DESEMPENO_PUERTO_METRICAS", "0"))
+
+ORIGEN_ARCHIVO = "Archivo CSV con el historial"
+ORIGEN_ALMACEN = "Historial acumulado (un export por año)"
+
+# Columnas de la tabla histórica y de las trayectorias
+COLUMNAS_HIST = ["Nota 2022", "Categoría 2022", "Nota 2023", "Categoría 2023", "Nota 2024", "Categoría 2024"]
 
+st.set_page_config(page_title="Reporte de Desempeño - 2024", layout="wide")
 
 st.title("📊 Reporte de Desempeño - 2024")
 
@@ -40,115 +60,450 @@ st.title("📊 Reporte de Desempeño - 2024")
 # FUNCIONES DE PROCESAMIENTO
 # ============================
 
-@st.cache_data
-def load_and_process_data(uploaded_file):
-    """Carga y procesa el archivo CSV con manejo de múltiples separadores/encodings."""
-    try:
-        # Intento 1: Separador ; UTF-8
-        df = pd.read_csv(uploaded_file, sep=";", encoding="utf-8", engine="python")
-    except Exception:
+@st.cache_resource
+def obtener_registro_datasets():
+    """Datasets procesados por clave de contenido, uno solo por proceso para todas las sesiones."""
+    return RegistroDatasets(int(os.environ.get("DESEMPENO_MAX_DATASETS", MAX_DATASETS)),
+                            al_desalojar=liberar_derivados)
+
+
+@st.cache_resource
+def obtener_exportaciones():
+    """Archivos exportados de las vistas, en disco y compartidos por todas las sesiones."""
+    return CacheExportaciones()
+
+
+def clave_archivo(uploaded_file):
+    """Clave de contenido del archivo subido; se calcula una vez por archivo y sesión (no en cada rerun)."""
+    claves = st.session_state.setdefault("claves_archivos", {})
+    id_archivo = getattr(uploaded_file, "file_id", None)
+    if id_archivo is None or id_archivo not in claves:
+        clave = cache_disco.clave_contenido(uploaded_file.getvalue())
+        if id_archivo is None:
+            return clave
+        claves.clear()
+        claves[id_archivo] = clave
+        # Un archivo nuevo (aunque tenga el mismo contenido) vuelve a intentar una carga que falló.
+        st.session_state.pop("ingestas_fallidas", None)
+    return claves[id_archivo]
+
+
+def procesar_archivo(datos, clave, al_bloque=None):
+    """(df_proc, avisos) del archivo, reutilizando el resultado en disco si el mismo contenido ya se procesó.
+
+    El archivo se procesa por bloques directo al caché en disco y se lee con memory-map;
+    `al_bloque(resumen)` recibe el avance de cada bloque (progreso y KPIs parciales). Un export
+    de un solo año ("Nota"/"Categoría" sin año) se toma como el de ANIO_REPORTE.
+    """
+    en_cache = cache_disco.leer(clave)
+    if en_cache is None:
         try:
-            # Intento 2: Separador , Latin-1
-            uploaded_file.seek(0) # Resetear puntero
-            df = pd.read_csv(uploaded_file, sep=",", encoding="latin-1", engine="python")
-        except Exception:
-            try:
-                # Intento 3: Separador tab UTF-8
-                uploaded_file.seek(0) # Resetear puntero
-                df = pd.read_csv(uploaded_file, sep="\t", encoding="utf-8", engine="python")
-            except Exception as e:
-                st.error(f"Error al leer el archivo. Intenta con un formato diferente. Detalle: {e}")
-                return None
-
-    # Normalización y Limpieza
-    df.columns = df.columns.str.strip()
-    df_proc = df.copy()
-
-    # --- 1. Normalización de Títulos de Columna (Case-Insensitive para Feedback) ---
-    FEEDBACK_COL_NAME_TARGET = "Estado Feedback"
-    
-    # Crea un mapeo de columnas en minúsculas para búsqueda
-    lower_case_cols_map = {col.lower(): col for col in df_proc.columns}
-    original_feedback_col = lower_case_cols_map.get(FEEDBACK_COL_NAME_TARGET.lower())
-
-    # Si se encuentra, renómbrala a la versión estándar esperada
-    if original_feedback_col and original_feedback_col != FEEDBACK_COL_NAME_TARGET:
-        df_proc.rename(columns={original_feedback_col: FEEDBACK_COL_NAME_TARGET}, inplace=True)
-        # Nota: La advertencia sobre la columna no encontrada se evitará si el renombrado es exitoso.
-
-
-    # Conversión de notas a numérico
-    df_proc["Nota_num_2024"] = pd.to_numeric(df_proc.get("Nota 2024", pd.Series(dtype='float64')), errors="coerce")
-    df_proc["Nota_num_2023"] = pd.to_numeric(df_proc.get("Nota 2023", pd.Series(dtype='float64')), errors="coerce")
-    df_proc["Nota_num_2022"] = pd.to_numeric(df_proc.get("Nota 2022", pd.Series(dtype='float64')), errors="coerce")
-
-    # Se asegura de convertir a número todas las competencias de ambas listas.
-    TODAS_COMPETENCIAS = list(set(COMPETENCIAS_LIDERAZGO + COMPETENCIAS_TRANSVERSALES))
-    for comp in TODAS_COMPETENCIAS:
-        if comp in df_proc.columns:
-             df_proc[comp] = pd.to_numeric(df_proc[comp], errors="coerce")
-
-    # Rellenar valores nulos
-    for col in ["Dirección", "Área", "Sub-área", "Evaluado", "Cargo", "Categoría 2024"]:
-        if col in df_proc.columns:
-            df_proc[col] = df_proc[col].fillna("Sin Asignar")
-
-    # Columna de Feedback: Usar "Estado Feedback" o generar una columna de ejemplo si no existe
-    # Usamos la variable TARGET para el chequeo final.
-    if FEEDBACK_COL_NAME_TARGET not in df_proc.columns: 
-        np.random.seed(42)
-        st.warning(f"Columna '{FEEDBACK_COL_NAME_TARGET}' no encontrada. Se generarán datos de ejemplo.")
-        df_proc[FEEDBACK_COL_NAME_TARGET] = np.random.choice(["Completado", "En Proceso", "Pendiente"], size=len(df_proc))
+            procesar_por_bloques(datos, cache_disco.ruta_entrada(clave), anio=ANIO_REPORTE, al_bloque=al_bloque)
+            cache_disco.podar()
+            en_cache = cache_disco.leer(clave)
+        except OSError:
+            en_cache = None
+    guardar = en_cache is None
+    if guardar:
+        # Sin caché en disco utilizable (p. ej. directorio de solo lectura): se procesa en memoria.
+        df_proc, avisos = procesar_datos(leer_csv(datos), anio=ANIO_REPORTE)
+    else:
+        df_proc, avisos = en_cache
+
+    # El dataset se guarda ordenado por jerarquía: el índice de jerarquía lo usa tal cual, sin otra copia.
+    # Una entrada escrita por bloques (en el orden del archivo) se ordena una vez y se reescribe.
+    ordenado = ordenar_por_jerarquia(df_proc)
+    if guardar or ordenado is not df_proc:
+        cache_disco.guardar(clave, ordenado, avisos)
+    df_proc = ordenado
+
+    # La clave de contenido identifica al dataset en los cachés derivados (índices, agregados).
+    df_proc.attrs["clave"] = clave
+    return df_proc, avisos
+
+
+@st.cache_resource
+def obtener_cola_ingestas():
+    """Ingestas en curso por clave de contenido, compartidas por las sesiones (una subida repetida se une a la activa)."""
+    return ColaIngestas()
+
+
+def error_ingesta(trabajo):
+    """Muestra el error de una ingesta fallida y lo deja en la sesión: los reruns no la relanzan hasta subir otro archivo."""
+    st.session_state.setdefault("ingestas_fallidas", {})[trabajo.clave] = str(trabajo.error)
+    obtener_cola_ingestas().retirar(trabajo)
+    st.error(f"Error al leer el archivo. Intenta con un formato diferente. Detalle: {trabajo.error}")
+
+
+@st.fragment(run_every=1.0)
+def progreso_ingesta(trabajo):
+    """Avance de la ingesta en segundo plano y KPIs parciales; si termina bien se recarga la página completa."""
+    if trabajo.terminado:
+        if trabajo.error is not None:
+            error_ingesta(trabajo)
+            return
+        st.rerun()
+    progreso = trabajo.progreso()
+    total_mb = (progreso["total_bytes"] or 0) / 1e6
+    if progreso["fraccion"] is None or not progreso["filas"]:
+        texto = f"⏳ Procesando el archivo ({total_mb:.0f} MB)... {progreso['segundos']:.0f} s"
+    else:
+        texto = (f"⏳ Procesando el archivo: {progreso['bytes_leidos'] / 1e6:.0f} de {total_mb:.0f} MB · "
+                 f"{progreso['filas']:,} filas leídas ({progreso['segundos']:.0f} s)")
+    st.progress(progreso["fraccion"] or 0.0, text=texto)
+
+    # Resultados parciales con las hojas del cubo acumuladas hasta el último bloque
+    if progreso["hojas"] is not None:
+        kpis, distribucion = resumen_hojas(progreso["hojas"])
+        st.caption("Resultados parciales con las filas leídas hasta ahora (se actualizan mientras avanza la carga).")
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Evaluaciones leídas", f"{kpis['total_evaluaciones']:,}")
+        col2.metric("Nota Promedio (2024)", f"{kpis['promedio_nota']:.2f}" if pd.notna(kpis['promedio_nota']) else "N/A")
+        col3.metric("% Destacado o Superior", f"{kpis['porc_destacado_o_mas']:.1f}%")
+        mostrar_grafico(figura_categorias(tabla_categorias(distribucion)))
+
+
+def load_and_process_data(uploaded_file, _registro):
+    """Dataset procesado del archivo, compartido (solo lectura) con las demás sesiones que subieron el mismo contenido.
+
+    La ingesta corre en segundo plano: si no termina en ESPERA_INGESTA segundos se muestra su
+    avance y se devuelve None (la página se recarga sola al terminar).
+    """
+    clave = clave_archivo(uploaded_file)
+    datasets = obtener_registro_datasets()
+
+    fallida = st.session_state.get("ingestas_fallidas", {}).get(clave)
+    if fallida is not None:
+        st.error(f"Error al leer el archivo. Intenta con un formato diferente. Detalle: {fallida}")
+        return None
+
+    if clave not in datasets:
+        datos = uploaded_file.getvalue()
+
+        def cargar(al_bloque):
+            df_proc, avisos = procesar_archivo(datos, clave, al_bloque)
+            datasets.guardar(clave, df_proc, avisos)
+            return df_proc, avisos
+
+        trabajo, _ = obtener_cola_ingestas().iniciar(clave, cargar, len(datos))
+        # Un archivo chico termina dentro de la espera y la página sigue sin mostrar el avance.
+        with _registro.calculo("Carga de datos"):
+            terminado = trabajo.esperar(ESPERA_INGESTA)
+        if not terminado:
+            progreso_ingesta(trabajo)
+            return None
+        if trabajo.error is not None:
+            error_ingesta(trabajo)
+            return None
 
+    try:
+        df_proc, avisos = datasets.obtener(clave, lambda: procesar_archivo(uploaded_file.getvalue(), clave))
+    except Exception as e:
+        st.error(f"Error al leer el archivo. Intenta con un formato diferente. Detalle: {e}")
+        return None
+
+    for aviso in avisos:
+        st.warning(aviso)
     return df_proc
 
+
+@st.cache_resource
+def obtener_almacen():
+    """Almacén de evaluaciones por año y ronda (el mismo directorio que `python -m desempeno.almacen`)."""
+    return AlmacenEvaluaciones()
+
+
+def panel_almacen(almacen):
+    """Agrega el export de un año al almacén. Devuelve si hay evaluaciones del año del reporte."""
+    hay_anio = bool(almacen.particiones([ANIO_REPORTE]))
+    with st.expander("➕ Agregar un export al historial", expanded=not hay_anio):
+        archivo = st.file_uploader("Export de un año (CSV)", type=["csv"], key="archivo_almacen")
+        anio = st.number_input("Año del export", min_value=2000, max_value=2100, value=ANIO_REPORTE, step=1,
+                               key="anio_almacen")
+        if archivo is not None and st.button("Agregar al historial", key="agregar_almacen"):
+            # Solo se reescriben las particiones (año, ronda) del archivo; el resto del historial no se toca.
+            with st.spinner("Agregando el export al historial..."):
+                try:
+                    df_proc, avisos = procesar_datos(leer_csv(archivo.getvalue()), anio=int(anio))
+                    actualizadas = almacen.agregar(df_proc, int(anio))
+                except Exception as e:
+                    st.error(f"Error al leer el archivo. Intenta con un formato diferente. Detalle: {e}")
+                else:
+                    for aviso in avisos:
+                        st.warning(aviso)
+                    st.success("Particiones actualizadas: " + ", ".join(f"{a} · {r}" for a, r in actualizadas))
+                    hay_anio = bool(almacen.particiones([ANIO_REPORTE]))
+    particiones = almacen.particiones()
+    if particiones:
+        anios = sorted({a for a, _ in particiones})
+        st.caption(f"Historial: {len(particiones)} rondas de {', '.join(map(str, anios))}.")
+    return hay_anio
+
+
+def cargar_almacen(almacen):
+    """Vista histórica del almacén (filas de ANIO_REPORTE con los años anteriores), compartida por versión."""
+    clave = f"almacen-{almacen.version()}-v{VERSION_PROCESAMIENTO}"
+
+    def cargar():
+        df_vista = ordenar_por_jerarquia(almacen.vista_historica(ANIO_REPORTE))
+        df_vista.attrs["clave"] = clave
+        return df_vista, []
+
+    df_vista, _ = obtener_registro_datasets().obtener(clave, cargar)
+    return df_vista
+
+
+@st.cache_resource
+def iniciar_servidor_metricas(puerto):
+    """Servidor de métricas, uno por proceso (sobrevive a los reruns)."""
+    return servir_metricas(puerto)
+
+
+@st.cache_resource
+def obtener_cache_figuras():
+    """Figuras terminadas por (dataset, nodo, opciones), compartidas por todas las sesiones del proceso."""
+    return CacheFiguras(int(os.environ.get("DESEMPENO_MAX_FIGURAS", MAX_FIGURAS)))
+
+
+@st.cache_resource(max_entries=8)
+def precalentar_figuras(clave, _cubo, _direcciones):
+    """Arma en segundo plano, una vez por dataset, las figuras de la clínica y de cada Dirección."""
+    datasets = obtener_registro_datasets()
+    hilo = threading.Thread(target=precalentar, args=(obtener_cache_figuras(), clave, _cubo, _direcciones,
+                                                      lambda: clave in datasets),
+                            daemon=True, name="precalentado-figuras")
+    hilo.start()
+    return hilo
+
+
+@st.cache_resource(max_entries=8)
+def obtener_indice_jerarquia(clave, _df, _registro):
+    """Índice Dirección → Área → Sub-área, construido una vez por dataset (clave de contenido)."""
+    with _registro.calculo("Filtros"):
+        return IndiceJerarquia(_df)
+
+
+@st.cache_resource(max_entries=8)
+def obtener_trayectorias(clave, _df):
+    """Clasificación de trayectorias (mejores, descendentes, mejora, declive, volátil) por dataset."""
+    return clasificar_trayectorias(_df)
+
+
+@st.cache_resource(max_entries=8)
+def obtener_cubo(clave, _df, _registro):
+    """Cubo de KPIs, histogramas y promedios por nodo de la jerarquía, construido una vez por dataset."""
+    with _registro.calculo("Filtros"):
+        return CuboKPI(_df)
+
+
 # ============================
-# Subir archivo CSV
+# SECCIONES DEL REPORTE
 # ============================
-uploaded_file = st.file_uploader("📂 Sube el archivo CSV con los datos", type=["csv"])
+# Cada sección con widgets propios es un fragmento: sus widgets solo re-ejecutan esa
+# función, no el script completo. Los cálculos pesados se cachean por (dataset, nodo).
 
-if uploaded_file is not None:
-    df = load_and_process_data(uploaded_file)
+def obtener_registro():
+    """Registro de tiempos de la sesión (qué se recalculó o reutilizó en cada interacción)."""
+    if "registro_secciones" not in st.session_state:
+        st.session_state.registro_secciones = RegistroSecciones()
+    return st.session_state.registro_secciones
 
-    if df is None:
-        st.stop()
 
-    # ============================
-    # Filtros dinámicos (Sidebar)
-    # ============================
-    st.sidebar.header("Filtros")
+def seccion_fragmento(nombre):
+    """Convierte una sección en fragmento instrumentado; en una re-ejecución parcial muestra lo ahorrado."""
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(*args, **kwargs):
+            registro = obtener_registro()
+            with registro.ejecucion(f"Fragmento: {nombre}") as propia:
+                with registro.seccion(nombre):
+                    funcion(*args, **kwargs)
+            if propia:
+                ejecucion = registro.historial[-1]
+                st.caption(f"⏱️ Solo se re-ejecutó esta sección ({ejecucion['segundos'] * 1000:.0f} ms); "
+                           f"trabajo evitado ≈ {ejecucion['ahorrado'] * 1000:.0f} ms")
+        return st.fragment(envoltura)
+    return decorador
 
-    direcciones = ["Todas"] + sorted(df["Dirección"].dropna().unique().tolist())
-    seleccion_direccion = st.sidebar.selectbox("Dirección", direcciones, index=0)
 
-    df_filtrado = df.copy()
-    if seleccion_direccion != "Todas":
-        df_filtrado = df_filtrado[df_filtrado["Dirección"] == seleccion_direccion]
+def mostrar_grafico(fig):
+    """st.plotly_chart midiendo la serialización y el envío de la figura en la sección en curso."""
+    with obtener_registro().etapa("plotly"):
+        st.plotly_chart(fig, use_container_width=True)
 
-    areas_disponibles = ["Todas"] + sorted(df_filtrado["Área"].dropna().unique().tolist())
-    seleccion_area = st.sidebar.selectbox("Área", areas_disponibles, index=0)
 
-    if seleccion_area != "Todas":
-        df_filtrado = df_filtrado[df_filtrado["Área"] == seleccion_area]
+def mostrar_tabla(datos, **kwargs):
+    """st.dataframe midiendo la conversión y el envío de la tabla (y sus filas) en la sección en curso."""
+    with obtener_registro().etapa("dataframe", filas_enviadas=len(datos)):
+        st.dataframe(datos, use_container_width=True, **kwargs)
 
-    subareas_disponibles = ["Todas"] + sorted(df_filtrado["Sub-área"].dropna().unique().tolist())
-    seleccion_subarea = st.sidebar.selectbox("Sub-área", subareas_disponibles, index=0)
 
-    if seleccion_subarea != "Todas":
-        df_filtrado = df_filtrado[df_filtrado["Sub-área"] == seleccion_subarea]
+@st.cache_data(max_entries=64)
+def calcular_destacadas(clave, nodo, _df_nodo, _registro):
+    """Top 20 y Bottom 20 por Nota 2024 del nodo (con las columnas que traiga el archivo)."""
+    with _registro.calculo("Evaluaciones destacadas"):
+        df_tb = _df_nodo.dropna(subset=["Nota_num_2024"])
+        columnas = [c for c in ["Evaluado", "Cargo", "Evaluador", "Categoría 2024", "Nota 2024"] if c in df_tb.columns]
+        return df_tb.nlargest(20, "Nota_num_2024")[columnas], df_tb.nsmallest(20, "Nota_num_2024")[columnas]
 
-    df_2024 = df_filtrado.copy()
 
-    # --- Métricas Clave (KPI's) ---
+@st.cache_data(max_entries=64)
+def calcular_ranking_lideres(clave, nodo, _cubo, _registro):
+    """Ranking por nota 2024 recibida (promedios por líder desde el cubo)."""
+    with _registro.calculo("Liderazgo"):
+        ranking_lideres = _cubo.ranking_lideres(*nodo)
+        ranking_lideres["Promedio Competencias"] = ranking_lideres[_cubo.competencias_liderazgo].mean(axis=1).round(2)
+        ranking_lideres["Nota2024"] = ranking_lideres["Nota2024"].round(2)
+        ranking_lideres = ranking_lideres.sort_values("Nota2024", ascending=False).reset_index(drop=True)
+        ranking_lideres.index += 1
+        ranking_lideres.insert(0, "Ranking", ranking_lideres.index)
+        return ranking_lideres
 
-    st.markdown("---")
+
+@st.cache_resource(max_entries=8)
+def obtener_tabla_paginada(clave, _indice, _registro):
+    """Índice de orden (Nota 2024) y de búsqueda sobre las filas del índice de jerarquía, por dataset."""
+    with _registro.calculo("Desempeño histórico"):
+        return TablaPaginada(_indice.df)
+
+
+@st.cache_resource(max_entries=8)
+def obtener_mascaras_trayectoria(clave, _df, _indice):
+    """Trayectorias por dataset, alineadas con las posiciones del índice de jerarquía."""
+    trayectorias = obtener_trayectorias(clave, _df).loc[_indice.df.index]
+    return {nombre: trayectorias[nombre].to_numpy() for nombre in trayectorias.columns}
+
+
+@st.cache_resource(max_entries=8)
+def obtener_personas(clave, _df):
+    """Índice de personas por Número de Documento con su consolidado por competencia, por dataset."""
+    return IndicePersonas(_df)
+
+
+@st.cache_resource(max_entries=8)
+def obtener_calibracion(clave, _df, _almacen=None):
+    """Estadísticas por Rut Evaluador y puntajes z de indulgencia/severidad por Dirección, por dataset.
+
+    Con el historial acumulado se suman los agregados por ronda del almacén: agregar una ronda solo
+    recalcula los de esa ronda y no se vuelven a recorrer las filas.
+    """
+    calibracion = _almacen.calibracion([ANIO_REPORTE]) if _almacen is not None else None
+    return calibracion if calibracion is not None else CalibracionEvaluadores.desde_df(_df)
+
+
+@st.cache_resource(max_entries=8)
+def obtener_matriz_competencias(clave, _df):
+    """Competencias del dataset como matriz con máscara de nulos, para recalcular y validar notas en bloque."""
+    return MatrizCompetencias(_df)
+
+
+@st.cache_resource(max_entries=8)
+def validar_notas(clave, _matriz):
+    """Recálculo con la regla del sistema de origen y marcas de discrepancia de cada fila, por dataset."""
+    return _matriz.validar()
+
+
+@st.cache_resource(max_entries=8)
+def obtener_pares(clave, _df):
+    """Distribuciones ordenadas de las competencias transversales por nodo, para percentiles y rankings."""
+    return EstadisticasPares(_df, COMPETENCIAS_TRANSVERSALES)
+
+
+@st.cache_resource(max_entries=8)
+def obtener_busqueda_personas(clave, _personas):
+    """Índice de búsqueda por nombre, cargo y documento (sin tildes, por prefijo y aproximada), por dataset."""
+    textos = {"Evaluado": _personas.nombres, "Cargo": _personas.columna("Cargo")}
+    if _personas.columna_clave == COLUMNA_DOCUMENTO:
+        textos[COLUMNA_DOCUMENTO] = _personas.documentos
+    return IndiceBusqueda(_personas.documentos, textos, compactos=(COLUMNA_DOCUMENTO,))
+
+
+@st.cache_resource(max_entries=64)
+def personas_del_nodo(clave, nodo, _df_nodo, _personas, _busqueda):
+    """Máscara (sobre el índice de búsqueda) de las personas del nodo filtrado."""
+    return _busqueda.mascara(_df_nodo[_personas.columna_clave].dropna().unique())
+
+
+@st.cache_resource(max_entries=8)
+def obtener_busqueda_lideres(clave, _cubo):
+    """Índice de búsqueda por nombre de los líderes del radar, por dataset."""
+    nombres = _cubo.nombres_lideres()
+    return IndiceBusqueda(nombres, {"Evaluado": nombres})
+
+
+@st.cache_resource(max_entries=64)
+def lideres_de_direccion(clave, direccion, _cubo, _busqueda):
+    """Máscara de los líderes de una Dirección (o de todos, con NINGUNO)."""
+    if direccion == NINGUNO:
+        return None
+    return _busqueda.mascara(_cubo.nombres_lideres(direccion))
+
+
+# Objetos derivados por dataset (cacheados solo por `clave`). Los cacheados por (clave, nodo)
+# son resultados chicos que no retienen el DataFrame y quedan acotados por su max_entries.
+DERIVADOS_DATASET = [
+    precalentar_figuras, obtener_indice_jerarquia, obtener_trayectorias, obtener_cubo, obtener_tabla_paginada,
+    obtener_mascaras_trayectoria, obtener_personas, obtener_calibracion, obtener_matriz_competencias,
+    validar_notas, obtener_pares, obtener_busqueda_personas, obtener_busqueda_lideres,
+]
+
+
+def liberar_derivados(clave):
+    """Cuando el registro desaloja un dataset, descarta también sus objetos derivados y sus figuras."""
+    for funcion in DERIVADOS_DATASET:
+        funcion.clear(clave)
+    obtener_cache_figuras().descartar_dataset(clave)
+
+
+def opciones_busqueda(resultados, seleccion, busqueda, permitidos):
+    """Resultados de la búsqueda más la selección vigente (si sigue permitida), para no perderla al buscar."""
+    vigentes = [clave for clave in seleccion if busqueda.permitida(clave, permitidos)]
+    return list(dict.fromkeys(vigentes + resultados))
+
+
+def controles_pagina(key, total_filas):
+    """Tamaño y número de página de una tabla paginada. Devuelve (pagina, tamano)."""
+    col_tamano, col_pagina, col_info = st.columns([1, 1, 3])
+    with col_tamano:
+        tamano = st.selectbox("Filas por página", TAMANOS_PAGINA, key=f"{key}_tamano")
+    paginas = total_paginas(total_filas, tamano)
+    # Un filtro o búsqueda nueva puede dejar la página guardada fuera de rango.
+    if st.session_state.get(f"{key}_pagina", 1) > paginas:
+        st.session_state[f"{key}_pagina"] = 1
+    with col_pagina:
+        pagina = st.number_input("Página", min_value=1, max_value=paginas, step=1, key=f"{key}_pagina")
+    inicio = (pagina - 1) * tamano
+    with col_info:
+        st.caption(f"Filas {min(inicio + 1, total_filas):,}–{min(inicio + tamano, total_filas):,} de {total_filas:,}")
+    return int(pagina), tamano
+
+
+def boton_exportacion(key, nombre_archivo, clave_vista, datos, posiciones=None, columnas=None):
+    """Formato y descarga de una vista; el archivo se escribe por bloques (o sale del caché) recién al hacer clic."""
+    filas = len(datos) if posiciones is None else len(posiciones)
+    col_formato, col_boton = st.columns([1, 3])
+    with col_formato:
+        formato = st.selectbox("Formato de descarga", list(FORMATOS), key=f"{key}_formato", label_visibility="collapsed")
+    extension, mime = FORMATOS[formato]
+    with col_boton:
+        if formato == "Excel" and filas > MAX_FILAS_EXCEL:
+            st.caption(f"La vista tiene {filas:,} filas, más de las que admite una hoja de Excel; usa Parquet o CSV.")
+            return
+        # Diferido: generar el archivo en cada rerun costaría tanto como la descarga misma.
+        st.download_button(f"⬇️ Descargar {formato} ({filas:,} filas)",
+                           functools.partial(obtener_exportaciones().leer, clave_exportacion(*clave_vista), formato,
+                                             datos, posiciones, columnas),
+                           file_name=nombre_archivo + extension, mime=mime, key=f"{key}_descarga", on_click="ignore",
+                           help="El archivo se escribe por bloques en disco; la descarga lo carga completo en memoria.")
+
+
+def seccion_kpis(cubo, nodo_seleccionado):
     st.header("🔑 Métricas Clave (KPIs)")
 
-    total_evaluados = df_2024["Evaluado"].nunique()
-    promedio_nota = df_2024["Nota_num_2024"].mean() if "Nota_num_2024" in df_2024.columns else np.nan
-    porc_destacado_o_mas = (
-        df_2024["Categoría 2024"].isin(["Excepcional", "Destacado"]).sum() / total_evaluados
-    ) * 100 if total_evaluados > 0 else 0
+    kpis = cubo.kpis(*nodo_seleccionado)
+    total_evaluados = kpis["total_evaluados"]
+    promedio_nota = kpis["promedio_nota"]
+    porc_destacado_o_mas = kpis["porc_destacado_o_mas"]
 
     col1, col2, col3 = st.columns(3)
 
@@ -159,105 +514,65 @@ if uploaded_file is not None:
     with col3:
         st.metric("% Destacado o Superior", f"{porc_destacado_o_mas:.1f}%")
 
-    st.markdown("---")
 
-    # ============================
-    # Sección 1: Resultados 2024
-    # ============================
+@seccion_fragmento("Resultados 2024")
+def seccion_resultados(clave, cubo, nodo_seleccionado):
     st.header("📌 Resultados 2024")
 
     col_distribucion, col_feedback = st.columns([2, 1])
 
     with col_distribucion:
         st.subheader("Distribución de Categorías de Desempeño")
-        conteo_categorias = df_2024["Categoría 2024"].value_counts().reindex(
-            CATEGORIAS_ORDEN, fill_value=0
-        ).reset_index()
-        conteo_categorias.columns = ["Categoría", "Cantidad"]
-        total_cat = conteo_categorias["Cantidad"].sum()
-        conteo_categorias["Porcentaje"] = (conteo_categorias["Cantidad"] / total_cat * 100).round(1)
+        conteo_categorias = tabla_categorias(cubo.distribucion_categorias(*nodo_seleccionado))
+        obtener_registro().contar_filas("Resultados 2024", int(conteo_categorias["Cantidad"].sum()))
 
         opcion_grafico = st.radio("Ver distribución por:", ["Porcentaje (%)", "Cantidad (N personas)"], horizontal=True, key='distrib_radio')
 
-        if opcion_grafico == "Porcentaje (%)":
-            fig_cat = px.bar(
-                conteo_categorias, x="Categoría", y="Porcentaje", color="Categoría",
-                text=conteo_categorias["Porcentaje"].astype(str) + "%",
-                color_discrete_map=COLORES_CATEGORIAS
-            )
-            fig_cat.update_layout(yaxis_title="Porcentaje (%)")
-        else:
-            fig_cat = px.bar(
-                conteo_categorias, x="Categoría", y="Cantidad", color="Categoría",
-                text=conteo_categorias["Cantidad"].astype(str),
-                color_discrete_map=COLORES_CATEGORIAS
-            )
-            fig_cat.update_layout(yaxis_title="Cantidad de personas")
-        fig_cat.update_traces(textposition='outside')
-        st.plotly_chart(fig_cat, use_container_width=True)
+        porcentaje = opcion_grafico == "Porcentaje (%)"
+        fig_cat = obtener_cache_figuras().obtener(
+            ("categorias", clave, nodo_seleccionado, porcentaje),
+            lambda: figura_categorias(conteo_categorias, porcentaje=porcentaje),
+        )
+        mostrar_grafico(fig_cat)
 
     # Avances en Feedback
     with col_feedback:
         st.subheader("Avance en Plan de Feedback")
 
-        conteo_feedback = df_2024["Estado Feedback"].value_counts().reset_index()
-        conteo_feedback.columns = ["Estado", "Cantidad"]
-
-        fig_feedback = px.pie(
-            conteo_feedback,
-            names='Estado',
-            values='Cantidad',
-            title='Estado de Cumplimiento de Feedback',
-            color='Estado',
-            color_discrete_map=COLORES_FEEDBACK
+        fig_feedback = obtener_cache_figuras().obtener(
+            ("feedback", clave, nodo_seleccionado), lambda: figura_feedback_nodo(cubo, nodo_seleccionado)
         )
-        fig_feedback.update_traces(textposition='inside', textinfo='percent+label')
-        fig_feedback.update_layout(showlegend=False)
 
-        st.plotly_chart(fig_feedback, use_container_width=True)
+        mostrar_grafico(fig_feedback)
 
 
+def seccion_destacadas(clave, nodo_seleccionado, df_2024):
     # Top 20 y Bottom 20
     st.subheader("🏆 Evaluaciones Destacadas")
-    df_tb = df_2024.copy().dropna(subset=["Nota_num_2024"])
-
-    top_20 = df_tb.nlargest(20, "Nota_num_2024")[["Evaluado", "Cargo", "Evaluador", "Categoría 2024", "Nota 2024"]]
-    bottom_20 = df_tb.nsmallest(20, "Nota_num_2024")[["Evaluado", "Cargo", "Evaluador", "Categoría 2024", "Nota 2024"]]
+    top_20, bottom_20 = calcular_destacadas(clave, nodo_seleccionado, df_2024, obtener_registro())
 
     col_top, col_bottom = st.columns(2)
     with col_top:
         st.markdown("### ⬆️ Top 20: Evaluaciones más altas")
-        st.dataframe(top_20, use_container_width=True)
+        mostrar_tabla(top_20)
 
     with col_bottom:
         st.markdown("### ⬇️ Bottom 20: Evaluaciones más bajas")
-        st.dataframe(bottom_20, use_container_width=True)
+        mostrar_tabla(bottom_20)
 
-    st.markdown("---")
 
-    # ============================
-    # Sección 2: Liderazgo
-    # ============================
+@seccion_fragmento("Liderazgo")
+def seccion_liderazgo(clave, nodo_seleccionado, cubo, direcciones):
     st.header("📌 Sección 2: Liderazgo")
 
-    df_lideres = df_2024[df_2024["Cargo"].str.contains("Jefe|Subgerente|Coordinador|Director|Supervisor", case=False, na=False)].copy()
-
-    # Ranking por nota 2024 recibida
-    ranking_lideres = (
-        df_lideres.groupby("Evaluado")
-        .agg(Nota2024=("Nota_num_2024", "mean"),
-             # Aquí usamos la lista de competencias de liderazgo
-             **{comp: (comp, "mean") for comp in COMPETENCIAS_LIDERAZGO})
-        .reset_index()
-    )
-    ranking_lideres["Promedio Competencias"] = ranking_lideres[COMPETENCIAS_LIDERAZGO].mean(axis=1).round(2)
-    ranking_lideres["Nota2024"] = ranking_lideres["Nota2024"].round(2)
-    ranking_lideres = ranking_lideres.sort_values("Nota2024", ascending=False).reset_index(drop=True)
-    ranking_lideres.index += 1
-    ranking_lideres.insert(0, "Ranking", ranking_lideres.index)
+    # El ranking solo depende del nodo: elegir Dirección o Líder en el radar lo reutiliza.
+    ranking_lideres = calcular_ranking_lideres(clave, nodo_seleccionado, cubo, obtener_registro())
+    obtener_registro().contar_filas("Liderazgo", len(ranking_lideres))
 
     st.subheader("📈 Ranking de Líderes (Nota 2024 recibida)")
-    st.dataframe(ranking_lideres, use_container_width=True)
+    pagina, tamano = controles_pagina("ranking_lideres", len(ranking_lideres))
+    mostrar_tabla(paginar(ranking_lideres, pagina, tamano))
+    boton_exportacion("ranking_lideres", "ranking_lideres", (clave, "ranking_lideres", nodo_seleccionado), ranking_lideres)
 
     # Radar comparativo
     st.subheader("🕸️ Radar de Competencias (Comparación)")
@@ -265,194 +580,156 @@ if uploaded_file is not None:
     col_dir_radar, col_lider_radar = st.columns(2)
     with col_dir_radar:
         seleccion_direccion_radar = st.selectbox("Selecciona Dirección para Comparar",
-                                                 ["Ninguno"] + sorted(df["Dirección"].dropna().unique()),
+                                                 [NINGUNO] + direcciones,
                                                  key='dir_radar')
     with col_lider_radar:
-        filtro_lideres_radar = df[df["Cargo"].str.contains("Jefe|Subgerente|Coordinador|Director|Supervisor", case=False, na=False)]
-
-        if seleccion_direccion_radar != "Ninguno":
-            lideres_disponibles = sorted(
-                filtro_lideres_radar[filtro_lideres_radar["Dirección"] == seleccion_direccion_radar]["Evaluado"].dropna().unique().tolist()
-            )
-        else:
-            lideres_disponibles = sorted(filtro_lideres_radar["Evaluado"].dropna().unique().tolist())
-
-        seleccion_lider = st.selectbox("Selecciona un Líder Específico", ["Ninguno"] + lideres_disponibles, key='lider_radar')
+        # Solo viajan al navegador los primeros resultados de la búsqueda (en el servidor) entre los líderes de la Dirección.
+        busqueda_lideres = obtener_busqueda_lideres(clave, cubo)
+        permitidos = lideres_de_direccion(clave, seleccion_direccion_radar, cubo, busqueda_lideres)
+        consulta_lider = st.text_input("🔎 Buscar líder", key="busqueda_lider", placeholder="Nombre (sin importar tildes)")
+        lideres_disponibles, total_lideres = busqueda_lideres.buscar(consulta_lider, permitidos=permitidos)
+        lideres_disponibles = opciones_busqueda(lideres_disponibles, [st.session_state.get("lider_radar", NINGUNO)],
+                                                busqueda_lideres, permitidos)
+
+        seleccion_lider = st.selectbox("Selecciona un Líder Específico", [NINGUNO] + lideres_disponibles, key='lider_radar')
+        if total_lideres > len(lideres_disponibles):
+            st.caption(f"Mostrando {len(lideres_disponibles)} de {total_lideres:,} líderes; escribe para acotar.")
 
     # Cálculos para el radar de Liderazgo
-    # Solo calculamos el promedio de las columnas que realmente existen
-    competencias_liderazgo_existentes = [c for c in COMPETENCIAS_LIDERAZGO if c in df.columns]
-
-    if competencias_liderazgo_existentes:
-        promedio_clinica = df[competencias_liderazgo_existentes].mean()
-        # Verificar si hay datos válidos en el promedio general de la clínica
-        if promedio_clinica.isnull().all():
-            promedio_clinica = None
-    else:
-        promedio_clinica = None
-
-
-    promedio_direccion_data = None
-    promedio_lider_data = None
+    # Solo calculamos el promedio de las columnas que realmente existen (los grupos sin datos quedan en None)
+    competencias_liderazgo_existentes = cubo.competencias_liderazgo
+    trazas = trazas_radar(cubo, seleccion_direccion_radar, seleccion_lider)
+    promedio_clinica, promedio_direccion_data, promedio_lider_data = [promedios for _, promedios, _ in trazas]
 
-    if seleccion_direccion_radar != "Ninguno":
-        promedio_direccion_data = df[df["Dirección"] == seleccion_direccion_radar][competencias_liderazgo_existentes].mean()
-        if promedio_direccion_data.isnull().all():
-            promedio_direccion_data = None
-
-    if seleccion_lider != "Ninguno":
-        promedio_lider_data = df[df["Evaluado"] == seleccion_lider][competencias_liderazgo_existentes].mean()
-        if promedio_lider_data.isnull().all():
-            promedio_lider_data = None
-
-    fig_radar = go.Figure()
-    
-    # 1. Promedio Clínica: CORRECCIÓN DEL ATTRIBUTE ERROR
-    # Se agrega la condición de que promedio_clinica no sea None.
-    if promedio_clinica is not None:
-        # Usamos las competencias existentes como theta (eje)
-        fig_radar.add_trace(go.Scatterpolar(r=promedio_clinica.fillna(0).values,
-                                            theta=competencias_liderazgo_existentes,
-                                            fill="toself",
-                                            name="Promedio Clínica",
-                                            line=dict(color=COLORES_CATEGORIAS["Destacado"])))
-    else:
-        # Mostramos una advertencia si no hay datos de liderazgo
+    # Mostramos una advertencia si no hay datos de liderazgo para el Promedio de la Clínica
+    if promedio_clinica is None:
         if not competencias_liderazgo_existentes:
             st.warning("No se encontraron columnas para competencias de liderazgo en el archivo (se buscó: " + ", ".join(COMPETENCIAS_LIDERAZGO) + ").")
         else:
             st.info("No hay datos de competencias de liderazgo para el Promedio de la Clínica.")
 
+    # 1. Promedio Clínica, 2. Promedio Dirección, 3. Líder Específico (se omiten los que no tienen datos)
+    fig_radar = obtener_cache_figuras().obtener(
+        ("radar", clave, seleccion_direccion_radar, seleccion_lider),
+        lambda: figura_radar(competencias_liderazgo_existentes, trazas),
+    )
 
-    # 2. Promedio Dirección
-    if promedio_direccion_data is not None:
-        # **Fórmula Robusta y Correcta:** .fillna(0) primero, luego .values
-        fig_radar.add_trace(go.Scatterpolar(r=promedio_direccion_data.fillna(0).values,
-                                              theta=competencias_liderazgo_existentes,
-                                              fill="toself",
-                                              name=f"Promedio Dirección: {seleccion_direccion_radar}",
-                                              line=dict(color=COLORES_CATEGORIAS["Cumple"])))
-
-    # 3. Líder Específico
-    if promedio_lider_data is not None:
-        # **Fórmula Robusta y Correcta:** .fillna(0) primero, luego .values
-        fig_radar.add_trace(go.Scatterpolar(r=promedio_lider_data.fillna(0).values,
-                                              theta=competencias_liderazgo_existentes,
-                                              fill="toself",
-                                              name=f"Líder: {seleccion_lider}",
-                                              line=dict(color=COLORES_CATEGORIAS["Excepcional"])))
-        
     # Verificar si se agregó al menos un rastro antes de mostrar el gráfico
     if len(fig_radar.data) > 0:
-        fig_radar.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
-                                showlegend=True,
-                                title="Nivelación de Competencias de Liderazgo (Escala 1 a 5)")
-        st.plotly_chart(fig_radar, use_container_width=True)
+        mostrar_grafico(fig_radar)
     # Ya se manejan los errores de datos nulos arriba, por lo que este else es solo si la lista está vacía
     elif not promedio_clinica and not promedio_direccion_data and not promedio_lider_data:
         st.info("No se pudo generar el gráfico de Radar porque no se encontraron datos válidos en las competencias de liderazgo para ninguno de los grupos seleccionados.")
 
 
-    st.markdown("---")
-
-    # ============================
-    # Sección 3: Desempeño Histórico
-    # ============================
+@seccion_fragmento("Desempeño histórico")
+def seccion_historica(clave, nodo_seleccionado, df, indice_jerarquia):
     st.header("📌 Sección 3: Desempeño Histórico")
 
-    columnas_hist = ["Nota 2022", "Categoría 2022", "Nota 2023", "Categoría 2023", "Nota 2024", "Categoría 2024"]
-    st.subheader("📋 Tabla histórica")
-
-    def es_top(categoria):
-        return categoria in ["Excepcional", "Destacado"]
-    def es_bajo(categoria):
-        return categoria in ["No Cumple", "Cumple Parcialmente"]
-
-    # Corrección del KeyError: Ordenar antes de seleccionar columnas
-    cols_base = ["Evaluado", "Cargo", "Dirección", "Área", "Sub-área"]
-    cols_a_mostrar = [col for col in cols_base + columnas_hist if col in df_filtrado.columns]
-
-    df_ordenado = df_filtrado.copy()
-    if "Nota_num_2024" in df_ordenado.columns:
-        df_ordenado = df_ordenado.sort_values("Nota_num_2024", ascending=False)
-
-    st.dataframe(df_ordenado[cols_a_mostrar], use_container_width=True) # Mostrar solo las columnas visibles
-
-    st.subheader("🌟 Mejores trayectorias (Consistentemente 'Destacado' o 'Excepcional')")
-
-    mejores_tray = df_filtrado[
-        df_filtrado.apply(lambda row: es_top(row.get("Categoría 2024")) and
-                                     (es_top(row.get("Categoría 2023")) or es_top(row.get("Categoría 2022"))), axis=1)
-    ]
-    st.dataframe(mejores_tray[["Evaluado"] + columnas_hist], use_container_width=True)
-
-    st.subheader("⚠️ Trayectorias descendentes (Consistentemente 'No Cumple' o 'Cumple Parcialmente')")
-
-    malas_tray = df_filtrado[
-        df_filtrado.apply(lambda row: es_bajo(row.get("Categoría 2024")) and
-                                     (es_bajo(row.get("Categoría 2023")) or es_bajo(row.get("Categoría 2022"))), axis=1)
-    ]
-    st.dataframe(malas_tray[["Evaluado"] + columnas_hist], use_container_width=True)
-
+    # Carga diferida: la tabla y las trayectorias solo se calculan y envían con el panel abierto.
+    panel = st.expander("📋 Tabla histórica y trayectorias", key="panel_historico", on_change="rerun")
+    if not panel.open:
+        return
+
+    with panel:
+        # Orden, búsqueda y paginación en el servidor: al navegador solo viaja la página visible.
+        tabla = obtener_tabla_paginada(clave, indice_jerarquia, obtener_registro())
+        posiciones = indice_jerarquia.posiciones(*nodo_seleccionado)
+        obtener_registro().contar_filas("Desempeño histórico", len(posiciones))
+
+        st.subheader("📋 Tabla histórica")
+        cols_base = ["Evaluado", "Cargo", "Dirección", "Área", "Sub-área"]
+
+        col_busqueda, col_orden = st.columns([2, 1])
+        with col_busqueda:
+            busqueda = st.text_input("🔎 Buscar por nombre o cargo", key="busqueda_historica")
+        with col_orden:
+            orden = st.radio("Orden por Nota 2024", ["Mayor a menor", "Menor a mayor"], horizontal=True, key="orden_historica")
+
+        seleccion = tabla.consultar(posiciones, busqueda, ascendente=orden == "Menor a mayor")
+        pagina, tamano = controles_pagina("tabla_historica", len(seleccion))
+        mostrar_tabla(tabla.pagina(seleccion, pagina, tamano, cols_base + COLUMNAS_HIST))
+        todas_columnas = st.checkbox("Descargar con todas las columnas de la evaluación", key="tabla_historica_todas")
+        columnas = None if todas_columnas else cols_base + COLUMNAS_HIST
+        boton_exportacion("tabla_historica", "tabla_historica",
+                          (clave, "historica", nodo_seleccionado, busqueda.strip().lower(), orden, columnas),
+                          tabla.df, seleccion, columnas)
+
+        # Clasificación calculada una vez para todo el dataset; aquí solo se toma el tramo filtrado.
+        mascaras = obtener_mascaras_trayectoria(clave, df, indice_jerarquia)
+
+        st.subheader("🌟 Mejores trayectorias (Consistentemente 'Destacado' o 'Excepcional')")
+        seleccion = tabla.consultar(posiciones, mascara=mascaras["mejores"])
+        pagina, tamano = controles_pagina("tabla_mejores", len(seleccion))
+        mostrar_tabla(tabla.pagina(seleccion, pagina, tamano, ["Evaluado"] + COLUMNAS_HIST))
+        boton_exportacion("tabla_mejores", "mejores_trayectorias", (clave, "mejores", nodo_seleccionado),
+                          tabla.df, seleccion, cols_base + COLUMNAS_HIST)
+
+        st.subheader("⚠️ Trayectorias descendentes (Consistentemente 'No Cumple' o 'Cumple Parcialmente')")
+        seleccion = tabla.consultar(posiciones, mascara=mascaras["descendentes"])
+        pagina, tamano = controles_pagina("tabla_descendentes", len(seleccion))
+        mostrar_tabla(tabla.pagina(seleccion, pagina, tamano, ["Evaluado"] + COLUMNAS_HIST))
+        boton_exportacion("tabla_descendentes", "trayectorias_descendentes", (clave, "descendentes", nodo_seleccionado),
+                          tabla.df, seleccion, cols_base + COLUMNAS_HIST)
+
+
+@seccion_fragmento("Evolución individual")
+def seccion_individual(clave, nodo_seleccionado, df, df_filtrado):
     # Evolución Individual Mejorada
     st.subheader("📈 Evolución y Trayectoria Individual")
 
-    # Obtiene la lista de trabajadores después de aplicar los filtros del sidebar
-    trabajadores_disponibles_filtrados = sorted(df_filtrado["Evaluado"].dropna().unique().tolist())
-    
-    # === Selector con búsqueda de texto: FORZAMOS A QUE HAYA UNA OPCIÓN SELECCIONADA AL INICIO (si hay datos) ===
+    # Personas indexadas por documento: la ficha y sus evaluaciones se leen del índice, sin recorrer filas.
+    personas = obtener_personas(clave, df)
+    obtener_registro().contar_filas("Evolución individual", len(df_filtrado))
+
+    # Búsqueda en el servidor entre las personas del filtro del sidebar: al selector solo llegan los mejores resultados
+    busqueda_personas = obtener_busqueda_personas(clave, personas)
+    permitidos = personas_del_nodo(clave, nodo_seleccionado, df_filtrado, personas, busqueda_personas)
+    consulta = st.text_input("🔎 Buscar trabajador por nombre, cargo o documento", key="busqueda_trabajador",
+                             placeholder="Ej.: guzman, jefe pabellon, 10.033.948")
+    resultados, total_resultados = busqueda_personas.buscar(consulta, permitidos=permitidos)
+
     # Si no hay selección anterior y hay trabajadores disponibles, seleccionamos el primero
     initial_selection = []
     if 'trabajador_seleccionado_state' in st.session_state and st.session_state.trabajador_seleccionado_state:
         # Mantenemos la selección si todavía existe en la lista filtrada
-        if st.session_state.trabajador_seleccionado_state[0] in trabajadores_disponibles_filtrados:
+        if busqueda_personas.permitida(st.session_state.trabajador_seleccionado_state[0], permitidos):
             initial_selection = st.session_state.trabajador_seleccionado_state
-    
+    trabajadores_disponibles_filtrados = opciones_busqueda(resultados, initial_selection, busqueda_personas, permitidos)
+
     # Usamos la clave para guardar el estado en la sesión
     trabajador_seleccionado = st.multiselect(
         "👤 Busca o selecciona el Trabajador para ver su detalle (La lista se filtra con los controles del menú izquierdo)",
         options=trabajadores_disponibles_filtrados,
         default=initial_selection,
+        format_func=personas.etiqueta,
         max_selections=1, 
         placeholder="Escribe el nombre del trabajador...",
         key='trabajador_seleccionado_state' # Usamos una key para manejar el estado
     )
+    if total_resultados > len(resultados):
+        st.caption(f"Mostrando {len(resultados)} de {total_resultados:,} coincidencias; escribe para acotar la búsqueda.")
 
-    # Extraer el nombre del trabajador de la lista (será una lista con 0 o 1 elemento)
-    trabajador = trabajador_seleccionado[0] if trabajador_seleccionado else "Ninguno"
+    # Extraer el documento del trabajador de la lista (será una lista con 0 o 1 elemento)
+    documento = trabajador_seleccionado[0] if trabajador_seleccionado else None
     
-    if trabajador != "Ninguno":
+    if documento is not None:
 
-        # Obtener información del trabajador (usando df_filtrado)
-        trabajador_info = df_filtrado.loc[df_filtrado['Evaluado'] == trabajador].iloc[0]
+        # Obtener información del trabajador (acceso directo por documento)
+        trabajador = personas.nombre(documento)
+        trabajador_info = personas.registro(documento)
+        consolidado = personas.consolidado_de(documento)
+        n_evaluaciones, n_evaluadores = personas.cantidad_evaluaciones(documento)
 
         # 1. Evolución de Nota Global (Línea)
         st.markdown("#### Evolución Histórica de la Nota Global")
-        notas_data = {
-            "Año": [2022, 2023, 2024],
-            "Nota": [
-                trabajador_info.get("Nota_num_2022", np.nan),
-                trabajador_info.get("Nota_num_2023", np.nan),
-                trabajador_info.get("Nota_num_2024", np.nan)
-            ]
-        }
-        notas_hist = pd.DataFrame(notas_data).dropna(subset=["Nota"])
+        notas_hist = notas_historicas(trabajador_info)
 
         if not notas_hist.empty:
-            fig_ind = go.Figure()
-            fig_ind.add_trace(go.Scatter(
-                x=notas_hist["Año"],
-                y=notas_hist["Nota"],
-                mode='lines+markers',
-                line_shape='spline',
-                marker=dict(size=10)
-            ))
-            fig_ind.update_layout(
-                title_text=f"Nota Global por Año de {trabajador}",
-                xaxis=dict(tickmode='array', tickvals=[2022, 2023, 2024], tickformat='d'),
-                yaxis=dict(range=[0, 5], dtick=0.5)
+            fig_ind = obtener_cache_figuras().obtener(
+                ("evolucion", clave, documento), lambda: figura_evolucion(trabajador, notas_hist)
             )
-            st.plotly_chart(fig_ind, use_container_width=True)
+            mostrar_grafico(fig_ind)
         else:
             st.info(f"No se encontraron datos de notas históricas para {trabajador}.")
 
@@ -465,35 +742,59 @@ if uploaded_file is not None:
         with col_feed:
             st.metric("Estado Feedback", trabajador_info.get("Estado Feedback", "N/A"))
 
+        # Con varios evaluadores o rondas las competencias se consolidan (promedio); el detalle se carga a pedido.
+        if n_evaluaciones > 1:
+            st.caption(f"Competencias consolidadas de {n_evaluaciones} evaluaciones ({n_evaluadores} evaluadores).")
+            detalle = st.expander("🧾 Detalle por evaluación", key="detalle_evaluaciones", on_change="rerun")
+            if detalle.open:
+                with detalle:
+                    cols_detalle = ["Tipo de Evaluación", "Evaluador", "Rut Evaluador", "Nota 2024", "Categoría 2024"]
+                    evaluaciones = personas.evaluaciones(documento)
+                    mostrar_tabla(evaluaciones[[c for c in cols_detalle + personas.competencias if c in evaluaciones.columns]],
+                                  hide_index=True)
+                    mostrar_tabla(consolidado.dropna(how="all"))
+
         # 3. Comparación de Competencias (Gráfico dinámico)
         st.markdown("#### Comparación de Competencias Transversales")
 
-        # Lógica de determinación del grupo de comparación
+        # Lógica de determinación del grupo de comparación: los grupos son nodos precalculados
+        # (Sub-área o Área del trabajador dentro del filtro actual), sin máscaras sobre las filas.
+        pares = obtener_pares(clave, df)
+        direccion_f, area_f, subarea_f = nodo_seleccionado
         subarea_trabajador = trabajador_info.get("Sub-área")
         area_trabajador = trabajador_info.get("Área")
-        
-        df_grupo_comp = df_filtrado
+        evaluaciones = personas.evaluaciones(documento)
+
+        def propias(nodo):
+            # Evaluaciones del trabajador que caen dentro del nodo
+            dentro = np.ones(len(evaluaciones), dtype=bool)
+            for nivel, valor in zip(["Dirección", "Área", "Sub-área"], nodo):
+                if valor != TODAS:
+                    dentro &= (evaluaciones[nivel] == valor).to_numpy(dtype=bool, na_value=False)
+            return evaluaciones[dentro]
+
+        nodo_grupo = nodo_seleccionado
         nombre_grupo = "Promedio Grupo Filtrado"
-        
-        # 1. Intentar con Sub-área (si está definida y hay más de 1 persona en ella en el filtro actual)
+
+        # 1. Intentar con Sub-área (si está definida y hay alguien más que el trabajador en ella en el filtro actual)
+        # 2. Si no fue Sub-área, intentar con Área (mismo criterio)
+        candidatos = []
         if subarea_trabajador and subarea_trabajador != "Sin Asignar":
-            df_subarea = df_filtrado[df_filtrado["Sub-área"] == subarea_trabajador]
-            # Nos aseguramos de que el grupo no sea solo el trabajador seleccionado (por eso > 1)
-            if len(df_subarea) > 1 or (len(df_subarea) == 1 and df_subarea["Evaluado"].iloc[0] != trabajador): 
-                df_grupo_comp = df_subarea
-                nombre_grupo = f"Promedio Sub-área: {subarea_trabajador}"
-            
-        # 2. Si no fue Sub-área, intentar con Área (si está definida y hay más de 1 persona en ella en el filtro actual)
-        if nombre_grupo == "Promedio Grupo Filtrado" and area_trabajador and area_trabajador != "Sin Asignar":
-             df_area = df_filtrado[df_filtrado["Área"] == area_trabajador]
-             if len(df_area) > 1 or (len(df_area) == 1 and df_area["Evaluado"].iloc[0] != trabajador):
-                df_grupo_comp = df_area
-                nombre_grupo = f"Promedio Área: {area_trabajador}"
-        
+            candidatos.append(((direccion_f, area_f, subarea_trabajador), f"Promedio Sub-área: {subarea_trabajador}"))
+        if area_trabajador and area_trabajador != "Sin Asignar":
+            candidatos.append(((direccion_f, area_trabajador, subarea_f), f"Promedio Área: {area_trabajador}"))
+        for nodo_candidato, nombre_candidato in candidatos:
+            if pares.filas(nodo_candidato) > len(propias(nodo_candidato)):
+                nodo_grupo, nombre_grupo = nodo_candidato, nombre_candidato
+                break
+
         # 3. Fallback: Mantener el filtro aplicado (Dirección) o el grupo completo si no hay filtros.
+        # Si el grupo no es el filtro total, excluimos al trabajador para un promedio más limpio
+        excluir_propias = nombre_grupo != "Promedio Grupo Filtrado"
+        propias_grupo = propias(nodo_grupo) if excluir_propias else evaluaciones.iloc[:0]
 
         # Filtramos las competencias que tienen datos válidos para el trabajador Y que existen en el DataFrame del grupo
-        competencias_con_datos_trab = [c for c in COMPETENCIAS_TRANSVERSALES if pd.notna(trabajador_info.get(c)) and c in df_grupo_comp.columns]
+        competencias_con_datos_trab = [c for c in COMPETENCIAS_TRANSVERSALES if c in consolidado.index and pd.notna(consolidado.at[c, "media"]) and c in pares.columnas]
         
         if not competencias_con_datos_trab:
              st.warning(f"El trabajador {trabajador} no tiene notas válidas en las competencias transversales definidas o estas no existen en la tabla.")
@@ -506,21 +807,12 @@ if uploaded_file is not None:
                 key='sel_comp_ind'
             )
 
-            # Cálculo de los valores
-            nota_trabajador = trabajador_info.get(competencia_seleccionada, np.nan)
-            
-            # --- CORRECCIÓN DEL KEY ERROR ---
-            promedio_grupo = np.nan
-            if competencia_seleccionada in df_grupo_comp.columns: # Aseguramos que la columna existe en el grupo
-                if nombre_grupo != "Promedio Grupo Filtrado":
-                    # Si el grupo no es el filtro total, excluimos al trabajador para un promedio más limpio
-                    promedio_grupo = df_grupo_comp[df_grupo_comp["Evaluado"] != trabajador][competencia_seleccionada].mean()
-                else:
-                     # Si el grupo es el filtro total, se calcula el promedio
-                    promedio_grupo = df_grupo_comp[competencia_seleccionada].mean()
-            # --- FIN CORRECCIÓN DEL KEY ERROR ---
+            # Cálculo de los valores (promedio de sus evaluadores) y su posición en la distribución del grupo
+            nota_trabajador = consolidado.at[competencia_seleccionada, "media"]
+            resumen = pares.resumen(nodo_grupo, competencia_seleccionada, valor=nota_trabajador,
+                                    excluir=propias_grupo[competencia_seleccionada].tolist())
+            promedio_grupo = resumen["promedio"] if resumen else np.nan
 
-            
             # Crear DataFrame para el gráfico de barras
             df_bar = pd.DataFrame({
                 'Métrica': [trabajador, nombre_grupo],
@@ -530,29 +822,287 @@ if uploaded_file is not None:
             if not df_bar.empty:
                 st.markdown(f"##### Comparación en **'{competencia_seleccionada}'** (Escala 1 a 5)")
 
-                fig_comp_bar = px.bar(
-                    df_bar,
-                    x='Valor',
-                    y='Métrica',
-                    color='Métrica',
-                    orientation='h',
-                    text_auto='.2f',
-                    color_discrete_map={
-                        trabajador: COLORES_CATEGORIAS["Destacado"],
-                        nombre_grupo: COLORES_CATEGORIAS["Cumple"]
-                    }
+                # El grupo de comparación depende del nodo filtrado; la persona, de su documento.
+                fig_comp_bar = obtener_cache_figuras().obtener(
+                    ("comparacion", clave, nodo_seleccionado, documento, competencia_seleccionada),
+                    lambda: figura_comparacion(df_bar, trabajador, nombre_grupo),
                 )
-                fig_comp_bar.update_layout(
-                    xaxis_title="Nota",
-                    yaxis_title="",
-                    legend_title="Referencia",
-                    uniformtext_minsize=8,
-                    uniformtext_mode='hide'
-                )
-                fig_comp_bar.update_xaxes(range=[0, 5.5])
-                st.plotly_chart(fig_comp_bar, use_container_width=True)
+                mostrar_grafico(fig_comp_bar)
+
+                if resumen:
+                    col_pct, col_rank, col_cuart = st.columns(3)
+                    col_pct.metric("Percentil en el grupo", f"{resumen['percentil']:.0f}")
+                    col_rank.metric("Ranking", f"{resumen['ranking']} de {resumen['n']}",
+                                    help="Posición entre las evaluaciones de sus pares (1 = mejor nota); empates comparten puesto.")
+                    col_cuart.metric("Cuartiles del grupo (Q1 · Mediana · Q3)",
+                                     f"{resumen['q1']:.2f} · {resumen['mediana']:.2f} · {resumen['q3']:.2f}")
+                    fig_pares = obtener_cache_figuras().obtener(
+                        ("pares", clave, nodo_seleccionado, documento, competencia_seleccionada),
+                        lambda: figura_distribucion_pares(
+                            pares.valores(nodo_grupo, competencia_seleccionada), nota_trabajador, trabajador, resumen
+                        ),
+                    )
+                    mostrar_grafico(fig_pares)
             else:
                 st.warning(f"No hay datos de '{competencia_seleccionada}' disponibles para {trabajador} o su grupo de comparación.")
 
+
+@seccion_fragmento("Calibración de evaluadores")
+def seccion_calibracion(clave, nodo_seleccionado, df, df_filtrado, almacen=None):
+    st.header("📌 Sección 4: Calibración de Evaluadores")
+    st.caption("Promedio de la Nota 2024 que asigna cada evaluador frente a los demás evaluadores de su Dirección "
+               "(puntaje z; ±1.5 marca indulgencia o severidad). Sin z si evaluó a menos de 3 personas.")
+
+    calibracion = obtener_calibracion(clave, df, almacen)
+    direccion = nodo_seleccionado[0] if nodo_seleccionado[0] != TODAS else None
+    resumen = calibracion.resumen(direccion)
+    obtener_registro().contar_filas("Calibración de evaluadores", len(resumen))
+
+    col_total, col_indulgentes, col_severos = st.columns(3)
+    col_total.metric("Evaluadores", f"{len(resumen):,}")
+    col_indulgentes.metric("Indulgentes", f"{(resumen['Calibración'] == CALIBRACION_INDULGENTE).sum():,}")
+    col_severos.metric("Severos", f"{(resumen['Calibración'] == CALIBRACION_SEVERO).sum():,}")
+
+    pagina, tamano = controles_pagina("tabla_calibracion", len(resumen))
+    mostrar_tabla(paginar(resumen, pagina, tamano), hide_index=True)
+
+    # Nota sin el desvío de su evaluador (ajuste reducido para evaluadores con pocas evaluaciones)
+    if st.toggle("Mostrar Nota 2024 normalizada por evaluador", key="mostrar_nota_normalizada"):
+        columnas = [c for c in ["Evaluado", "Evaluador", "Nota_num_2024", "Categoría 2024"] if c in df_filtrado.columns]
+        notas = df_filtrado[columnas].copy()
+        notas["Nota normalizada"] = calibracion.nota_normalizada(df_filtrado).round(2)
+        notas["Diferencia"] = (notas["Nota normalizada"] - notas["Nota_num_2024"]).round(2)
+        notas = notas.sort_values("Diferencia", key=abs, ascending=False)
+        pagina, tamano = controles_pagina("tabla_nota_normalizada", len(notas))
+        mostrar_tabla(paginar(notas, pagina, tamano), hide_index=True)
+
+
+@seccion_fragmento("Validación y escenarios")
+def seccion_recalculo(clave, nodo_seleccionado, cubo, df, df_filtrado):
+    st.header("📌 Sección 5: Validación de Notas y Escenarios de Ponderación")
+    matriz = obtener_matriz_competencias(clave, df)
+    en_nodo = matriz.indice.isin(df_filtrado.index) if nodo_seleccionado != (TODAS, TODAS, TODAS) else None
+    obtener_registro().contar_filas("Validación y escenarios", len(df_filtrado))
+
+    # 1. Validación: Nota y Categoría del export contra el recálculo desde las competencias y Metas
+    st.subheader("✅ Validación de la Nota 2024")
+    st.caption("Nota recalculada con la regla del sistema de origen: 50 % el promedio de los valores corporativos "
+               "y 50 % el de las demás competencias evaluadas; con Metas, estas pesan 15 % (30 % en la Evaluación "
+               "Urgencia); truncada a centésimas (tolerancia ±0.05).")
+    validacion = validar_notas(clave, matriz)
+    if en_nodo is not None:
+        validacion = validacion[en_nodo]
+    marcas = ["Nota difiere", "Categoría difiere", "Categoría inconsistente con Nota", "Nota sin competencias"]
+    col_nota, col_cat, col_incons, col_sin = st.columns(4)
+    col_nota.metric("Nota distinta al recálculo", f"{validacion['Nota difiere'].sum():,}")
+    col_cat.metric("Categoría distinta al recálculo", f"{validacion['Categoría difiere'].sum():,}")
+    col_incons.metric("Categoría inconsistente con su Nota", f"{validacion['Categoría inconsistente con Nota'].sum():,}")
+    col_sin.metric("Nota sin competencias evaluadas", f"{validacion['Nota sin competencias'].sum():,}",
+                   help="Filas con nota en el export pero sin competencias: no se pueden recalcular.")
+
+    discrepancias = validacion[validacion[marcas].any(axis=1)]
+    if not discrepancias.empty:
+        columnas = [c for c in ["Evaluado", "Cargo", "Evaluador"] if c in df.columns]
+        discrepancias = df.loc[discrepancias.index, columnas].join(discrepancias)
+        discrepancias = discrepancias.sort_values("Diferencia", key=abs, ascending=False)
+        pagina, tamano = controles_pagina("tabla_discrepancias", len(discrepancias))
+        mostrar_tabla(paginar(discrepancias, pagina, tamano), hide_index=True)
+
+    # 2. Escenario de ponderación: se recalcula toda la población con los pesos elegidos
+    st.subheader("🧮 Escenario de Ponderación")
+    col_metas, col_lid, col_trans = st.columns(3)
+    with col_metas:
+        peso_metas = st.slider("Peso de Metas (%)", 0, 50, round(PESO_METAS * 100), step=5, key="escenario_peso_metas",
+                               help="En la Evaluación Urgencia, Metas mantiene el peso de la regla de origen.") / 100
+    with col_lid:
+        peso_liderazgo = st.slider("Peso de competencias de liderazgo (cargos de liderazgo)", 0.0, 3.0, 1.0,
+                                   step=0.25, key="escenario_peso_liderazgo")
+    with col_trans:
+        peso_transversales = st.slider("Peso de competencias transversales", 0.0, 3.0, 1.0, step=0.25,
+                                       key="escenario_peso_transversales")
+    # Sobre la regla de origen: con los valores por defecto el escenario no cambia ninguna nota.
+    transversales = {c: peso_transversales for c in COMPETENCIAS_TRANSVERSALES}
+    origen = PERFILES_ORIGEN[0]
+    perfiles = [
+        replace(origen, nombre="Liderazgo",
+                pesos={**transversales, **{c: peso_liderazgo for c in COMPETENCIAS_LIDERAZGO}},
+                peso_metas=peso_metas, patron_cargo=PATRON_CARGOS_LIDERAZGO),
+        replace(origen, pesos=transversales, peso_metas=peso_metas),
+    ]
+
+    inicio = time.perf_counter()
+    transicion, cambio = matriz.comparar_escenario(perfiles, PERFILES_ORIGEN, en_nodo)
+    milisegundos = (time.perf_counter() - inicio) * 1000
+    total = transicion.to_numpy().sum() - transicion.loc["Pendiente"].sum()
+    # Mismo denominador que el KPI "% Destacado o Superior": personas evaluadas del nodo.
+    evaluados = cubo.kpis(*nodo_seleccionado)["total_evaluados"]
+    destacados_base = transicion.loc[["Excepcional", "Destacado"]].to_numpy().sum()
+    destacados_escenario = transicion[["Excepcional", "Destacado"]].to_numpy().sum()
+    cambios = total - sum(transicion.at[c, c] for c in transicion.index if c != "Pendiente")
+
+    col_cambio, col_destacados, col_movidos = st.columns(3)
+    col_cambio.metric("Cambio en la nota promedio", f"{cambio:+.3f}" if pd.notna(cambio) else "N/A")
+    col_destacados.metric("% Destacado o Superior (escenario)",
+                          f"{destacados_escenario / evaluados * 100:.1f}%" if evaluados else "N/A",
+                          delta=f"{(destacados_escenario - destacados_base) / evaluados * 100:+.1f} pp" if evaluados else None)
+    col_movidos.metric("Evaluaciones que cambian de categoría", f"{cambios:,}")
+    st.markdown("##### Cambios de categoría (filas: regla de origen, columnas: escenario)")
+    mostrar_tabla(transicion)
+    st.caption(f"Escenario recalculado para {len(matriz):,} evaluaciones en {milisegundos:.0f} ms.")
+
+
+def panel_perfilado(registro):
+    """Detalle por sección de la última ejecución y exportación del historial (JSON lines / Prometheus)."""
+    with st.sidebar.expander("🛠️ Perfilado (administración)"):
+        # Ajuste del proceso: el toggle muestra el estado actual, que pudo cambiar otra sesión de administración.
+        st.session_state.perfilar_memoria = perfilado_memoria_activo()
+        st.toggle("Perfilar memoria por sección (tracemalloc, todo el proceso)", key="perfilar_memoria",
+                  on_change=lambda: activar_perfilado_memoria(st.session_state.perfilar_memoria),
+                  help="Registra el pico de memoria de cada sección desde la próxima ejecución, en todas las sesiones; "
+                       "encarece las asignaciones de todo el proceso.")
+        ultima = registro.historial[-1]
+        if ultima.get("rss_pico") is not None:
+            st.caption(f"Memoria residente máxima del proceso: {ultima['rss_pico'] / 1e6:.0f} MB")
+        st.dataframe(pd.DataFrame(registro.tabla_secciones()), hide_index=True, use_container_width=True)
+        figuras = obtener_cache_figuras().estadisticas()
+        st.caption(f"Figuras en caché: {figuras['figuras']} · aciertos {figuras['aciertos']} · fallos {figuras['fallos']}")
+        datasets = obtener_registro_datasets().estadisticas()
+        st.caption(f"Datasets compartidos: {datasets['datasets']} ({datasets['bytes'] / 1e6:.0f} MB) · "
+                   f"reutilizados {datasets['aciertos']} · cargados {datasets['cargas']}")
+        exportaciones = obtener_exportaciones()
+        st.caption(f"Exportaciones: generadas {exportaciones.generadas} · desde caché {exportaciones.aciertos}")
+        st.download_button("Descargar historial (JSON lines)", registro.jsonl(),
+                           file_name="perfilado_desempeno.jsonl", mime="application/jsonl")
+        st.download_button("Descargar métricas (Prometheus)", registro.metricas.texto_prometheus(),
+                           file_name="metricas_desempeno.prom", mime="text/plain")
+        if PUERTO_METRICAS:
+            st.caption(f"Métricas del proceso en http://127.0.0.1:{PUERTO_METRICAS}/metrics")
+
+
+# ============================
+# Subir archivo CSV
+# ============================
+origen = st.radio("Origen de los datos", [ORIGEN_ARCHIVO, ORIGEN_ALMACEN], horizontal=True, key="origen_datos")
+uploaded_file = almacen = None
+if origen == ORIGEN_ARCHIVO:
+    uploaded_file = st.file_uploader("📂 Sube el archivo CSV con los datos", type=["csv"])
+    hay_datos = uploaded_file is not None
+else:
+    almacen = obtener_almacen()
+    hay_datos = panel_almacen(almacen)
+
+if hay_datos:
+    if PUERTO_METRICAS:
+        iniciar_servidor_metricas(PUERTO_METRICAS)
+    registro = obtener_registro()
+    modo_admin = st.query_params.get("admin") == "1" or os.environ.get("DESEMPENO_ADMIN") == "1"
+    registro.iniciar("Completa")
+
+    with registro.seccion("Carga de datos"):
+        df = load_and_process_data(uploaded_file, registro) if almacen is None else cargar_almacen(almacen)
+
+    if df is None:
+        registro.cerrar()
+        st.stop()
+    registro.contar_filas("Carga de datos", len(df))
+
+    # ============================
+    # Filtros dinámicos (Sidebar)
+    # ============================
+    st.sidebar.header("Filtros")
+
+    memoria = df.attrs.get("memoria")
+    if memoria:
+        st.sidebar.caption(
+            f"Memoria de datos: {memoria['antes'] / 1e6:.1f} MB → {memoria['despues'] / 1e6:.1f} MB (tipos compactos)"
+        )
+
+    with registro.seccion("Filtros"):
+        # Las opciones y los tramos de filas de cada nodo vienen precalculados en el índice.
+        indice_jerarquia = obtener_indice_jerarquia(df.attrs["clave"], df, registro)
+
+        direcciones = [TODAS] + indice_jerarquia.direcciones
+        seleccion_direccion = st.sidebar.selectbox("Dirección", direcciones, index=0)
+
+        areas_disponibles = [TODAS] + indice_jerarquia.opciones_area(seleccion_direccion)
+        seleccion_area = st.sidebar.selectbox("Área", areas_disponibles, index=0)
+
+        subareas_disponibles = [TODAS] + indice_jerarquia.opciones_subarea(seleccion_direccion, seleccion_area)
+        seleccion_subarea = st.sidebar.selectbox("Sub-área", subareas_disponibles, index=0)
+
+        # Vista de solo lectura sobre el nodo seleccionado (sin máscaras ni copias)
+        df_filtrado = indice_jerarquia.filtrar(seleccion_direccion, seleccion_area, seleccion_subarea)
+
+        df_2024 = df_filtrado
+
+        # KPIs, distribuciones, ranking y radar se leen del cubo precalculado para el nodo seleccionado.
+        clave = df.attrs["clave"]
+        cubo = obtener_cubo(clave, df, registro)
+        precalentar_figuras(clave, cubo, indice_jerarquia.direcciones)
+        nodo_seleccionado = (seleccion_direccion, seleccion_area, seleccion_subarea)
+    registro.contar_filas("Filtros", len(df_filtrado))
+
+    # --- Métricas Clave (KPI's) ---
+
+    st.markdown("---")
+    with registro.seccion("KPIs", filas=len(df_filtrado)):
+        seccion_kpis(cubo, nodo_seleccionado)
+
+    st.markdown("---")
+
+    # ============================
+    # Sección 1: Resultados 2024
+    # ============================
+    seccion_resultados(clave, cubo, nodo_seleccionado)
+
+    with registro.seccion("Evaluaciones destacadas", filas=len(df_2024)):
+        seccion_destacadas(clave, nodo_seleccionado, df_2024)
+
+    st.markdown("---")
+
+    # ============================
+    # Sección 2: Liderazgo
+    # ============================
+    seccion_liderazgo(clave, nodo_seleccionado, cubo, indice_jerarquia.direcciones)
+
+    st.markdown("---")
+
+    # ============================
+    # Sección 3: Desempeño Histórico
+    # ============================
+    seccion_historica(clave, nodo_seleccionado, df, indice_jerarquia)
+
+    seccion_individual(clave, nodo_seleccionado, df, df_filtrado)
+
+    st.markdown("---")
+
+    # ============================
+    # Sección 4: Calibración de evaluadores
+    # ============================
+    if COLUMNA_EVALUADOR in df.columns:
+        seccion_calibracion(clave, nodo_seleccionado, df, df_filtrado, almacen)
+
+    st.markdown("---")
+
+    # ============================
+    # Sección 5: Validación de notas y escenarios de ponderación
+    # ============================
+    seccion_recalculo(clave, nodo_seleccionado, cubo, df, df_filtrado)
+
+    # Trabajo evitado por caché y fragmentos en las últimas interacciones de la sesión
+    registro.cerrar()
+    with st.sidebar.expander("⏱️ Rendimiento del reporte"):
+        ultima = registro.historial[-1]
+        st.caption(f"Última ejecución completa: {ultima['segundos'] * 1000:.0f} ms, "
+                   f"trabajo evitado ≈ {ultima['ahorrado'] * 1000:.0f} ms")
+        st.dataframe(pd.DataFrame(registro.tabla_historial()), hide_index=True, use_container_width=True)
+
+    # Panel de perfilado (opt-in: ?admin=1 en la URL o DESEMPENO_ADMIN=1)
+    if modo_admin:
+        panel_perfilado(registro)
+
+elif almacen is not None:
+    st.info(f"📂 Agrega al historial el export de {ANIO_REPORTE} para comenzar; los exports de años anteriores "
+            "completan la sección histórica.")
 else:
-    st.info("📂 Sube un archivo CSV para comenzar. El sistema intentará detectar distintos separadores y codificaciones.")
+    st.info("📂 Sube un archivo CSV para comenzar. El sistema detecta automáticamente el separador, la codificación y la coma decimal.")
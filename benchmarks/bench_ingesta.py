@@ -0,0 +1,73 @@
+"""Comparación de tiempos: lectura antigua (tres intentos con engine="python") vs. leer_csv.
+
+Uso:
+    python benchmarks/bench_ingesta.py [--factor 100] [--repeticiones 3]
+
+Escala los dos CSV del repositorio repitiendo sus filas `factor` veces.
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from desempeno.ingesta import leer_csv  # noqa: E402
+
+ARCHIVOS = ["Desempeño  2024.csv", "Desempeño - Piton.csv"]
+
+
+def escalar_csv(ruta, factor):
+    """Repite las filas de datos `factor` veces conservando el encabezado (y el BOM)."""
+    with open(ruta, "rb") as f:
+        encabezado, _, cuerpo = f.read().partition(b"\n")
+    if not cuerpo.endswith(b"\n"):
+        cuerpo += b"\n"
+    return encabezado + b"\n" + cuerpo * factor
+
+
+def lectura_antigua(datos):
+    """Réplica de la lectura anterior de load_and_process_data."""
+    archivo = io.BytesIO(datos)
+    try:
+        return pd.read_csv(archivo, sep=";", encoding="utf-8", engine="python")
+    except Exception:
+        try:
+            archivo.seek(0)
+            return pd.read_csv(archivo, sep=",", encoding="latin-1", engine="python")
+        except Exception:
+            archivo.seek(0)
+            return pd.read_csv(archivo, sep="\t", encoding="utf-8", engine="python")
+
+
+def cronometrar(funcion, datos, repeticiones):
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        df = funcion(datos)
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor, df
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--factor", type=int, default=100)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    args = parser.parse_args()
+
+    for nombre in ARCHIVOS:
+        datos = escalar_csv(os.path.join(RAIZ, nombre), args.factor)
+        t_antigua, df_antiguo = cronometrar(lectura_antigua, datos, args.repeticiones)
+        t_nueva, df_nuevo = cronometrar(leer_csv, datos, args.repeticiones)
+        print(f"{nombre} x{args.factor}: {len(datos) / 1e6:.1f} MB, {len(df_nuevo):,} filas")
+        print(f"  antigua (python, 3 intentos): {t_antigua:.3f} s  ({df_antiguo.shape[1]} columnas)")
+        print(f"  leer_csv (C, una pasada):     {t_nueva:.3f} s  ({df_nuevo.shape[1]} columnas)")
+        print(f"  aceleración: {t_antigua / t_nueva:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Prueba de carga: memoria del proceso por cada sesión adicional que abre el reporte.
+
+Uso:
+    python benchmarks/bench_sesiones.py [--filas 100000] [--sesiones 20] [--salida sesiones.json]
+
+Genera un export sintético y simula varias sesiones de Streamlit en el mismo proceso
+(streamlit.testing AppTest, una por usuario): cada una sube el mismo archivo, elige
+una Dirección distinta y abre un trabajador, y todas quedan vivas hasta el final,
+como pestañas abiertas. Después de cada sesión se mide la memoria residente del
+proceso. Con el registro compartido de datasets, la primera sesión paga la carga y
+las siguientes solo su estado (selecciones, vistas y su copia del archivo subido).
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+# Guion que corre cada sesión: el archivo "subido" se lee una vez por sesión y queda en su estado,
+# como lo guarda Streamlit para cada usuario.
+GUION_SESION = '''
+import io
+import sys
+
+import streamlit as st
+
+
+class ArchivoSubido(io.BytesIO):
+    name = {ruta!r}
+    file_id = "export"
+
+
+if "_archivo_subido" not in st.session_state:
+    with open({ruta!r}, "rb") as f:
+        st.session_state._archivo_subido = f.read()
+st.file_uploader = lambda *a, **k: ArchivoSubido(st.session_state._archivo_subido)
+sys.path.insert(0, {raiz!r})
+exec(compile(open({app!r}, encoding="utf-8").read(), {app!r}, "exec"))
+'''
+
+
+def rss_mb():
+    """Memoria residente actual del proceso en MB (Linux); en otros sistemas, la máxima."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def abrir_sesion(guion, indice, timeout):
+    """Una sesión: carga el reporte, elige una Dirección (distinta por sesión) y selecciona un trabajador."""
+    from streamlit.testing.v1 import AppTest
+
+    sesion = AppTest.from_file(guion, default_timeout=timeout).run()
+    direcciones = sesion.sidebar.selectbox[0].options
+    sesion.sidebar.selectbox[0].select_index(1 + indice % (len(direcciones) - 1)).run()
+    trabajadores = sesion.multiselect(key="trabajador_seleccionado_state")
+    if trabajadores.options:
+        trabajadores.select(trabajadores.options[0]).run()
+    if sesion.exception:
+        raise RuntimeError(f"La sesión {indice + 1} terminó con errores: {sesion.exception}")
+    return sesion
+
+
+def ejecutar(filas, semilla, sesiones, timeout):
+    from desempeno.sintetico import generar_csv
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Caché en disco propio: la primera sesión procesa el archivo desde cero.
+        os.environ["DESEMPENO_CACHE_DIR"] = os.path.join(tmp, "cache")
+        ruta = os.path.join(tmp, "export.csv")
+        generar_csv(ruta, filas, semilla, historial=True)
+        tamano_mb = os.path.getsize(ruta) / 1e6
+        guion = os.path.join(tmp, "sesion.py")
+        with open(guion, "w", encoding="utf-8") as f:
+            f.write(GUION_SESION.format(ruta=ruta, raiz=RAIZ, app=os.path.join(RAIZ, "app.py")))
+        print(f"Export sintético: {filas:,} filas, {tamano_mb:.0f} MB")
+
+        gc.collect()
+        base = rss_mb()
+        abiertas, medidas = [], []
+        for i in range(sesiones):
+            inicio = time.perf_counter()
+            abiertas.append(abrir_sesion(guion, i, timeout))
+            segundos = time.perf_counter() - inicio
+            gc.collect()
+            memoria = rss_mb()
+            anterior = medidas[-1]["rss_mb"] if medidas else base
+            medidas.append({"sesion": i + 1, "segundos": round(segundos, 3), "rss_mb": round(memoria, 1),
+                            "incremento_mb": round(memoria - anterior, 1)})
+            print(f"  sesión {i + 1:>3}  {segundos:7.2f} s  RSS {memoria:8.1f} MB  (+{memoria - anterior:.1f} MB)")
+
+    adicionales = [m["incremento_mb"] for m in medidas[1:]]
+    por_sesion = sum(adicionales) / len(adicionales) if adicionales else float("nan")
+    return {
+        "filas": filas,
+        "archivo_mb": round(tamano_mb, 1),
+        "rss_base_mb": round(base, 1),
+        "primera_sesion_mb": medidas[0]["incremento_mb"] if medidas else None,
+        "mb_por_sesion_adicional": round(por_sesion, 1),
+        "sesiones": medidas,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--sesiones", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=300, help="Segundos máximos por ejecución de una sesión.")
+    parser.add_argument("--salida", help="Archivo JSON con los resultados.")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.filas, args.semilla, args.sesiones, args.timeout)
+    print(f"Primera sesión: +{resultado['primera_sesion_mb']:.0f} MB (carga del dataset y cachés derivados); "
+          f"cada sesión adicional: +{resultado['mb_por_sesion_adicional']:.1f} MB "
+          f"(incluye su copia del archivo subido, {resultado['archivo_mb']:.0f} MB)")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+"""Suite de benchmarks por etapa sobre un export sintético de tamaño configurable.
+
+Uso:
+    python benchmarks/bench_suite.py [--filas 1000000] [--repeticiones 3] [--salida resultados.json]
+    python benchmarks/bench_suite.py --filas 200000 --comparar base.json [--tolerancia 0.2]
+
+Genera el CSV con desempeno.sintetico (historial 2022-2024) y mide por separado la
+ingesta (completa y por bloques), el índice de jerarquía, el filtrado por nodo, el
+cubo, los KPIs, el ranking de líderes, las trayectorias, las figuras, el índice de
+personas, los grupos de pares (percentiles masivos), la calibración de evaluadores,
+el recálculo de notas con un escenario de ponderación, la tabla paginada y la
+exportación de la clínica completa (Parquet, CSV y Excel, sin caché). Cada etapa registra su mejor tiempo y el pico de
+memoria que asigna (tracemalloc, en una corrida aparte para no distorsionar el
+tiempo). El resultado es un JSON con el commit y las versiones; `--comparar`
+muestra la razón contra un JSON anterior y termina con código 1 si alguna etapa
+empeoró más que la tolerancia.
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from desempeno.calibracion import CalibracionEvaluadores  # noqa: E402
+from desempeno.constantes import (  # noqa: E402
+    COLORES_CATEGORIAS, COMPETENCIAS_TRANSVERSALES, PATRON_CARGOS_LIDERAZGO,
+)
+from desempeno.cubo import CuboKPI  # noqa: E402
+from desempeno.exportacion import FORMATOS, CacheExportaciones  # noqa: E402
+from desempeno.graficos import figura_categorias, figura_feedback, figura_radar, tabla_categorias  # noqa: E402
+from desempeno.ingesta import leer_csv  # noqa: E402
+from desempeno.jerarquia import IndiceJerarquia, TODAS  # noqa: E402
+from desempeno.paginacion import TablaPaginada  # noqa: E402
+from desempeno.pares import EstadisticasPares  # noqa: E402
+from desempeno.personas import IndicePersonas  # noqa: E402
+from desempeno.procesamiento import procesar_datos  # noqa: E402
+from desempeno.recalculo import MatrizCompetencias, PerfilPesos  # noqa: E402
+from desempeno.sintetico import generar_csv  # noqa: E402
+from desempeno.streaming import procesar_por_bloques  # noqa: E402
+from desempeno.trayectorias import clasificar_trayectorias  # noqa: E402
+
+
+def medir(funcion, repeticiones):
+    """(mejor tiempo en s, pico asignado en MB, resultado de la última corrida)."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    del resultado
+    tracemalloc.start()
+    resultado = funcion()
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return mejor, pico / 1e6, resultado
+
+
+def nodos_muestra(indice, cantidad=20):
+    """Raíz, cada Dirección y hasta `cantidad` nodos Dirección/Área/Sub-área (los mismos en cada corrida)."""
+    nodos = [(TODAS, TODAS, TODAS)] + [(d, TODAS, TODAS) for d in indice.direcciones]
+    hojas = [(d, a, s) for d in indice.direcciones for a in indice.opciones_area(d)
+             for s in indice.opciones_subarea(d, a)]
+    paso = max(1, len(hojas) // cantidad)
+    return nodos + hojas[::paso][:cantidad]
+
+
+def etapas(ruta, tamano_bloque):
+    """Etapas en orden de dependencia: (nombre, función que recibe el estado y devuelve su resultado)."""
+    def figuras(e):
+        competencias = e["cubo"].competencias_liderazgo
+        specs = []
+        for nodo in e["nodos"]:
+            specs.append(figura_categorias(tabla_categorias(e["cubo"].distribucion_categorias(*nodo))).to_json())
+            specs.append(figura_feedback(e["cubo"].distribucion_feedback(*nodo)).to_json())
+            specs.append(figura_radar(competencias, [
+                ("Promedio Clínica", e["cubo"].promedios(competencias), COLORES_CATEGORIAS["Destacado"]),
+                ("Nodo", e["cubo"].promedios(competencias, *nodo), COLORES_CATEGORIAS["Cumple"]),
+            ]).to_json())
+        return specs
+
+    def tabla_paginada(e):
+        tabla = TablaPaginada(e["indice"].df)
+        for nodo in e["nodos"]:
+            seleccion = tabla.consultar(e["indice"].posiciones(*nodo), busqueda="jefe")
+            tabla.pagina(seleccion, 1, 50)
+        return tabla
+
+    def pares(e):
+        # Índice de grupos de pares y ranking masivo de todas las filas contra su Sub-área, Área y Dirección.
+        estadisticas = EstadisticasPares(e["ingesta"], COMPETENCIAS_TRANSVERSALES + ["Nota_num_2024"])
+        return [estadisticas.percentiles_filas(columna, nivel) for columna in estadisticas.columnas
+                for nivel in ("Sub-área", "Área", "Dirección")]
+
+    def recalculo(e):
+        # Matriz de competencias, validación contra el export y un escenario con perfil de liderazgo.
+        matriz = MatrizCompetencias(e["ingesta"])
+        escenario = [PerfilPesos("Liderazgo", peso_metas=0.3, patron_cargo=PATRON_CARGOS_LIDERAZGO),
+                     PerfilPesos("General", peso_metas=0.3)]
+        return matriz.validar(), matriz.comparar_escenario(escenario)
+
+    def exportacion(e):
+        # Toda la clínica con todas las columnas, en cada formato, en un directorio nuevo (sin aciertos de caché).
+        with tempfile.TemporaryDirectory() as directorio:
+            exportaciones = CacheExportaciones(directorio)
+            return {formato: os.path.getsize(exportaciones.exportar("clinica", formato, e["ingesta"]))
+                    for formato in FORMATOS}
+
+    return [
+        ("ingesta", lambda e: procesar_datos(leer_csv(ruta))[0]),
+        ("ingesta_bloques", lambda e: procesar_por_bloques(ruta, e["feather"], tamano_bloque)),
+        ("indice_jerarquia", lambda e: IndiceJerarquia(e["ingesta"])),
+        ("filtrado", lambda e: [len(e["indice"].filtrar(*nodo)) for nodo in e["nodos"]]),
+        ("cubo", lambda e: CuboKPI(e["ingesta"])),
+        ("kpis", lambda e: [(e["cubo"].kpis(*nodo), e["cubo"].distribucion_categorias(*nodo),
+                             e["cubo"].distribucion_feedback(*nodo)) for nodo in e["nodos"]]),
+        ("ranking_lideres", lambda e: [e["cubo"].ranking_lideres(*nodo) for nodo in e["nodos"]]),
+        ("trayectorias", lambda e: clasificar_trayectorias(e["ingesta"])),
+        ("figuras", figuras),
+        ("personas", lambda e: IndicePersonas(e["ingesta"])),
+        ("pares", pares),
+        ("calibracion", lambda e: CalibracionEvaluadores.desde_df(e["ingesta"]).resumen()),
+        ("recalculo", recalculo),
+        ("tabla_paginada", tabla_paginada),
+        ("exportacion", exportacion),
+    ]
+
+
+def _commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=RAIZ, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def _rss_pico_mb():
+    try:
+        import resource
+    except ImportError:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def ejecutar(filas, semilla, repeticiones, tamano_bloque, solo=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "sintetico.csv")
+        inicio = time.perf_counter()
+        generar_csv(ruta, filas, semilla, historial=True)
+        print(f"Export sintético: {filas:,} filas, {os.path.getsize(ruta) / 1e6:.0f} MB "
+              f"({time.perf_counter() - inicio:.1f} s)")
+
+        estado = {"feather": os.path.join(tmp, "datos.feather")}
+        resultados = {}
+        for nombre, funcion in etapas(ruta, tamano_bloque):
+            # Las etapas de las que dependen otras se ejecutan igual, aunque no se pidan.
+            if solo and nombre not in solo and nombre not in ("ingesta", "indice_jerarquia", "cubo"):
+                continue
+            segundos, memoria, resultado = medir(lambda: funcion(estado), repeticiones)
+            estado[nombre] = resultado
+            if nombre == "ingesta_bloques":
+                estado.pop(nombre)
+            if nombre == "indice_jerarquia":
+                estado["indice"] = resultado
+                estado["nodos"] = nodos_muestra(resultado)
+            resultados[nombre] = {"segundos": round(segundos, 4), "memoria_mb": round(memoria, 1)}
+            print(f"  {nombre:<18} {segundos:8.3f} s  {memoria:8.1f} MB")
+        filas_procesadas = len(estado["ingesta"])
+
+    return {
+        "commit": _commit(),
+        "fecha": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "versiones": {"pandas": pd.__version__, "numpy": np.__version__, "pyarrow": pa.__version__},
+        "filas": filas_procesadas,
+        "semilla": semilla,
+        "repeticiones": repeticiones,
+        "rss_pico_mb": _rss_pico_mb(),
+        "etapas": resultados,
+    }
+
+
+def comparar(actual, base, tolerancia):
+    """Imprime la razón actual/base por etapa; devuelve las etapas que empeoraron más que la tolerancia."""
+    print(f"\nComparación con {base.get('commit')} ({base.get('filas'):,} filas):")
+    peores = []
+    for nombre, medida in actual["etapas"].items():
+        anterior = base["etapas"].get(nombre)
+        if not anterior:
+            continue
+        razon = medida["segundos"] / anterior["segundos"] if anterior["segundos"] else float("nan")
+        marca = ""
+        if razon > 1 + tolerancia:
+            marca = "  <-- más lento"
+            peores.append(nombre)
+        print(f"  {nombre:<18} {anterior['segundos']:8.3f} -> {medida['segundos']:8.3f} s  x{razon:.2f}"
+              f"   memoria {anterior['memoria_mb']:.0f} -> {medida['memoria_mb']:.0f} MB{marca}")
+    return peores
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--filas", type=int, default=200_000)
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--bloque", type=int, default=50_000, help="Filas por bloque en la ingesta por bloques.")
+    parser.add_argument("--etapas", nargs="*", help="Solo estas etapas (y las que necesitan).")
+    parser.add_argument("--salida", help="Archivo JSON con los resultados.")
+    parser.add_argument("--comparar", help="JSON de una corrida anterior contra el cual comparar.")
+    parser.add_argument("--tolerancia", type=float, default=0.2,
+                        help="Empeoramiento relativo aceptado al comparar (0.2 = 20%%).")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.filas, args.semilla, args.repeticiones, args.bloque, args.etapas)
+    if resultado["rss_pico_mb"] is not None:
+        print(f"Memoria pico del proceso: {resultado['rss_pico_mb']:.0f} MB")
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+    if args.comparar:
+        with open(args.comparar, encoding="utf-8") as f:
+            base = json.load(f)
+        if comparar(resultado, base, args.tolerancia):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
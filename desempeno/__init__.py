@@ -0,0 +1 @@
+"""Procesamiento del reporte de desempeño (independiente de la interfaz Streamlit)."""
@@ -0,0 +1,248 @@
+"""Almacén incremental de evaluaciones particionado por año y ronda.
+
+Cada export se agrega como una o más particiones `anio=<año>/ronda=<Tipo de Evaluación>`.
+Agregar una ronda solo reescribe esa partición (deduplicando por documento y
+evaluador) y recalcula sus agregados de hojas y de evaluadores (con los nombres de
+los evaluadores); el resto del historial no se toca, y la calibración del reporte
+se arma sumando esos agregados, sin volver a leer filas.
+Las consultas leen solo las particiones pedidas.
+
+El reporte lo usa como origen "Historial acumulado": cada export anual se agrega desde
+la app (o con la línea de comandos, sobre el mismo directorio) y el dataset del
+reporte es `vista_historica` del año en curso, así que no hace falta un archivo único
+con las columnas de todos los años.
+
+Uso:
+    python -m desempeno.almacen archivo.csv --anio 2024 [--directorio DIR]
+"""
+import argparse
+import hashlib
+import os
+from urllib.parse import quote, unquote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from desempeno.cache_disco import escribir_feather_atomico
+from desempeno.calibracion import (
+    CalibracionEvaluadores, agregar_evaluadores, combinar_evaluadores, nombres_evaluadores
+)
+from desempeno.constantes import COLUMNA_DOCUMENTO, COLUMNA_EVALUADOR, COLUMNA_RONDA
+from desempeno.cubo import COLUMNA_CATEGORIA, COLUMNA_NOTA, agregar_hojas, combinar_hojas
+from desempeno.esquema import aplicar_esquema
+from desempeno.ingesta import a_numerico, leer_csv
+from desempeno.procesamiento import procesar_datos
+
+DIRECTORIO_ALMACEN = os.environ.get(
+    "DESEMPENO_ALMACEN_DIR", os.path.join(os.path.expanduser("~"), ".local", "share", "desempeno", "almacen")
+)
+
+RONDA_SIN_ASIGNAR = "Sin Ronda"
+
+ARCHIVO_DATOS = "datos.feather"
+ARCHIVO_AGREGADOS = "agregados.feather"
+ARCHIVO_EVALUADORES = "evaluadores.feather"
+ARCHIVO_NOMBRES_EVALUADORES = "nombres_evaluadores.feather"
+
+
+def normalizar_export(df_proc, anio):
+    """Columnas genéricas del año del export: Nota, Nota_num y Categoría."""
+    df = df_proc.copy()
+    for generica, del_anio in [("Nota", f"Nota {anio}"), ("Categoría", f"Categoría {anio}")]:
+        if del_anio in df.columns:
+            df[generica] = df[del_anio]
+    if "Categoría" not in df.columns and "Categoria" in df.columns:
+        df = df.rename(columns={"Categoria": "Categoría"})
+    if "Nota" in df.columns:
+        df["Nota_num"] = a_numerico(df["Nota"])
+    return df
+
+
+def _agregados_particion(df):
+    """Agregados de hojas de una partición, con la nota/categoría del año en las columnas del cubo."""
+    renombres = {"Nota_num": COLUMNA_NOTA, "Categoría": COLUMNA_CATEGORIA}
+    return agregar_hojas(df.drop(columns=list(renombres.values()), errors="ignore").rename(columns=renombres))
+
+
+def _evaluadores_particion(df):
+    """Agregados de calibración de evaluadores de una partición (mismas columnas que el cubo)."""
+    renombres = {"Nota_num": COLUMNA_NOTA, "Categoría": COLUMNA_CATEGORIA}
+    return agregar_evaluadores(df.drop(columns=list(renombres.values()), errors="ignore").rename(columns=renombres))
+
+
+class AlmacenEvaluaciones:
+    """Particiones (año, ronda) en Feather, cada una con sus datos y sus agregados de hojas."""
+
+    def __init__(self, directorio=DIRECTORIO_ALMACEN):
+        self.directorio = directorio
+
+    def _ruta(self, anio, ronda):
+        return os.path.join(self.directorio, f"anio={anio}", f"ronda={quote(str(ronda), safe='')}")
+
+    def particiones(self, anios=None, rondas=None):
+        """Lista ordenada de (año, ronda) presentes, opcionalmente filtrada."""
+        resultado = []
+        if not os.path.isdir(self.directorio):
+            return resultado
+        for dir_anio in os.scandir(self.directorio):
+            if not (dir_anio.is_dir() and dir_anio.name.startswith("anio=")):
+                continue
+            anio = int(dir_anio.name[len("anio="):])
+            if anios is not None and anio not in anios:
+                continue
+            for dir_ronda in os.scandir(dir_anio.path):
+                if not dir_ronda.name.startswith("ronda="):
+                    continue
+                ronda = unquote(dir_ronda.name[len("ronda="):])
+                if rondas is not None and ronda not in rondas:
+                    continue
+                if os.path.exists(os.path.join(dir_ronda.path, ARCHIVO_DATOS)):
+                    resultado.append((anio, ronda))
+        return sorted(resultado)
+
+    def version(self):
+        """Huella del contenido (particiones con fecha y tamaño de sus datos); cambia al agregar una ronda."""
+        huella = hashlib.sha256()
+        for anio, ronda in self.particiones():
+            info = os.stat(os.path.join(self._ruta(anio, ronda), ARCHIVO_DATOS))
+            huella.update(f"{anio}|{ronda}|{info.st_mtime_ns}|{info.st_size}\n".encode("utf-8"))
+        return huella.hexdigest()
+
+    def _leer_particion(self, anio, ronda, columnas=None):
+        ruta = os.path.join(self._ruta(anio, ronda), ARCHIVO_DATOS)
+        tabla = feather.read_table(ruta, memory_map=True)
+        if columnas is not None:
+            tabla = tabla.select([c for c in columnas if c in tabla.column_names])
+        return tabla.to_pandas()
+
+    def agregar(self, df_proc, anio):
+        """Agrega un export procesado del año `anio`. Devuelve las particiones (año, ronda) actualizadas."""
+        df = normalizar_export(df_proc, anio)
+        if COLUMNA_RONDA in df.columns:
+            rondas = df[COLUMNA_RONDA].astype(object).fillna(RONDA_SIN_ASIGNAR)
+        else:
+            rondas = pd.Series(RONDA_SIN_ASIGNAR, index=df.index)
+
+        clave_dedup = [c for c in [COLUMNA_DOCUMENTO, COLUMNA_EVALUADOR] if c in df.columns]
+        actualizadas = []
+        for ronda, nuevas in df.groupby(rondas.to_numpy(), sort=True):
+            ruta = self._ruta(anio, ronda)
+            existentes = (self._leer_particion(anio, ronda)
+                          if os.path.exists(os.path.join(ruta, ARCHIVO_DATOS)) else None)
+            particion = nuevas if existentes is None else pd.concat([existentes, nuevas], ignore_index=True)
+            if clave_dedup:
+                # Una re-subida de la misma evaluación reemplaza a la anterior.
+                particion = particion.drop_duplicates(subset=clave_dedup, keep="last")
+            particion = particion.reset_index(drop=True)
+
+            os.makedirs(ruta, exist_ok=True)
+            escribir_feather_atomico(pa.Table.from_pandas(particion, preserve_index=False),
+                                     os.path.join(ruta, ARCHIVO_DATOS))
+            escribir_feather_atomico(pa.Table.from_pandas(_agregados_particion(particion)),
+                                     os.path.join(ruta, ARCHIVO_AGREGADOS))
+            if COLUMNA_EVALUADOR in particion.columns:
+                escribir_feather_atomico(pa.Table.from_pandas(_evaluadores_particion(particion)),
+                                         os.path.join(ruta, ARCHIVO_EVALUADORES))
+                nombres = nombres_evaluadores(particion)
+                if nombres is not None:
+                    escribir_feather_atomico(pa.Table.from_pandas(nombres.reset_index(), preserve_index=False),
+                                             os.path.join(ruta, ARCHIVO_NOMBRES_EVALUADORES))
+            actualizadas.append((anio, ronda))
+        return actualizadas
+
+    def leer(self, anios=None, rondas=None, columnas=None):
+        """Filas de las particiones pedidas, con columnas "Año" y "Ronda" y el esquema compacto aplicado."""
+        partes = []
+        for anio, ronda in self.particiones(anios, rondas):
+            parte = self._leer_particion(anio, ronda, columnas)
+            parte["Año"] = anio
+            parte["Ronda"] = ronda
+            partes.append(parte)
+        if not partes:
+            return pd.DataFrame(columns=columnas)
+        df = pd.concat(partes, ignore_index=True)
+        # Las categorías difieren entre particiones; se recompone el esquema sobre el resultado.
+        aplicar_esquema(df)
+        return df
+
+    def agregados(self, anios=None, rondas=None):
+        """Suma de los agregados de hojas de las particiones pedidas (sin leer filas)."""
+        tablas = []
+        for anio, ronda in self.particiones(anios, rondas):
+            ruta = os.path.join(self._ruta(anio, ronda), ARCHIVO_AGREGADOS)
+            tablas.append(feather.read_table(ruta).to_pandas())
+        return combinar_hojas(tablas)
+
+    def calibracion(self, anios=None, rondas=None):
+        """Calibración de evaluadores sumando los agregados de las particiones pedidas (sin leer filas)."""
+        tablas, nombres = [], []
+        for anio, ronda in self.particiones(anios, rondas):
+            ruta = os.path.join(self._ruta(anio, ronda), ARCHIVO_EVALUADORES)
+            if os.path.exists(ruta):
+                tablas.append(feather.read_table(ruta).to_pandas())
+                nombres.append(self._nombres_evaluadores(anio, ronda))
+        tabla = combinar_evaluadores(tablas)
+        if tabla is None:
+            return None
+        nombres = [n for n in nombres if n is not None]
+        # Como en `CalibracionEvaluadores.desde_df`, vale el primer nombre (en el orden de las particiones).
+        nombres = pd.concat(nombres).groupby(level=0, sort=False).first() if nombres else None
+        return CalibracionEvaluadores(tabla, nombres)
+
+    def _nombres_evaluadores(self, anio, ronda):
+        ruta = os.path.join(self._ruta(anio, ronda), ARCHIVO_NOMBRES_EVALUADORES)
+        if os.path.exists(ruta):
+            nombres = feather.read_table(ruta).to_pandas()
+            return nombres.set_index(COLUMNA_EVALUADOR)["Evaluador"]
+        # Particiones escritas antes de guardar los nombres: se leen solo las dos columnas.
+        return nombres_evaluadores(self._leer_particion(anio, ronda, [COLUMNA_EVALUADOR, "Evaluador"]))
+
+    def vista_historica(self, anio_actual, rondas=None):
+        """Filas del año actual con Nota/Categoría de cada año del almacén lado a lado.
+
+        Produce las columnas que usa el reporte ("Nota <año>", "Categoría <año>", "Nota_num_<año>").
+        Para años anteriores se toma, por documento, la evaluación de la última ronda.
+        """
+        df = self.leer([anio_actual], rondas)
+        if df.empty:
+            return df
+
+        def por_anio(anio):
+            return {"Nota": f"Nota {anio}", "Categoría": f"Categoría {anio}", "Nota_num": f"Nota_num_{anio}"}
+
+        for generica, del_anio in por_anio(anio_actual).items():
+            if generica in df.columns:
+                df[del_anio] = df[generica]
+
+        anios_previos = sorted({anio for anio, _ in self.particiones()} - {anio_actual})
+        for anio in [a for a in anios_previos if a < anio_actual]:
+            previo = self.leer([anio], columnas=[COLUMNA_DOCUMENTO] + list(por_anio(anio)))
+            if previo.empty or COLUMNA_DOCUMENTO not in previo.columns:
+                continue
+            previo = previo.drop_duplicates(subset=[COLUMNA_DOCUMENTO], keep="last")
+            previo = previo.drop(columns=["Año", "Ronda"]).rename(columns=por_anio(anio))
+            # Columnas del año que el export actual pudiera traer (p. ej. vacías) se reemplazan.
+            df = df.drop(columns=[c for c in previo.columns if c != COLUMNA_DOCUMENTO and c in df.columns])
+            df = df.merge(previo, on=COLUMNA_DOCUMENTO, how="left")
+        aplicar_esquema(df)
+        return df
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Agrega un export de evaluaciones al almacén particionado.")
+    parser.add_argument("archivo")
+    parser.add_argument("--anio", type=int, required=True)
+    parser.add_argument("--directorio", default=DIRECTORIO_ALMACEN)
+    args = parser.parse_args()
+
+    df_proc, avisos = procesar_datos(leer_csv(args.archivo))
+    for aviso in avisos:
+        print(f"Aviso: {aviso}")
+    almacen = AlmacenEvaluaciones(args.directorio)
+    for anio, ronda in almacen.agregar(df_proc, args.anio):
+        print(f"Partición actualizada: año={anio} ronda={ronda}")
+
+
+if __name__ == "__main__":
+    main()
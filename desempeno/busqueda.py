@@ -0,0 +1,171 @@
+"""Índice de búsqueda del lado del servidor para los selectores de personas y líderes.
+
+Se construye una vez por dataset. Las búsquedas no distinguen tildes ni mayúsculas
+("Guzman" encuentra "Guzmán"): primero por prefijo de palabra (todas las palabras
+de la consulta deben ser prefijo de alguna palabra del nombre, cargo o documento)
+y, si faltan resultados, por similitud de trigramas (tolera errores de tipeo). Se
+devuelven solo los `k` mejores resultados entre las personas permitidas por el
+filtro activo, de modo que al navegador viaja una lista corta.
+"""
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+MAX_RESULTADOS = 50
+SIMILITUD_MINIMA = 0.25
+
+_NO_ALFANUMERICO = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto):
+    """Minúsculas sin tildes ni diacríticos ("Núñez" → "nunez")."""
+    texto = unicodedata.normalize("NFKD", str(texto))
+    return texto.encode("ascii", "ignore").decode("ascii").lower()
+
+
+def palabras(texto):
+    return [p for p in _NO_ALFANUMERICO.split(texto) if p]
+
+
+def trigramas(texto):
+    """Trigramas de cada palabra, con bordes marcados (" gu", "guz", ..., "an ")."""
+    resultado = set()
+    for palabra in palabras(texto):
+        palabra = f" {palabra} "
+        resultado.update(palabra[i:i + 3] for i in range(len(palabra) - 2))
+    return resultado
+
+
+class IndiceBusqueda:
+    """Búsqueda por prefijo y por similitud sobre los textos de cada clave (persona o líder).
+
+    `textos` es un dict campo → lista de textos alineada con `claves`. Los campos
+    `compactos` (p. ej. el documento) también se indexan sin separadores, para que
+    "10033948" encuentre "10.033.948-k".
+    """
+
+    def __init__(self, claves, textos, compactos=()):
+        self.claves = list(claves)
+        self._posicion = {clave: i for i, clave in enumerate(self.claves)}
+        ids = np.arange(len(self.claves))
+
+        # Cada texto distinto se normaliza y se parte en palabras una sola vez (nombres y cargos se repiten).
+        pares, orden_nombre = [], None
+        for campo, valores in textos.items():
+            codigos, unicos = pd.factorize(pd.Series(valores, dtype=object).fillna(""))
+            normalizados = [normalizar(u) for u in unicos]
+            if orden_nombre is None:
+                # Orden por el primer campo (el nombre): es el orden de la lista sin consulta y de los empates.
+                orden_nombre = np.array(normalizados, dtype=str)[codigos] if len(codigos) else np.array([], dtype=str)
+            fichas = [(u, p) for u, texto in enumerate(normalizados) for p in palabras(texto)]
+            if campo in compactos:
+                fichas += [(u, _NO_ALFANUMERICO.sub("", texto)) for u, texto in enumerate(normalizados)]
+            fichas = pd.DataFrame(fichas, columns=["codigo", "palabra"])
+            pares.append(pd.DataFrame({"codigo": codigos, "id": ids}).merge(fichas, on="codigo")[["palabra", "id"]])
+
+        self._orden = np.argsort(orden_nombre if orden_nombre is not None else np.zeros(len(ids)), kind="stable")
+        self._rango = np.empty(len(self.claves), dtype=np.int64)
+        self._rango[self._orden] = ids
+
+        # Palabras ordenadas con su clave: un prefijo es un tramo contiguo (búsqueda binaria).
+        pares = pd.concat(pares) if pares else pd.DataFrame({"palabra": [], "id": []})
+        pares = pares[pares["palabra"] != ""]
+        palabras_ordenadas = pares["palabra"].to_numpy(dtype=str)
+        orden = np.argsort(palabras_ordenadas, kind="stable")
+        self._palabras = palabras_ordenadas[orden]
+        self._ids_palabras = pares["id"].to_numpy(dtype=np.int64)[orden]
+
+        # Vocabulario para la búsqueda aproximada (se indexa en la primera consulta que la necesita).
+        self._vocabulario = None
+
+    def __len__(self):
+        return len(self.claves)
+
+    def mascara(self, claves):
+        """Máscara booleana (alineada con `self.claves`) de las claves dadas."""
+        mascara = np.zeros(len(self.claves), dtype=bool)
+        posiciones = [self._posicion[c] for c in claves if c in self._posicion]
+        mascara[posiciones] = True
+        return mascara
+
+    def permitida(self, clave, permitidos=None):
+        """Si `clave` está en el índice (y en la máscara `permitidos`, si se da)."""
+        posicion = self._posicion.get(clave)
+        return posicion is not None and (permitidos is None or bool(permitidos[posicion]))
+
+    def _tramo(self, palabra, prefijo=True):
+        """Claves (únicas) con alguna palabra que empieza por `palabra` (o igual a ella, sin `prefijo`)."""
+        inicio = np.searchsorted(self._palabras, palabra, side="left")
+        if prefijo:
+            # Las palabras normalizadas son ASCII: todo lo que empieza por `palabra` es menor que palabra + "\x7f".
+            final = np.searchsorted(self._palabras, palabra + "\x7f", side="left")
+        else:
+            final = np.searchsorted(self._palabras, palabra, side="right")
+        return np.unique(self._ids_palabras[inicio:final])
+
+    def _construir_vocabulario(self):
+        # Solo palabras con letras: los documentos se buscan por prefijo, no por parecido.
+        vocabulario = [p for p in np.unique(self._palabras).tolist() if not any(c.isdigit() for c in p)]
+        pares = [(t, i) for i, palabra in enumerate(vocabulario) for t in trigramas(palabra)]
+        tabla = pd.DataFrame(pares, columns=["trigrama", "palabra"])
+        self._n_trigramas = np.bincount(tabla["palabra"].to_numpy(dtype=np.int64), minlength=len(vocabulario))
+        self._trigramas = {t: ids.to_numpy() for t, ids in tabla.groupby("trigrama")["palabra"]}
+        self._vocabulario = vocabulario
+
+    def _parecidas(self, palabra):
+        """Palabras del vocabulario con similitud de trigramas (Jaccard) de al menos SIMILITUD_MINIMA."""
+        if self._vocabulario is None:
+            self._construir_vocabulario()
+        buscados = trigramas(palabra)
+        listas = [self._trigramas[t] for t in buscados if t in self._trigramas]
+        if not listas:
+            return []
+        comunes = np.bincount(np.concatenate(listas), minlength=len(self._vocabulario))
+        candidatas = np.flatnonzero(comunes)
+        similitud = comunes[candidatas] / (len(buscados) + self._n_trigramas[candidatas] - comunes[candidatas])
+        return [self._vocabulario[i] for i in candidatas[similitud >= SIMILITUD_MINIMA]]
+
+    def _coincidencias(self, consulta, aproximada=False):
+        """Claves en las que cada palabra de la consulta es prefijo de alguna palabra (o, aproximada, se le parece)."""
+        ids = None
+        for palabra in palabras(consulta):
+            encontrados = self._tramo(palabra)
+            if aproximada and not any(c.isdigit() for c in palabra):
+                parecidas = [self._tramo(p, prefijo=False) for p in self._parecidas(palabra)]
+                encontrados = np.unique(np.concatenate([encontrados] + parecidas))
+            ids = encontrados if ids is None else np.intersect1d(ids, encontrados, assume_unique=True)
+            if not len(ids):
+                break
+        return np.empty(0, dtype=np.int64) if ids is None else ids
+
+    def buscar(self, consulta="", k=MAX_RESULTADOS, permitidos=None):
+        """Hasta `k` claves que coinciden con `consulta` entre las `permitidos` (máscara booleana o None).
+
+        Sin consulta devuelve las primeras `k` en orden alfabético. Devuelve (claves, total), donde
+        `total` es la cantidad de coincidencias por prefijo (o aproximadas, si no hubo por prefijo).
+        """
+        consulta = normalizar(consulta).strip()
+        if not consulta:
+            ids = self._orden if permitidos is None else self._orden[permitidos[self._orden]]
+            return [self.claves[i] for i in ids[:k]], len(ids)
+
+        ids = self._coincidencias(consulta)
+        if permitidos is not None:
+            ids = ids[permitidos[ids]]
+        total = len(ids)
+        ids = ids[np.argsort(self._rango[ids], kind="stable")][:k]
+
+        if len(ids) < k:
+            # Completa con coincidencias aproximadas (errores de tipeo: "guzmna" → "guzman"), en orden alfabético.
+            similares = self._coincidencias(consulta, aproximada=True)
+            nuevos = ~np.isin(similares, ids)
+            if permitidos is not None:
+                nuevos &= permitidos[similares]
+            similares = similares[nuevos]
+            if not total:
+                total = len(similares)
+            similares = similares[np.argsort(self._rango[similares], kind="stable")]
+            ids = np.concatenate([ids, similares[:k - len(ids)]])
+        return [self.claves[i] for i in ids], total
@@ -0,0 +1,146 @@
+"""Caché persistente en disco de los datos ya procesados (formato Feather/Arrow IPC).
+
+La clave es un hash del contenido crudo del archivo más la versión de las reglas de
+procesamiento, así que sobrevive a reinicios, se comparte entre procesos/réplicas que
+montan el mismo directorio y reconoce re-subidas del mismo archivo. La lectura usa
+memory-map: un acierto no vuelve a parsear ni a limpiar el CSV.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from desempeno.esquema import COLUMNAS_CATEGORICAS, aplicar_esquema
+from desempeno.procesamiento import VERSION_PROCESAMIENTO
+
+DIRECTORIO_CACHE = os.environ.get(
+    "DESEMPENO_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "desempeno")
+)
+# Límites de la poda: tamaño total del directorio y antigüedad desde el último uso.
+MAX_BYTES_CACHE = int(os.environ.get("DESEMPENO_CACHE_MAX_MB", "1024")) * 1024 * 1024
+MAX_EDAD_SEGUNDOS = int(os.environ.get("DESEMPENO_CACHE_MAX_DIAS", "30")) * 24 * 3600
+
+EXTENSION = ".feather"
+CLAVE_AVISOS = b"desempeno.avisos"
+
+
+def clave_contenido(datos, version=VERSION_PROCESAMIENTO):
+    """Clave de caché: SHA-256 de los bytes crudos + versión de las reglas de procesamiento."""
+    return f"{hashlib.sha256(datos).hexdigest()}-v{version}"
+
+
+def _ruta(clave, directorio):
+    return os.path.join(directorio, clave + EXTENSION)
+
+
+def ruta_entrada(clave, directorio=DIRECTORIO_CACHE):
+    """Ruta del archivo de una entrada (para escritores por bloques que no pasan por `guardar`)."""
+    os.makedirs(directorio, exist_ok=True)
+    return _ruta(clave, directorio)
+
+
+def leer(clave, directorio=DIRECTORIO_CACHE):
+    """Devuelve (df_proc, avisos) desde disco, o None si no está en caché."""
+    ruta = _ruta(clave, directorio)
+    try:
+        tabla = feather.read_table(ruta, memory_map=True)
+    except (FileNotFoundError, pa.ArrowInvalid, OSError):
+        return None
+    # La fecha de modificación marca el último uso (para la poda por antigüedad/LRU).
+    try:
+        os.utime(ruta)
+    except OSError:
+        pass
+    metadata = tabla.schema.metadata or {}
+    avisos = json.loads(metadata.get(CLAVE_AVISOS, b"[]"))
+    df = tabla.to_pandas(split_blocks=True, self_destruct=True)
+    # Las entradas escritas por bloques guardan texto plano: el esquema compacto se aplica al leer.
+    if any(df[col].dtype != "category" for col in COLUMNAS_CATEGORICAS if col in df.columns):
+        df.attrs["memoria"] = aplicar_esquema(df)
+    return df, avisos
+
+
+def guardar(clave, df_proc, avisos=(), directorio=DIRECTORIO_CACHE):
+    """Guarda el DataFrame procesado. Un fallo al escribir no interrumpe el reporte."""
+    try:
+        os.makedirs(directorio, exist_ok=True)
+        tabla = pa.Table.from_pandas(df_proc, preserve_index=False)
+        metadata = dict(tabla.schema.metadata or {})
+        metadata[CLAVE_AVISOS] = json.dumps(list(avisos)).encode("utf-8")
+        tabla = tabla.replace_schema_metadata(metadata)
+        escribir_feather_atomico(tabla, _ruta(clave, directorio))
+    except (pa.ArrowException, OSError, TypeError, ValueError):
+        return False
+    podar(directorio)
+    return True
+
+
+@contextmanager
+def archivo_atomico(ruta):
+    """Entrega una ruta temporal junto a `ruta` y, si no hubo errores, la reemplaza de una vez.
+
+    Otros procesos nunca ven un archivo a medio escribir.
+    """
+    directorio = os.path.dirname(ruta) or "."
+    fd, tmp = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+    os.close(fd)
+    try:
+        yield tmp
+        os.replace(tmp, ruta)
+    finally:
+        _eliminar(tmp)
+
+
+def escribir_feather_atomico(tabla, ruta):
+    """Escribe una tabla Arrow sin comprimir de forma atómica."""
+    with archivo_atomico(ruta) as tmp:
+        # Sin compresión para que la lectura pueda mapear los buffers directamente.
+        feather.write_feather(tabla, tmp, compression="uncompressed")
+
+
+def podar(directorio=DIRECTORIO_CACHE, max_bytes=MAX_BYTES_CACHE, max_edad=MAX_EDAD_SEGUNDOS, extensiones=(EXTENSION,),
+          conservar=()):
+    """Elimina entradas más antiguas que max_edad y luego las menos usadas hasta quedar bajo max_bytes.
+
+    Las rutas de `conservar` (p. ej. la que se acaba de escribir) no se eliminan, aunque solas superen max_bytes.
+    """
+    conservar = {os.path.abspath(r) for r in conservar}
+    try:
+        nombres = os.listdir(directorio)
+    except FileNotFoundError:
+        return
+    ahora = time.time()
+    entradas = []
+    for nombre in nombres:
+        if not nombre.endswith(extensiones):
+            continue
+        ruta = os.path.join(directorio, nombre)
+        if os.path.abspath(ruta) in conservar:
+            continue
+        try:
+            info = os.stat(ruta)
+        except FileNotFoundError:
+            continue
+        if ahora - info.st_mtime > max_edad:
+            _eliminar(ruta)
+        else:
+            entradas.append((info.st_mtime, info.st_size, ruta))
+
+    total = sum(tamano for _, tamano, _ in entradas)
+    for _, tamano, ruta in sorted(entradas):
+        if total <= max_bytes:
+            break
+        _eliminar(ruta)
+        total -= tamano
+
+
+def _eliminar(ruta):
+    try:
+        os.remove(ruta)
+    except FileNotFoundError:
+        pass
@@ -0,0 +1,116 @@
+"""Caché LRU de figuras Plotly terminadas, compartido entre sesiones.
+
+La clave es (tipo de figura, clave de contenido del dataset, nodo u otras opciones
+que la determinan). Una vista repetida de la misma unidad con las mismas opciones
+reutiliza la figura ya construida sin volver a agregar ni armar trazas. Las figuras
+guardadas se comparten entre sesiones: se usan solo para dibujar, no se modifican.
+"""
+import threading
+from collections import OrderedDict
+
+from desempeno.constantes import COLORES_CATEGORIAS
+from desempeno.graficos import figura_categorias, figura_feedback, figura_radar, tabla_categorias
+from desempeno.jerarquia import TODAS
+
+MAX_FIGURAS = 256
+NINGUNO = "Ninguno"
+
+
+class CacheFiguras:
+    """LRU acotado por cantidad de figuras; seguro para varios hilos (sesiones y precalentado)."""
+
+    def __init__(self, max_entradas=MAX_FIGURAS):
+        self.max_entradas = max_entradas
+        self.aciertos = 0
+        self.fallos = 0
+        self._figuras = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._figuras)
+
+    def __contains__(self, clave):
+        return clave in self._figuras
+
+    def obtener(self, clave, construir):
+        """Figura de `clave`; si no está, la arma con `construir()` y la guarda (desalojando la menos usada)."""
+        with self._lock:
+            figura = self._figuras.get(clave)
+            if figura is not None:
+                self._figuras.move_to_end(clave)
+                self.aciertos += 1
+                return figura
+            self.fallos += 1
+        # Se construye fuera del lock: otra sesión puede armar la misma figura a la vez, sin bloquearse.
+        figura = construir()
+        self.guardar(clave, figura)
+        return figura
+
+    def guardar(self, clave, figura):
+        with self._lock:
+            self._figuras[clave] = figura
+            self._figuras.move_to_end(clave)
+            while len(self._figuras) > self.max_entradas:
+                self._figuras.popitem(last=False)
+
+    def descartar_dataset(self, clave_dataset):
+        """Quita las figuras de un dataset (el segundo elemento de cada clave es la clave de contenido)."""
+        with self._lock:
+            for clave in [clave for clave in self._figuras if clave[1] == clave_dataset]:
+                del self._figuras[clave]
+
+    def estadisticas(self):
+        return {"figuras": len(self._figuras), "aciertos": self.aciertos, "fallos": self.fallos}
+
+
+# --- Figuras por nodo (las mismas funciones sirven a la app y al precalentado) ---
+
+def figura_distribucion(cubo, nodo, porcentaje=True):
+    return figura_categorias(tabla_categorias(cubo.distribucion_categorias(*nodo)), porcentaje=porcentaje)
+
+
+def figura_feedback_nodo(cubo, nodo):
+    return figura_feedback(cubo.distribucion_feedback(*nodo))
+
+
+def trazas_radar(cubo, direccion=NINGUNO, lider=NINGUNO):
+    """Trazas del radar de liderazgo: Clínica, Dirección y Líder (None si no hay datos o no se eligió)."""
+    competencias = cubo.competencias_liderazgo
+
+    def con_datos(promedios):
+        return None if promedios is None or promedios.isnull().all() else promedios
+
+    clinica = con_datos(cubo.promedios(competencias)) if competencias else None
+    promedio_direccion = con_datos(cubo.promedios(competencias, direccion)) if direccion != NINGUNO else None
+    promedio_lider = con_datos(cubo.promedio_persona(lider)) if lider != NINGUNO else None
+    return [
+        ("Promedio Clínica", clinica, COLORES_CATEGORIAS["Destacado"]),
+        (f"Promedio Dirección: {direccion}", promedio_direccion, COLORES_CATEGORIAS["Cumple"]),
+        (f"Líder: {lider}", promedio_lider, COLORES_CATEGORIAS["Excepcional"]),
+    ]
+
+
+def precalentar(cache, clave, cubo, direcciones, vigente=None):
+    """Arma las figuras de la clínica completa y de cada Dirección (vistas iniciales más frecuentes).
+
+    Con `vigente()` se detiene si el dataset dejó de estar cargado, y descarta lo que alcanzó a
+    armar mientras se desalojaba.
+    """
+    def seguir():
+        if vigente is None or vigente():
+            return True
+        cache.descartar_dataset(clave)
+        return False
+
+    for nodo in [(TODAS, TODAS, TODAS)] + [(d, TODAS, TODAS) for d in direcciones]:
+        if not seguir():
+            return
+        for porcentaje in (True, False):
+            cache.obtener(("categorias", clave, nodo, porcentaje), lambda: figura_distribucion(cubo, nodo, porcentaje))
+        cache.obtener(("feedback", clave, nodo), lambda: figura_feedback_nodo(cubo, nodo))
+    for direccion in [NINGUNO] + list(direcciones):
+        if not seguir():
+            return
+        cache.obtener(("radar", clave, direccion, NINGUNO),
+                      lambda: figura_radar(cubo.competencias_liderazgo, trazas_radar(cubo, direccion)))
+    seguir()
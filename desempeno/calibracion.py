@@ -0,0 +1,140 @@
+"""Calibración de evaluadores: indulgencia y severidad de cada Rut Evaluador frente a sus pares.
+
+Por (Rut Evaluador, Dirección) se acumulan en una pasada sumas, sumas de cuadrados y
+conteos no nulos de la nota y de cada competencia, más el histograma de categorías.
+Como en las hojas del cubo, dos tablas de filas disjuntas se combinan sumándolas: una
+ronda nueva se agrega sin recalcular las anteriores. Promedios, varianzas, puntajes z
+frente a los demás evaluadores de la misma Dirección y la nota normalizada por
+evaluador se derivan de esas sumas (una fila por evaluador, no por evaluación).
+"""
+import numpy as np
+import pandas as pd
+
+from desempeno.constantes import CATEGORIAS_ORDEN, COLUMNA_EVALUADOR
+from desempeno.cubo import COLUMNA_CATEGORIA, COLUMNA_NOTA, valores_cubo
+
+NIVELES_EVALUADOR = [COLUMNA_EVALUADOR, "Dirección"]
+
+# Evaluadores con menos evaluaciones no entran en la referencia de su Dirección ni reciben puntaje z.
+MIN_EVALUACIONES = 3
+# |z| desde el cual un evaluador se marca como indulgente o severo.
+UMBRAL_Z = 1.5
+# Evaluaciones "de credibilidad": el ajuste de la nota normalizada se reduce a n / (n + K).
+CREDIBILIDAD = 5
+
+CALIBRACION_INDULGENTE = "Indulgente"
+CALIBRACION_SEVERO = "Severo"
+CALIBRACION_EN_RANGO = "En rango"
+CALIBRACION_POCAS = "Pocas evaluaciones"
+
+
+def agregar_evaluadores(df):
+    """Parte sumable de la calibración por (Rut Evaluador, Dirección): sumas, cuadrados, conteos e histograma.
+
+    Dos tablas de conjuntos disjuntos de filas se combinan con `combinar_evaluadores`.
+    """
+    claves = [df[col].astype(object).rename(col) for col in NIVELES_EVALUADOR]
+    valores = df[valores_cubo(df)].astype("float64")
+    partes = {
+        "suma": valores.groupby(claves, dropna=False, sort=False).sum(),
+        "cuadrados": (valores ** 2).groupby(claves, dropna=False, sort=False).sum(),
+        "n": valores.groupby(claves, dropna=False, sort=False).count(),
+    }
+    if COLUMNA_CATEGORIA in df.columns:
+        categorias = df[COLUMNA_CATEGORIA].astype(object).rename(COLUMNA_CATEGORIA)
+        partes["categoria"] = df.groupby(claves + [categorias], sort=False).size().unstack(fill_value=0)
+    return pd.concat(partes, axis=1).fillna(0)
+
+
+def nombres_evaluadores(df):
+    """Nombre ("Evaluador") de cada Rut Evaluador de `df`, o None si el export no trae la columna."""
+    if "Evaluador" not in df.columns or COLUMNA_EVALUADOR not in df.columns:
+        return None
+    return df["Evaluador"].astype(object).groupby(df[COLUMNA_EVALUADOR].astype(object), sort=False).first()
+
+
+def combinar_evaluadores(tablas):
+    """Suma tablas de calibración calculadas sobre particiones distintas de filas."""
+    tablas = [t for t in tablas if t is not None and len(t)]
+    if not tablas:
+        return None
+    return pd.concat(tablas).fillna(0).groupby(level=NIVELES_EVALUADOR, dropna=False, sort=False).sum()
+
+
+class CalibracionEvaluadores:
+    """Estadísticas por evaluador y puntajes z de indulgencia/severidad dentro de cada Dirección."""
+
+    def __init__(self, tabla, nombres=None, minimo=MIN_EVALUACIONES):
+        self.tabla = tabla
+        self.nombres = nombres
+        self.minimo = minimo
+        n = tabla["n"]
+        suma = tabla["suma"]
+        self.columnas = list(n.columns)
+
+        # Momentos por evaluador y competencia (varianza muestral desde las sumas).
+        self.n = n
+        self.media = suma / n.where(n > 0)
+        self.varianza = ((tabla["cuadrados"] - n * self.media ** 2) / (n - 1).where(n > 1)).clip(lower=0)
+
+        # Referencia de la Dirección: todas sus evaluaciones (para el ajuste) y sus evaluadores (para el z).
+        por_direccion = tabla.groupby(level="Dirección", dropna=False, sort=False).sum()
+        media_direccion = por_direccion["suma"] / por_direccion["n"].where(por_direccion["n"] > 0)
+        self.media_direccion = media_direccion.reindex(tabla.index.get_level_values("Dirección"))
+        self.media_direccion.index = tabla.index
+
+        medias_validas = self.media.where(n >= minimo)
+        pares = medias_validas.groupby(level="Dirección", dropna=False, sort=False)
+        desviacion = pares.transform("std")
+        self.z = (medias_validas - pares.transform("mean")) / desviacion.where(desviacion > 0)
+
+        # Ajuste de la nota normalizada: desvío del evaluador frente a su Dirección, reducido si evaluó poco.
+        self.ajuste = ((self.media - self.media_direccion) * n / (n + CREDIBILIDAD)).fillna(0)
+
+    @classmethod
+    def desde_df(cls, df, minimo=MIN_EVALUACIONES):
+        return cls(agregar_evaluadores(df), nombres_evaluadores(df), minimo)
+
+    def agregar(self, df_nuevo):
+        """Calibración con una ronda nueva de evaluaciones sumada (solo se agregan las filas nuevas)."""
+        nombres = self.nombres
+        nuevos = nombres_evaluadores(df_nuevo)
+        if nuevos is not None:
+            nombres = nuevos if nombres is None else nombres.combine_first(nuevos)
+        tabla = combinar_evaluadores([self.tabla, agregar_evaluadores(df_nuevo)])
+        return CalibracionEvaluadores(tabla, nombres, self.minimo)
+
+    def resumen(self, direccion=None, columna=COLUMNA_NOTA):
+        """Una fila por evaluador (de la Dirección, si se da) con su calibración en `columna`, de más indulgente a más severo."""
+        z = self.z[columna]
+        resumen = pd.DataFrame({
+            "Evaluaciones": self.n[columna].astype(int),
+            "Promedio": self.media[columna].round(2),
+            "Desv. Estándar": np.sqrt(self.varianza[columna]).round(2),
+            "Promedio Dirección": self.media_direccion[columna].round(2),
+            "z": z.round(2),
+        })
+        calibracion = np.select([z >= UMBRAL_Z, z <= -UMBRAL_Z, z.notna()],
+                                [CALIBRACION_INDULGENTE, CALIBRACION_SEVERO, CALIBRACION_EN_RANGO],
+                                CALIBRACION_POCAS)
+        resumen["Calibración"] = calibracion
+        if "categoria" in self.tabla.columns.get_level_values(0):
+            categorias = self.tabla["categoria"]
+            categorias = categorias[[c for c in CATEGORIAS_ORDEN if c in categorias.columns]
+                                    + [c for c in categorias.columns if c not in CATEGORIAS_ORDEN]]
+            porcentajes = categorias.div(categorias.sum(axis=1).where(lambda t: t > 0), axis=0) * 100
+            resumen = resumen.join(porcentajes.round(1).add_prefix("% "))
+
+        resumen = resumen.reset_index()
+        if self.nombres is not None:
+            resumen.insert(0, "Evaluador", resumen[COLUMNA_EVALUADOR].map(self.nombres))
+        if direccion is not None:
+            resumen = resumen[resumen["Dirección"] == direccion]
+        return resumen.sort_values(["z", "Evaluaciones"], ascending=False, na_position="last").reset_index(drop=True)
+
+    def nota_normalizada(self, df, columna=COLUMNA_NOTA, piso=1.0, techo=5.0):
+        """Nota de cada fila de `df` sin el desvío de su evaluador frente a la Dirección (acotada a la escala)."""
+        claves = pd.MultiIndex.from_arrays([df[col].astype(object) for col in NIVELES_EVALUADOR])
+        ajuste = self.ajuste[columna].reindex(claves).fillna(0).to_numpy()
+        return pd.Series(np.clip(df[columna].astype("float64").to_numpy() - ajuste, piso, techo),
+                         index=df.index, name=f"{columna} normalizada")
@@ -0,0 +1,70 @@
+# --- Constantes y Configuración ---
+
+# Lista para la sección de Liderazgo
+COMPETENCIAS_LIDERAZGO = [
+    "Humildad", "Resolutividad", "Formador de Personas",
+    "Liderazgo Magnético", "Visión Estratégica",
+    "Generación de Redes y Relaciones Efectivas"
+]
+# Nueva lista para el gráfico de radar individual (transversales)
+COMPETENCIAS_TRANSVERSALES = [
+    "Productividad", "Calidad del Trabajo", "Iniciativa",
+    "Trabajo en Equipo", "Orientación al Cliente", "Resolutividad"
+]
+
+# Bloque completo de competencias (escala 1 a 5) que trae el export de evaluaciones.
+# Los nombres van sin espacios finales: las columnas se normalizan con strip().
+COMPETENCIAS_EXPORT = [
+    "Humildad", "Resolutividad", "Formador de Personas",
+    "Liderazgo Magnético", "Visión Estratégica",
+    "Generación de Redes y Relaciones Efectivas",
+    "Orientación a las personas", "Trabajo bien hecho", "Trato humano",
+    "Trabajo en equipo", "Compromiso con la organización", "Iniciativa",
+    "Orientación a resultados", "Capacidad de trabajo bajo presión",
+    "Capacidad de análisis y criterio", "Negociación", "Adaptabilidad",
+    "Discreción y Franqueza", "Responsabilidad y Puntualidad",
+    "Cuidado por la intimidad del paciente", "Adaptación al equipo",
+    "Aceptación de Feedback", "Asistencia y Puntualidad",
+    "Motivación y disposición", "Aprendizaje de nuevas tareas",
+    "Sigue instrucciones complejas", "Cumplimiento de normas internas",
+    "Lenguaje/ Forma de comunicación",
+    "Independencia en la ejecución de tareas",
+    "Tiempo empleado en la ejecución de tareas",
+    "Toma de decisiones", "Liderazgo"
+]
+# Todas las competencias que el reporte trata como numéricas (sin duplicados, orden estable).
+TODAS_COMPETENCIAS = list(dict.fromkeys(COMPETENCIAS_EXPORT + COMPETENCIAS_LIDERAZGO + COMPETENCIAS_TRANSVERSALES))
+
+# Valores corporativos: las cinco competencias que se evalúan en todos los cargos
+COMPETENCIAS_VALORES = [
+    "Orientación a las personas", "Trabajo bien hecho", "Trato humano",
+    "Trabajo en equipo", "Compromiso con la organización"
+]
+
+# Identificación de la persona evaluada y de quien evalúa
+COLUMNA_DOCUMENTO = "Número de Documento"
+COLUMNA_EVALUADOR = "Rut Evaluador"
+# Ronda de la evaluación (Evaluación 01, Evaluación 02, Evaluación Urgencia)
+COLUMNA_RONDA = "Tipo de Evaluación"
+# Año del reporte: con el historial acumulado, sus filas llevan al lado las notas de los años anteriores
+ANIO_REPORTE = 2024
+
+# Cargos que se consideran de liderazgo (búsqueda sin distinguir mayúsculas en "Cargo")
+PATRON_CARGOS_LIDERAZGO = "Jefe|Subgerente|Coordinador|Director|Supervisor"
+
+CATEGORIAS_ORDEN = [
+    "Excepcional", "Destacado", "Cumple", "Cumple Parcialmente", "No Cumple", "Pendiente"
+]
+# Nota mínima de cada categoría (cortes observados en el export 2024; bajo el último, "No Cumple")
+CORTES_CATEGORIA = [
+    (4.55, "Excepcional"), (3.595, "Destacado"), (2.595, "Cumple"), (1.6, "Cumple Parcialmente")
+]
+COLORES_CATEGORIAS = {
+    "Excepcional": "#8A2BE2", # Violet
+    "Destacado": "#1E90FF",   # DodgerBlue
+    "Cumple": "#3CB371",      # MediumSeaGreen
+    "Cumple Parcialmente": "#FFD700", # Gold
+    "No Cumple": "#DC143C",   # Crimson
+    "Pendiente": "#D3D3D3"    # LightGray
+}
+COLORES_FEEDBACK = {"Completado": "#3CB371", "En Proceso": "#FFD700", "Pendiente": "#DC143C"}
@@ -0,0 +1,214 @@
+"""Cubo precalculado de KPIs y promedios por nodo de la jerarquía organizacional.
+
+Para cada Sub-área (hoja) se guardan conteos, sumas y conteos no nulos de la nota y
+de cada competencia, más los histogramas de categoría y de estado de feedback. Los
+nodos superiores (incluidos los "Todas") se obtienen sumando sus hojas, así que
+cada gráfico del reporte se responde con una búsqueda en el cubo, sin recorrer filas.
+Los evaluados distintos no son sumables y se cuentan de forma exacta al construir.
+"""
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from desempeno.constantes import (
+    CATEGORIAS_ORDEN, COMPETENCIAS_LIDERAZGO, PATRON_CARGOS_LIDERAZGO, TODAS_COMPETENCIAS
+)
+from desempeno.jerarquia import NIVELES, TODAS
+
+COLUMNA_NOTA = "Nota_num_2024"
+COLUMNA_CATEGORIA = "Categoría 2024"
+COLUMNA_FEEDBACK = "Estado Feedback"
+
+
+def es_lider(df):
+    """Máscara de filas con cargo de liderazgo."""
+    return df["Cargo"].astype("string").str.contains(PATRON_CARGOS_LIDERAZGO, case=False, na=False).to_numpy(dtype=bool)
+
+
+def _claves_texto(df, columnas):
+    # Claves como texto plano: con categóricas, groupby/sum entre niveles sería sobre el producto cartesiano.
+    return [df[col].astype(object).rename(col) for col in columnas]
+
+
+def _sumas_y_conteos(df, claves, valores):
+    grupos = df[valores].astype("float64").groupby(claves, dropna=False, sort=False)
+    return pd.concat({"suma": grupos.sum(), "n": grupos.count()}, axis=1)
+
+
+def _histograma(df, claves, columna, prefijo):
+    if columna not in df.columns:
+        return None
+    tabla = df.groupby(claves + [df[columna].astype(object).rename(columna)], dropna=False, sort=False).size()
+    tabla = tabla.unstack(fill_value=0)
+    tabla.columns = pd.MultiIndex.from_product([[prefijo], tabla.columns])
+    return tabla
+
+
+def valores_cubo(df):
+    """Columnas numéricas que el cubo suma: la nota 2024 y las competencias presentes."""
+    return [c for c in [COLUMNA_NOTA] + TODAS_COMPETENCIAS if c in df.columns]
+
+
+def agregar_hojas(df):
+    """Parte sumable del cubo por Sub-área: sumas, conteos no nulos, filas e histogramas.
+
+    Dos tablas de hojas de conjuntos disjuntos de filas se combinan sumándolas.
+    """
+    claves = _claves_texto(df, NIVELES)
+    partes = [_sumas_y_conteos(df, claves, valores_cubo(df))]
+    partes[0][("filas", "")] = df.groupby(claves, dropna=False, sort=False).size()
+    for columna, prefijo in [(COLUMNA_CATEGORIA, "categoria"), (COLUMNA_FEEDBACK, "feedback")]:
+        histograma = _histograma(df, claves, columna, prefijo)
+        if histograma is not None:
+            partes.append(histograma)
+    return pd.concat(partes, axis=1).fillna(0)
+
+
+def combinar_hojas(tablas):
+    """Suma tablas de hojas calculadas sobre particiones distintas de filas."""
+    tablas = [t for t in tablas if t is not None and len(t)]
+    if not tablas:
+        return None
+    return pd.concat(tablas).fillna(0).groupby(level=NIVELES, dropna=False, sort=False).sum()
+
+
+def resumen_hojas(hojas):
+    """KPIs y distribución de categorías de la clínica completa desde hojas (p. ej. parciales, durante la ingesta).
+
+    Sin filas no se pueden contar evaluados distintos: el total es de evaluaciones.
+    """
+    fila = hojas.sum()
+    total = int(fila.get(("filas", ""), 0))
+    n_nota = fila.get(("n", COLUMNA_NOTA), 0)
+    promedio = fila[("suma", COLUMNA_NOTA)] / n_nota if n_nota else np.nan
+    distribucion = pd.Series([int(fila.get(("categoria", c), 0)) for c in CATEGORIAS_ORDEN], index=CATEGORIAS_ORDEN)
+    destacados = distribucion[["Excepcional", "Destacado"]].sum()
+    porcentaje = destacados / total * 100 if total > 0 else 0
+    return {"total_evaluaciones": total, "promedio_nota": promedio, "porc_destacado_o_mas": porcentaje}, distribucion
+
+
+class CuboKPI:
+    """KPIs, histogramas y promedios por nodo (Dirección, Área, Sub-área), con "Todas" como comodín."""
+
+    def __init__(self, df):
+        self.valores = valores_cubo(df)
+        claves = _claves_texto(df, NIVELES)
+        hojas = agregar_hojas(df)
+
+        # Nodos superiores: suma de sus hojas, con "Todas" en los niveles agregados.
+        tablas = []
+        for mantener in product([True, False], repeat=len(NIVELES)):
+            niveles = [n for n, m in zip(NIVELES, mantener) if m]
+            if len(niveles) == len(NIVELES):
+                tabla = hojas
+            elif niveles:
+                tabla = hojas.groupby(level=niveles, dropna=False, sort=False).sum()
+            else:
+                tabla = hojas.sum().to_frame().T
+            tabla.index = pd.MultiIndex.from_arrays(
+                [tabla.index.get_level_values(n) if m else [TODAS] * len(tabla) for n, m in zip(NIVELES, mantener)],
+                names=NIVELES,
+            )
+            tablas.append(tabla)
+        self.tabla = pd.concat(tablas).sort_index()
+
+        # Evaluados distintos por nodo: no es sumable, se cuenta exacto para cada patrón.
+        evaluados = {}
+        for mantener in product([True, False], repeat=len(NIVELES)):
+            niveles = [c for c, m in zip(claves, mantener) if m]
+            if niveles:
+                conteo = df["Evaluado"].groupby(niveles, dropna=False, sort=False).nunique()
+                for clave, valor in conteo.items():
+                    clave = clave if isinstance(clave, tuple) else (clave,)
+                    valores = iter(clave)
+                    evaluados[tuple(next(valores) if m else TODAS for m in mantener)] = valor
+            else:
+                evaluados[(TODAS,) * len(NIVELES)] = df["Evaluado"].nunique()
+        self._evaluados = evaluados
+
+        self._construir_lideres(df, claves)
+
+    def _construir_lideres(self, df, claves):
+        """Sumas por (hoja, líder) para el ranking y por persona para el radar individual."""
+        self.competencias_liderazgo = [c for c in COMPETENCIAS_LIDERAZGO if c in df.columns]
+        columnas = [c for c in [COLUMNA_NOTA] + self.competencias_liderazgo if c in df.columns]
+        mascara = es_lider(df)
+        df_lideres = df.loc[mascara]
+        claves_lideres = [c[mascara] for c in claves] + [df_lideres["Evaluado"].astype(object)]
+        self.lideres = _sumas_y_conteos(df_lideres, claves_lideres, columnas).reset_index()
+
+        # El radar de un líder promedia todas sus filas (no solo las de cargo de liderazgo).
+        personas = df["Evaluado"].astype(object)
+        en_lista = personas.isin(set(df_lideres["Evaluado"].dropna()))
+        self.personas = _sumas_y_conteos(df.loc[en_lista], [personas[en_lista]], self.competencias_liderazgo)
+
+    # --- Consultas ---
+
+    def nodo(self, direccion=TODAS, area=TODAS, subarea=TODAS):
+        """Fila del cubo para el nodo (ceros si el nodo no tiene datos)."""
+        try:
+            return self.tabla.loc[(direccion, area, subarea)]
+        except KeyError:
+            return pd.Series(0.0, index=self.tabla.columns)
+
+    def kpis(self, direccion=TODAS, area=TODAS, subarea=TODAS):
+        """Total de evaluados, nota promedio y % Destacado o superior del nodo."""
+        fila = self.nodo(direccion, area, subarea)
+        total = int(self._evaluados.get((direccion, area, subarea), 0))
+        n_nota = fila.get(("n", COLUMNA_NOTA), 0)
+        promedio = fila[("suma", COLUMNA_NOTA)] / n_nota if n_nota else np.nan
+        destacados = sum(fila.get(("categoria", c), 0) for c in ["Excepcional", "Destacado"])
+        porcentaje = destacados / total * 100 if total > 0 else 0
+        return {"total_evaluados": total, "promedio_nota": promedio, "porc_destacado_o_mas": porcentaje}
+
+    def distribucion_categorias(self, direccion=TODAS, area=TODAS, subarea=TODAS):
+        """Cantidad de filas por categoría, en el orden de CATEGORIAS_ORDEN."""
+        fila = self.nodo(direccion, area, subarea)
+        return pd.Series([int(fila.get(("categoria", c), 0)) for c in CATEGORIAS_ORDEN], index=CATEGORIAS_ORDEN)
+
+    def distribucion_feedback(self, direccion=TODAS, area=TODAS, subarea=TODAS):
+        """Cantidad de filas por estado de feedback (solo estados presentes, de mayor a menor)."""
+        fila = self.nodo(direccion, area, subarea)
+        if "feedback" not in fila.index.get_level_values(0):
+            return pd.Series(dtype="int64")
+        conteo = fila["feedback"].astype("int64")
+        return conteo[conteo > 0].sort_values(ascending=False)
+
+    def promedios(self, columnas, direccion=TODAS, area=TODAS, subarea=TODAS):
+        """Promedio por columna del nodo (NaN si la columna no tiene datos)."""
+        fila = self.nodo(direccion, area, subarea)
+        suma = fila["suma"].reindex(columnas).astype(float)
+        n = fila["n"].reindex(columnas).astype(float)
+        return (suma / n.where(n > 0)).rename(None)
+
+    def promedio_persona(self, evaluado, columnas=None):
+        """Promedio de las competencias de liderazgo de una persona, o None si no está en el cubo."""
+        columnas = self.competencias_liderazgo if columnas is None else columnas
+        if evaluado not in self.personas.index:
+            return None
+        fila = self.personas.loc[evaluado]
+        return (fila["suma"][columnas] / fila["n"][columnas].where(fila["n"][columnas] > 0)).rename(None)
+
+    def ranking_lideres(self, direccion=TODAS, area=TODAS, subarea=TODAS):
+        """Promedios por líder del nodo: columnas Evaluado, Nota2024 y una por competencia de liderazgo."""
+        lideres = self.lideres
+        mascara = np.ones(len(lideres), dtype=bool)
+        for nivel, valor in zip(NIVELES, [direccion, area, subarea]):
+            if valor != TODAS:
+                mascara &= (lideres[(nivel, "")] == valor).to_numpy()
+        seleccion = lideres.loc[mascara]
+        nombres = seleccion[("Evaluado", "")].rename("Evaluado")
+        suma = seleccion["suma"].groupby(nombres, sort=True).sum()
+        n = seleccion["n"].groupby(nombres, sort=True).sum()
+        ranking = suma / n.where(n > 0)
+        ranking = ranking.rename(columns={COLUMNA_NOTA: "Nota2024"})
+        ranking.columns.name = None
+        return ranking.reset_index()
+
+    def nombres_lideres(self, direccion=TODAS):
+        """Nombres de líderes (ordenados), opcionalmente de una Dirección."""
+        lideres = self.lideres
+        if direccion != TODAS:
+            lideres = lideres[lideres[("Dirección", "")] == direccion]
+        return sorted(lideres[("Evaluado", "")].dropna().unique().tolist())
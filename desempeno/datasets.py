@@ -0,0 +1,85 @@
+"""Registro de datasets procesados compartido por todas las sesiones del proceso.
+
+Hay un solo DataFrame procesado por clave de contenido, sin importar cuántas sesiones
+suban el mismo archivo. Es de solo lectura: cada sesión recibe una copia superficial
+(`copy(deep=False)`), que con copy-on-write comparte los arreglos y copia solo lo que
+la sesión llegara a modificar. El estado por sesión se reduce a las selecciones de
+los widgets y a vistas (slices) sobre el dataset compartido.
+
+Lo derivado de un dataset (índices, cubo, figuras) vive en otros cachés por la misma
+clave: `al_desalojar(clave)` avisa cuando el registro suelta un dataset para que se
+libere también eso, y no solo el DataFrame.
+"""
+import threading
+from collections import OrderedDict
+
+MAX_DATASETS = 4
+
+
+class RegistroDatasets:
+    """LRU de (df, avisos) por clave de contenido; seguro para varios hilos (una sesión por hilo)."""
+
+    def __init__(self, max_datasets=MAX_DATASETS, al_desalojar=None):
+        self.max_datasets = max_datasets
+        self.al_desalojar = al_desalojar
+        self.aciertos = 0
+        self.cargas = 0
+        self._datasets = OrderedDict()
+        self._lock = threading.Lock()
+        self._cargando = {}
+
+    def __len__(self):
+        return len(self._datasets)
+
+    def __contains__(self, clave):
+        return clave in self._datasets
+
+    def obtener(self, clave, cargar):
+        """(vista del df, avisos) de `clave`; si no está, lo arma con `cargar()` -> (df, avisos).
+
+        Si otra sesión ya está cargando la misma clave, se espera a esa carga en vez de repetirla.
+        """
+        with self._lock:
+            entrada = self._entrada(clave)
+            if entrada is None:
+                lock_clave = self._cargando.setdefault(clave, threading.Lock())
+        if entrada is None:
+            with lock_clave:
+                with self._lock:
+                    entrada = self._entrada(clave)
+                if entrada is None:
+                    try:
+                        df, avisos = cargar()
+                        entrada = (df, list(avisos))
+                        self.guardar(clave, *entrada)
+                    finally:
+                        with self._lock:
+                            self._cargando.pop(clave, None)
+        df, avisos = entrada
+        return df.copy(deep=False), list(avisos)
+
+    def _entrada(self, clave):
+        entrada = self._datasets.get(clave)
+        if entrada is not None:
+            self._datasets.move_to_end(clave)
+            self.aciertos += 1
+        return entrada
+
+    def guardar(self, clave, df, avisos=()):
+        desalojadas = []
+        with self._lock:
+            self.cargas += 1
+            self._datasets[clave] = (df, list(avisos))
+            self._datasets.move_to_end(clave)
+            while len(self._datasets) > self.max_datasets:
+                desalojadas.append(self._datasets.popitem(last=False)[0])
+        # Fuera del lock: liberar lo derivado no debe frenar a las sesiones que leen el registro.
+        if self.al_desalojar is not None:
+            for desalojada in desalojadas:
+                self.al_desalojar(desalojada)
+
+    def estadisticas(self):
+        with self._lock:
+            memoria = sum(int(df.memory_usage(deep=False).sum()) for df, _ in self._datasets.values())
+            return {"datasets": len(self._datasets), "bytes": memoria,
+                    "aciertos": self.aciertos, "cargas": self.cargas}
@@ -0,0 +1,59 @@
+"""Esquema de tipos compactos para el DataFrame procesado.
+
+Las columnas de texto con pocos valores distintos pasan a `category` (filtros,
+value_counts y groupby trabajan sobre los códigos enteros) y las competencias en
+escala 1 a 5 pasan a float32.
+"""
+import pandas as pd
+
+from desempeno.constantes import CATEGORIAS_ORDEN, TODAS_COMPETENCIAS
+
+# Columnas de categoría de desempeño: categorías fijas en el orden del reporte.
+COLUMNAS_CATEGORIA_DESEMPENO = ["Categoría 2024", "Categoría 2023", "Categoría 2022", "Categoría", "Categoria"]
+CATEGORIAS_DESEMPENO = CATEGORIAS_ORDEN + ["Sin Asignar"]
+
+# Columnas de texto de baja cardinalidad: categorías ordenadas alfabéticamente.
+COLUMNAS_CATEGORICAS = [
+    "Dirección", "Área", "Sub-área", "Cargo", "Tipo de Evaluación",
+    "Rut Evaluador", "Cargo Evaluador", "Evaluador",
+    "Estado Feedback", "Respuesta feedback", "Metas",
+]
+
+DTYPE_COMPETENCIAS = "float32"
+
+
+def memoria_bytes(df):
+    """Memoria total del DataFrame (incluye el contenido de los strings)."""
+    return int(df.memory_usage(deep=True).sum())
+
+
+def _categorica(serie, categorias_fijas=None):
+    if serie.dtype == "category":
+        return serie
+    valores = serie.astype("string").str.strip()
+    presentes = sorted(valores.dropna().unique().tolist())
+    if categorias_fijas is None:
+        categorias = presentes
+    else:
+        # Las categorías fijas van primero; un valor inesperado se agrega al final en vez de perderse.
+        categorias = list(categorias_fijas) + [v for v in presentes if v not in categorias_fijas]
+    return pd.Series(pd.Categorical(valores, categories=categorias), index=serie.index, name=serie.name)
+
+
+def aplicar_esquema(df):
+    """Convierte en el lugar las columnas al esquema compacto y devuelve el resumen de memoria."""
+    antes = memoria_bytes(df)
+
+    for col in COLUMNAS_CATEGORIA_DESEMPENO:
+        if col in df.columns:
+            df[col] = _categorica(df[col], CATEGORIAS_DESEMPENO)
+
+    for col in COLUMNAS_CATEGORICAS:
+        if col in df.columns:
+            df[col] = _categorica(df[col])
+
+    for comp in TODAS_COMPETENCIAS:
+        if comp in df.columns:
+            df[comp] = df[comp].astype(DTYPE_COMPETENCIAS)
+
+    return {"antes": antes, "despues": memoria_bytes(df)}
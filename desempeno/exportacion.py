@@ -0,0 +1,259 @@
+"""Exportación de la vista filtrada a Parquet, CSV o Excel, por bloques y con caché en disco.
+
+La vista se describe con el DataFrame compartido, las posiciones de sus filas (en el
+orden de la tabla) y las columnas: cada formato se escribe bloque a bloque tomando
+`df.take` de un tramo de posiciones, así que en memoria nunca hay una segunda copia
+de la vista completa. Parquet usa `pyarrow.parquet.ParquetWriter` (un grupo de filas
+por bloque); el CSV replica el formato del export de origen (";", coma decimal, UTF-8
+con BOM) y puede volver a subirse; el Excel se arma como un XLSX mínimo (libro, una
+hoja con celdas en línea) escrito en streaming dentro del zip, sin otra dependencia.
+
+Los archivos generados quedan en un directorio propio del caché en disco, con la
+misma escritura atómica y la misma poda por tamaño y antigüedad: exportar de nuevo la
+misma vista (mismo dataset, filtro y columnas) entrega el archivo ya escrito.
+"""
+import hashlib
+import os
+import re
+import threading
+import zipfile
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from desempeno import cache_disco
+
+FORMATOS = {
+    "Parquet": (".parquet", "application/vnd.apache.parquet"),
+    "CSV": (".csv", "text/csv"),
+    "Excel": (".xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+FILAS_BLOQUE = 50_000
+# El XML de la hoja se arma por tramos de pocas filas: cada celda es un str de Python.
+FILAS_XML = 5_000
+# Filas de datos que admite una hoja de Excel (1.048.576 menos el encabezado).
+MAX_FILAS_EXCEL = 1_048_575
+# Cambia si cambia lo que escriben los formatos (invalida las exportaciones guardadas).
+VERSION_EXPORTACION = 1
+
+DIRECTORIO_EXPORTACIONES = os.path.join(cache_disco.DIRECTORIO_CACHE, "exportaciones")
+MAX_BYTES_EXPORTACIONES = int(os.environ.get("DESEMPENO_EXPORTACIONES_MAX_MB", "512")) * 1024 * 1024
+
+# Caracteres de control que XML 1.0 no admite (el export de origen a veces los trae en los comentarios).
+_CONTROL_XML = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def bloques(df, posiciones=None, columnas=None, filas_bloque=FILAS_BLOQUE):
+    """Bloques de la vista: `df.take` de cada tramo de `posiciones` (todas, si es None) con `columnas`."""
+    if columnas is not None:
+        df = df[[c for c in columnas if c in df.columns]]
+    total = len(df) if posiciones is None else len(posiciones)
+    if total == 0:
+        yield df.iloc[:0]
+        return
+    for inicio in range(0, total, filas_bloque):
+        if posiciones is None:
+            yield df.iloc[inicio:inicio + filas_bloque]
+        else:
+            yield df.take(posiciones[inicio:inicio + filas_bloque])
+
+
+def escribir_parquet(partes, ruta):
+    """Un grupo de filas por bloque; el esquema (incluidas las categorías) lo fija el primer bloque."""
+    escritor = None
+    try:
+        for bloque in partes:
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if escritor is None:
+                escritor = pq.ParquetWriter(ruta, tabla.schema, compression="zstd")
+            else:
+                # Las categorías de cada bloque traen su propio diccionario: se alinea con el esquema inicial.
+                tabla = tabla.cast(escritor.schema)
+            escritor.write_table(tabla)
+    finally:
+        if escritor is not None:
+            escritor.close()
+
+
+def escribir_csv(partes, ruta):
+    """Mismo formato que el export de origen: UTF-8 con BOM, ";" y coma decimal."""
+    with open(ruta, "w", encoding="utf-8-sig", newline="") as f:
+        for i, bloque in enumerate(partes):
+            bloque.to_csv(f, sep=";", decimal=",", index=False, header=i == 0, lineterminator="\n")
+
+
+def _celdas_xlsx(serie):
+    """XML de las celdas de una columna; cada valor distinto (o categoría) se formatea una sola vez."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        codigos, valores = serie.cat.codes.to_numpy(), serie.cat.categories
+    else:
+        codigos, valores = pd.factorize(serie)
+    # El código -1 (nulo) toma la última posición: la celda vacía.
+    return np.append(_xml_valores(pd.Series(valores)), "<c/>")[codigos]
+
+
+def _xml_valores(valores):
+    """Celda de cada valor no nulo: números como valor (no finitos, vacíos), el resto como texto en línea."""
+    if pd.api.types.is_numeric_dtype(valores) and not pd.api.types.is_bool_dtype(valores):
+        finitos = np.isfinite(valores.to_numpy(dtype="float64"))
+        celdas = ("<c><v>" + valores.astype(str).astype(object) + "</v></c>").to_numpy(dtype=object)
+        return np.where(finitos, celdas, "<c/>")
+    texto = valores.astype(str).astype(object).str.replace(_CONTROL_XML, "", regex=True)
+    texto = texto.str.replace("&", "&amp;").str.replace("<", "&lt;").str.replace(">", "&gt;")
+    return ('<c t="inlineStr"><is><t xml:space="preserve">' + texto + "</t></is></c>").to_numpy(dtype=object)
+
+
+def _fila_xlsx(celdas):
+    return "<row>" + "".join(celdas) + "</row>\n"
+
+
+_CONTENT_TYPES_XLSX = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+_RELS_XLSX = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/></Relationships>'
+)
+_LIBRO_XLSX = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{hoja}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+)
+_RELS_LIBRO_XLSX = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/></Relationships>'
+)
+_INICIO_HOJA_XLSX = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>\n'
+)
+_FIN_HOJA_XLSX = "</sheetData></worksheet>"
+
+
+def escribir_excel(partes, ruta, hoja="Datos"):
+    """XLSX de una hoja escrito en streaming: cada bloque se convierte a XML por columna y se comprime al vuelo."""
+    with zipfile.ZipFile(ruta, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as libro:
+        libro.writestr("[Content_Types].xml", _CONTENT_TYPES_XLSX)
+        libro.writestr("_rels/.rels", _RELS_XLSX)
+        libro.writestr("xl/workbook.xml", _LIBRO_XLSX.format(hoja=escape(hoja)))
+        libro.writestr("xl/_rels/workbook.xml.rels", _RELS_LIBRO_XLSX)
+        with libro.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as hoja_xml:
+            hoja_xml.write(_INICIO_HOJA_XLSX.encode("utf-8"))
+            filas = 0
+            for i, bloque in enumerate(partes):
+                if i == 0:
+                    encabezado = _celdas_xlsx(pd.Series([str(c) for c in bloque.columns], dtype=object))
+                    hoja_xml.write(_fila_xlsx(encabezado).encode("utf-8"))
+                filas += len(bloque)
+                if filas > MAX_FILAS_EXCEL:
+                    raise ValueError(f"La vista supera las {MAX_FILAS_EXCEL:,} filas que admite una hoja de Excel.")
+                for inicio in range(0, len(bloque), FILAS_XML):
+                    tramo = bloque.iloc[inicio:inicio + FILAS_XML]
+                    columnas = [_celdas_xlsx(tramo[c]) for c in tramo.columns]
+                    hoja_xml.write("".join(map(_fila_xlsx, zip(*columnas))).encode("utf-8"))
+            hoja_xml.write(_FIN_HOJA_XLSX.encode("utf-8"))
+
+
+ESCRITORES = {"Parquet": escribir_parquet, "CSV": escribir_csv, "Excel": escribir_excel}
+
+
+def clave_exportacion(*partes):
+    """Clave de una vista exportada: hash de sus partes (dataset, vista, filtro, columnas) y de la versión."""
+    texto = repr((VERSION_EXPORTACION,) + partes).encode("utf-8")
+    return hashlib.sha256(texto).hexdigest()
+
+
+class CacheExportaciones:
+    """Archivos exportados por (clave de la vista, formato) en disco; una vista se escribe una sola vez."""
+
+    def __init__(self, directorio=DIRECTORIO_EXPORTACIONES, max_bytes=MAX_BYTES_EXPORTACIONES):
+        self.directorio = directorio
+        self.max_bytes = max_bytes
+        self.aciertos = 0
+        self.generadas = 0
+        self._lock = threading.Lock()
+        # ruta -> [lock de escritura, pedidos que lo tienen o lo esperan]
+        self._escribiendo = {}
+
+    def ruta(self, clave, formato):
+        return os.path.join(self.directorio, clave + FORMATOS[formato][0])
+
+    def exportar(self, clave, formato, df, posiciones=None, columnas=None, filas_bloque=FILAS_BLOQUE):
+        """Ruta del archivo de la vista en `formato`; si no está en caché, se escribe por bloques."""
+        with self.abrir(clave, formato, df, posiciones, columnas, filas_bloque):
+            return self.ruta(clave, formato)
+
+    def abrir(self, clave, formato, df, posiciones=None, columnas=None, filas_bloque=FILAS_BLOQUE):
+        """Archivo de la vista en `formato` abierto en binario; si no está en caché, se escribe por bloques.
+
+        Dos pedidos simultáneos de la misma vista esperan a una sola escritura. El archivo se
+        abre antes de podar el directorio y la poda no toca esta ruta: aunque la vista sola
+        supere `max_bytes`, o la pode otra sesión después, el archivo abierto sigue legible.
+        """
+        ruta = self.ruta(clave, formato)
+        with self._lock:
+            entrada = self._escribiendo.setdefault(ruta, [threading.Lock(), 0])
+            entrada[1] += 1
+        try:
+            with entrada[0]:
+                archivo = self._usar(ruta)
+                while archivo is None:
+                    os.makedirs(self.directorio, exist_ok=True)
+                    with cache_disco.archivo_atomico(ruta) as tmp:
+                        ESCRITORES[formato](bloques(df, posiciones, columnas, filas_bloque), tmp)
+                    self.generadas += 1
+                    try:
+                        archivo = open(ruta, "rb")
+                    except FileNotFoundError:
+                        # Otra sesión podó el directorio entre la escritura y la apertura: se vuelve a escribir.
+                        continue
+        finally:
+            # Se borra solo cuando nadie más la tiene ni la espera: mientras el lock esté en uso,
+            # un pedido nuevo de la misma ruta lo encuentra y espera en él en vez de crear otro.
+            with self._lock:
+                entrada[1] -= 1
+                if entrada[1] == 0:
+                    del self._escribiendo[ruta]
+        cache_disco.podar(self.directorio, self.max_bytes, extensiones=tuple(ext for ext, _ in FORMATOS.values()),
+                          conservar=(ruta,))
+        return archivo
+
+    def _usar(self, ruta):
+        """La exportación ya escrita, abierta y con su uso marcado (la fecha guía la poda); None si no existe."""
+        try:
+            archivo = open(ruta, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(ruta)
+        except FileNotFoundError:
+            pass
+        self.aciertos += 1
+        return archivo
+
+    def leer(self, clave, formato, df, posiciones=None, columnas=None):
+        """Bytes del archivo exportado (para st.download_button).
+
+        La vista se escribe por bloques con memoria acotada, pero la descarga no es en streaming:
+        st.download_button necesita el archivo completo en memoria para servirlo.
+        """
+        with self.abrir(clave, formato, df, posiciones, columnas) as archivo:
+            return archivo.read()
@@ -0,0 +1,150 @@
+"""Construcción de las figuras Plotly del reporte (compartida por la app y los reportes en lote)."""
+import numpy as np
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+
+from desempeno.constantes import COLORES_CATEGORIAS, COLORES_FEEDBACK
+
+ANIOS_HISTORIAL = [2022, 2023, 2024]
+
+
+def tabla_categorias(distribucion):
+    """Tabla Categoría / Cantidad / Porcentaje a partir de la distribución por categoría."""
+    conteo_categorias = distribucion.reset_index()
+    conteo_categorias.columns = ["Categoría", "Cantidad"]
+    total_cat = conteo_categorias["Cantidad"].sum()
+    conteo_categorias["Porcentaje"] = (conteo_categorias["Cantidad"] / total_cat * 100).round(1)
+    return conteo_categorias
+
+
+def figura_categorias(conteo_categorias, porcentaje=True):
+    """Barras de distribución de categorías, en porcentaje o en cantidad de personas."""
+    if porcentaje:
+        fig_cat = px.bar(
+            conteo_categorias, x="Categoría", y="Porcentaje", color="Categoría",
+            text=conteo_categorias["Porcentaje"].astype(str) + "%",
+            color_discrete_map=COLORES_CATEGORIAS
+        )
+        fig_cat.update_layout(yaxis_title="Porcentaje (%)")
+    else:
+        fig_cat = px.bar(
+            conteo_categorias, x="Categoría", y="Cantidad", color="Categoría",
+            text=conteo_categorias["Cantidad"].astype(str),
+            color_discrete_map=COLORES_CATEGORIAS
+        )
+        fig_cat.update_layout(yaxis_title="Cantidad de personas")
+    fig_cat.update_traces(textposition='outside')
+    return fig_cat
+
+
+def figura_feedback(distribucion_feedback):
+    """Torta del estado de cumplimiento de feedback."""
+    conteo_feedback = distribucion_feedback.reset_index()
+    conteo_feedback.columns = ["Estado", "Cantidad"]
+
+    fig_feedback = px.pie(
+        conteo_feedback,
+        names='Estado',
+        values='Cantidad',
+        title='Estado de Cumplimiento de Feedback',
+        color='Estado',
+        color_discrete_map=COLORES_FEEDBACK
+    )
+    fig_feedback.update_traces(textposition='inside', textinfo='percent+label')
+    fig_feedback.update_layout(showlegend=False)
+    return fig_feedback
+
+
+def figura_radar(competencias, trazas):
+    """Radar de competencias. `trazas` es una lista de (nombre, promedios, color); se omiten las None."""
+    fig_radar = go.Figure()
+    for nombre, promedios, color in trazas:
+        if promedios is None:
+            continue
+        # .fillna(0) primero, luego .values
+        fig_radar.add_trace(go.Scatterpolar(r=promedios.fillna(0).values,
+                                            theta=competencias,
+                                            fill="toself",
+                                            name=nombre,
+                                            line=dict(color=color)))
+    if len(fig_radar.data) > 0:
+        fig_radar.update_layout(polar=dict(radialaxis=dict(visible=True, range=[0, 5])),
+                                showlegend=True,
+                                title="Nivelación de Competencias de Liderazgo (Escala 1 a 5)")
+    return fig_radar
+
+
+def notas_historicas(fila, anios=ANIOS_HISTORIAL):
+    """Notas globales por año de una fila de evaluación (solo años con nota)."""
+    notas_data = {
+        "Año": anios,
+        "Nota": [fila.get(f"Nota_num_{anio}", np.nan) for anio in anios]
+    }
+    return pd.DataFrame(notas_data).dropna(subset=["Nota"])
+
+
+def figura_evolucion(trabajador, notas_hist, anios=ANIOS_HISTORIAL):
+    """Línea de evolución de la nota global por año."""
+    fig_ind = go.Figure()
+    fig_ind.add_trace(go.Scatter(
+        x=notas_hist["Año"],
+        y=notas_hist["Nota"],
+        mode='lines+markers',
+        line_shape='spline',
+        marker=dict(size=10)
+    ))
+    fig_ind.update_layout(
+        title_text=f"Nota Global por Año de {trabajador}",
+        xaxis=dict(tickmode='array', tickvals=anios, tickformat='d'),
+        yaxis=dict(range=[0, 5], dtick=0.5)
+    )
+    return fig_ind
+
+
+def figura_comparacion(df_bar, trabajador, nombre_grupo):
+    """Barras horizontales: nota del trabajador vs. promedio de su grupo en una competencia."""
+    fig_comp_bar = px.bar(
+        df_bar,
+        x='Valor',
+        y='Métrica',
+        color='Métrica',
+        orientation='h',
+        text_auto='.2f',
+        color_discrete_map={
+            trabajador: COLORES_CATEGORIAS["Destacado"],
+            nombre_grupo: COLORES_CATEGORIAS["Cumple"]
+        }
+    )
+    fig_comp_bar.update_layout(
+        xaxis_title="Nota",
+        yaxis_title="",
+        legend_title="Referencia",
+        uniformtext_minsize=8,
+        uniformtext_mode='hide'
+    )
+    fig_comp_bar.update_xaxes(range=[0, 5.5])
+    return fig_comp_bar
+
+
+def figura_distribucion_pares(valores, nota_trabajador, trabajador, resumen):
+    """Distribución de la competencia en el grupo de pares, con el rango intercuartil y la nota del trabajador.
+
+    `valores` son los valores ordenados del grupo; se envían al navegador como conteos
+    (por valor si hay pocos distintos, en 20 tramos si no), no como una fila por persona.
+    """
+    distintos, conteos = np.unique(valores, return_counts=True)
+    if len(distintos) > 20:
+        conteos, bordes = np.histogram(valores, bins=20, range=(1, 5))
+        distintos = (bordes[:-1] + bordes[1:]) / 2
+    fig_pares = go.Figure(go.Bar(x=distintos, y=conteos, name="Pares",
+                                 marker_color=COLORES_CATEGORIAS["Cumple"], opacity=0.8))
+    fig_pares.add_vrect(x0=resumen["q1"], x1=resumen["q3"], fillcolor=COLORES_CATEGORIAS["Cumple"],
+                        opacity=0.15, line_width=0, annotation_text="Q1–Q3", annotation_position="top left")
+    fig_pares.add_vline(x=resumen["promedio"], line_dash="dash", line_color="gray",
+                        annotation_text=f"Promedio {resumen['promedio']:.2f}", annotation_position="bottom right")
+    fig_pares.add_vline(x=nota_trabajador, line_width=3, line_color=COLORES_CATEGORIAS["Destacado"],
+                        annotation_text=trabajador, annotation_position="top right")
+    fig_pares.update_layout(xaxis_title="Nota", yaxis_title="Evaluaciones", showlegend=False, bargap=0.1)
+    fig_pares.update_xaxes(range=[0.5, 5.5])
+    return fig_pares
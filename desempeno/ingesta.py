@@ -0,0 +1,157 @@
+"""Lectura del CSV de evaluaciones en una sola pasada.
+
+En vez de probar separadores/encodings parseando el archivo completo varias veces,
+se detecta el formato (BOM/encoding, separador y coma decimal) sobre una muestra
+pequeña de bytes y luego se parsea una única vez con el motor C de pandas.
+"""
+import codecs
+import csv
+import io
+import os
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+
+import pandas as pd
+
+from desempeno.constantes import TODAS_COMPETENCIAS
+from desempeno.esquema import DTYPE_COMPETENCIAS
+
+# Tamaño de la muestra usada para detectar el formato (64 KiB alcanzan para varias filas).
+TAMANO_MUESTRA = 64 * 1024
+SEPARADORES_CANDIDATOS = [";", ",", "\t", "|"]
+
+
+@dataclass(frozen=True)
+class FormatoCSV:
+    """Formato detectado de un CSV: encoding, separador y separador decimal."""
+    encoding: str
+    sep: str
+    decimal: str
+
+
+def _detectar_encoding(muestra):
+    if muestra.startswith(codecs.BOM_UTF8):
+        return "utf-8-sig"
+    # Decodificador incremental: la muestra puede cortar un carácter multibyte al final.
+    try:
+        codecs.getincrementaldecoder("utf-8")().decode(muestra, final=False)
+        return "utf-8"
+    except UnicodeDecodeError:
+        return "latin-1"
+
+
+def _detectar_separador(linea_encabezado):
+    conteos = {sep: linea_encabezado.count(sep) for sep in SEPARADORES_CANDIDATOS}
+    sep = max(SEPARADORES_CANDIDATOS, key=lambda s: conteos[s])
+    return sep if conteos[sep] > 0 else ","
+
+
+def _detectar_decimal(lineas, sep):
+    # Con separador "," no puede haber coma decimal sin comillas: se asume punto.
+    if sep == ",":
+        return "."
+    patron = re.compile(r"(?:^|" + re.escape(sep) + r")\s*-?\d+,\d+\s*(?=" + re.escape(sep) + r"|$)")
+    return "," if any(patron.search(linea) for linea in lineas) else "."
+
+
+def detectar_formato(muestra):
+    """Detecta encoding, separador y coma decimal a partir de los primeros bytes del archivo."""
+    encoding = _detectar_encoding(muestra)
+    texto = codecs.getincrementaldecoder(encoding)(errors="replace").decode(muestra, final=False)
+    lineas = texto.splitlines()
+    # La última línea de la muestra puede venir cortada; no se usa para detectar.
+    if len(lineas) > 1 and not texto.endswith(("\n", "\r")):
+        lineas = lineas[:-1]
+    if not lineas:
+        return FormatoCSV(encoding=encoding, sep=",", decimal=".")
+    sep = _detectar_separador(lineas[0])
+    return FormatoCSV(encoding=encoding, sep=sep, decimal=_detectar_decimal(lineas[1:], sep))
+
+
+def dtypes_competencias(linea_encabezado, formato):
+    """Dtypes explícitos para las columnas de competencias, con los nombres tal como vienen en el archivo."""
+    encabezado = next(csv.reader([linea_encabezado], delimiter=formato.sep), [])
+    return {col: DTYPE_COMPETENCIAS for col in encabezado if col.strip() in TODAS_COMPETENCIAS}
+
+
+def _muestra_y_fuente(fuente):
+    """Devuelve (muestra de bytes, objeto que pandas puede leer) sin leer dos veces un archivo en disco."""
+    if isinstance(fuente, (str, os.PathLike)):
+        with open(fuente, "rb") as f:
+            return f.read(TAMANO_MUESTRA), fuente
+    if isinstance(fuente, (bytes, bytearray, memoryview)):
+        datos = bytes(fuente)
+    elif hasattr(fuente, "getvalue"):
+        # UploadedFile de Streamlit (BytesIO): ya está completo en memoria.
+        datos = fuente.getvalue()
+    else:
+        fuente.seek(0)
+        datos = fuente.read()
+    return datos[:TAMANO_MUESTRA], datos
+
+
+def _parsear(datos, formato, dtype):
+    origen = io.BytesIO(datos) if isinstance(datos, bytes) else datos
+    return pd.read_csv(origen, sep=formato.sep, encoding=formato.encoding,
+                       decimal=formato.decimal, dtype=dtype, engine="c")
+
+
+def leer_csv(fuente, formato=None):
+    """Lee el CSV de evaluaciones (ruta, bytes o archivo subido) con un solo parseo.
+
+    Devuelve el DataFrame crudo con los nombres de columna originales.
+    """
+    muestra, datos = _muestra_y_fuente(fuente)
+    if formato is None:
+        formato = detectar_formato(muestra)
+
+    texto = muestra.decode(formato.encoding, errors="replace")
+    dtype = dtypes_competencias(texto.splitlines()[0] if texto else "", formato)
+
+    try:
+        return _parsear(datos, formato, dtype)
+    except UnicodeDecodeError:
+        # El encoding se detecta en la muestra; un byte inválido más adelante obliga a reintentar en Latin-1.
+        formato = FormatoCSV(encoding="latin-1", sep=formato.sep, decimal=formato.decimal)
+        return _parsear(datos, formato, dtype)
+    except ValueError:
+        # Alguna competencia trae texto no numérico: se deja inferir y se convierte después con coerce.
+        return _parsear(datos, formato, None)
+
+
+def formato_de(fuente):
+    """Formato detectado sobre la muestra inicial de una ruta, bytes o archivo subido."""
+    return detectar_formato(_muestra_y_fuente(fuente)[0])
+
+
+def leer_csv_por_bloques(fuente, tamano_bloque, formato=None, tipar_competencias=True, con_posicion=False):
+    """Itera el CSV en bloques de `tamano_bloque` filas.
+
+    Las competencias se parsean como número (si alguna trae texto, pandas lanza
+    ValueError y se debe reintentar con `tipar_competencias=False`); el resto de las
+    columnas queda como texto, así todos los bloques comparten el mismo esquema. Con
+    una ruta el archivo nunca se carga completo en memoria. Con `con_posicion` se
+    itera (bloque, bytes leídos hasta ese bloque), para informar el progreso.
+    """
+    muestra, datos = _muestra_y_fuente(fuente)
+    if formato is None:
+        formato = detectar_formato(muestra)
+    texto = muestra.decode(formato.encoding, errors="replace")
+    competencias = dtypes_competencias(texto.splitlines()[0] if texto else "", formato) if tipar_competencias else {}
+    # El archivo se abre aquí (y no en pandas) para poder consultar cuánto se lleva leído.
+    with (io.BytesIO(datos) if isinstance(datos, bytes) else open(datos, "rb")) as origen:
+        with pd.read_csv(origen, sep=formato.sep, encoding=formato.encoding, decimal=formato.decimal,
+                         dtype=defaultdict(lambda: str, competencias),
+                         chunksize=tamano_bloque, engine="c") as lector:
+            for bloque in lector:
+                yield (bloque, origen.tell()) if con_posicion else bloque
+
+
+def a_numerico(serie, decimal=","):
+    """Convierte a número aceptando coma decimal en columnas que quedaron como texto (p. ej. "3,04")."""
+    if serie.dtype.kind in "biuf":
+        return serie
+    if decimal == ",":
+        serie = serie.astype(str).str.replace(",", ".", regex=False)
+    return pd.to_numeric(serie, errors="coerce")
@@ -0,0 +1,340 @@
+"""Registro por sección de qué se recalculó, qué se reutilizó y cuánto trabajo se evitó en cada interacción.
+
+Además del estado de caché, cada sección registra su tiempo, las filas que procesa,
+el tiempo de sus etapas de dibujo (serialización Plotly, envío de tablas) y, con el
+perfilado de memoria activo, el pico de memoria asignada (tracemalloc). El perfilado de
+memoria es un ajuste del proceso (tracemalloc es global): activarlo desde una sesión
+lo activa para todas. Las ejecuciones se exportan como líneas JSON y se acumulan a nivel de proceso en
+`METRICAS`, que se publica en formato de texto Prometheus.
+"""
+import json
+import math
+import os
+import threading
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+CALCULADA = "calculada"
+REUTILIZADA = "reutilizada"
+OMITIDA = "omitida"
+
+
+class RegistroSecciones:
+    """Tiempos por sección de cada ejecución del reporte (completa o solo de un fragmento).
+
+    Una sección "calculada" corrió su cálculo pesado; una "reutilizada" lo tomó del caché;
+    una "omitida" no se ejecutó porque la interacción solo re-ejecutó otro fragmento.
+    El trabajo ahorrado suma el último costo medido de los cálculos reutilizados y el de
+    re-ejecutar (con caché) las secciones omitidas.
+    """
+
+    def __init__(self, max_historial=50, metricas=None):
+        self.costo_calculo = {}
+        self.costo_seccion = {}
+        self.historial = deque(maxlen=max_historial)
+        self.metricas = METRICAS if metricas is None else metricas
+        self._actual = None
+        self._secciones = []
+
+    @property
+    def en_curso(self):
+        return self._actual is not None
+
+    def iniciar(self, tipo="Completa"):
+        """Abre el registro de una ejecución; descarta una anterior que no se cerró (rerun interrumpido)."""
+        self._actual = {"tipo": tipo, "inicio": time.perf_counter(), "fecha": time.time(), "secciones": {}}
+        self._secciones = []
+
+    def _info(self, nombre):
+        return self._actual["secciones"].setdefault(
+            nombre, {"segundos": 0.0, "calculo": 0.0, "estado": REUTILIZADA, "filas": None,
+                     "memoria_pico": None, "etapas": {}, "filas_enviadas": 0}
+        )
+
+    @contextmanager
+    def ejecucion(self, tipo):
+        """Abre y cierra una ejecución salvo que ya haya una en curso. Entrega True si la abrió."""
+        propia = not self.en_curso
+        if propia:
+            self.iniciar(tipo)
+        try:
+            yield propia
+        finally:
+            if propia:
+                self.cerrar()
+
+    @contextmanager
+    def seccion(self, nombre, filas=None):
+        """Mide el tiempo total (cálculo + dibujo) de una sección y, si se pide, su pico de memoria."""
+        if self._actual is None:
+            yield
+            return
+        info = self._info(nombre)
+        if filas is not None:
+            info["filas"] = filas
+        memoria = tracemalloc.is_tracing()
+        if memoria:
+            # Pico relativo a lo ya asignado al entrar (aproximado si hay otras sesiones en el proceso).
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self._secciones.append(nombre)
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            info["segundos"] += time.perf_counter() - inicio
+            self._secciones.pop()
+            if memoria and tracemalloc.is_tracing():
+                pico = max(0, tracemalloc.get_traced_memory()[1] - base)
+                info["memoria_pico"] = max(info["memoria_pico"] or 0, pico)
+
+    def contar_filas(self, nombre, filas):
+        """Filas que procesa la sección en esta ejecución (p. ej. el tamaño del nodo o del ranking)."""
+        if self._actual is not None:
+            self._info(nombre)["filas"] = filas
+
+    @contextmanager
+    def etapa(self, etapa, filas_enviadas=0):
+        """Mide un paso de la sección en curso (p. ej. "plotly" o "dataframe": serialización y envío)."""
+        if self._actual is None or not self._secciones:
+            yield
+            return
+        info = self._info(self._secciones[-1])
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            info["etapas"][etapa] = info["etapas"].get(etapa, 0.0) + time.perf_counter() - inicio
+            info["filas_enviadas"] += filas_enviadas
+
+    @contextmanager
+    def calculo(self, nombre):
+        """Envuelve el cuerpo de un cálculo cacheado de la sección `nombre` (solo corre en un fallo del caché)."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            if self._actual is not None:
+                info = self._info(nombre)
+                info["calculo"] += time.perf_counter() - inicio
+                info["estado"] = CALCULADA
+
+    def cerrar(self):
+        """Cierra la ejecución en curso, la agrega al historial y la devuelve."""
+        actual, self._actual = self._actual, None
+        if actual is None:
+            return None
+        secciones = actual["secciones"]
+        ahorrado = 0.0
+        for nombre, info in secciones.items():
+            if info["estado"] == CALCULADA:
+                self.costo_calculo[nombre] = info["calculo"]
+            else:
+                ahorrado += self.costo_calculo.get(nombre, 0.0)
+            # Costo de volver a ejecutar la sección con su cálculo ya en caché.
+            self.costo_seccion[nombre] = info["segundos"] - info["calculo"]
+        for nombre, costo in self.costo_seccion.items():
+            if nombre not in secciones:
+                secciones[nombre] = {"segundos": 0.0, "calculo": 0.0, "estado": OMITIDA, "filas": None,
+                                     "memoria_pico": None, "etapas": {}, "filas_enviadas": 0}
+                ahorrado += costo
+        ejecucion = {
+            "tipo": actual["tipo"],
+            "fecha": actual["fecha"],
+            "segundos": time.perf_counter() - actual["inicio"],
+            "ahorrado": ahorrado,
+            "rss_pico": rss_pico(),
+            "secciones": secciones,
+        }
+        self.historial.append(ejecucion)
+        self.metricas.registrar(ejecucion)
+        return ejecucion
+
+    def tabla_historial(self):
+        """Filas (más reciente primero) para mostrar el historial de interacciones."""
+        filas = []
+        for ejecucion in reversed(self.historial):
+            estados = ejecucion["secciones"].values()
+            filas.append({
+                "Ejecución": ejecucion["tipo"],
+                "Tiempo (ms)": round(ejecucion["segundos"] * 1000, 1),
+                "Ahorrado (ms)": round(ejecucion["ahorrado"] * 1000, 1),
+                "Calculadas": sum(info["estado"] == CALCULADA for info in estados),
+                "Reutilizadas": sum(info["estado"] == REUTILIZADA for info in estados),
+                "Omitidas": sum(info["estado"] == OMITIDA for info in estados),
+            })
+        return filas
+
+    def tabla_secciones(self, ejecucion=None):
+        """Detalle por sección de una ejecución (por defecto la última)."""
+        ejecucion = ejecucion or (self.historial[-1] if self.historial else None)
+        if ejecucion is None:
+            return []
+        filas = []
+        for nombre, info in ejecucion["secciones"].items():
+            filas.append({
+                "Sección": nombre,
+                "Estado": info["estado"],
+                "Tiempo (ms)": round(info["segundos"] * 1000, 1),
+                "Cálculo (ms)": round(info["calculo"] * 1000, 1),
+                "Plotly (ms)": round(info["etapas"].get("plotly", 0.0) * 1000, 1),
+                "Tablas (ms)": round(info["etapas"].get("dataframe", 0.0) * 1000, 1),
+                "Filas": info["filas"],
+                "Filas enviadas": info["filas_enviadas"],
+                "Memoria pico (MB)": None if info["memoria_pico"] is None else round(info["memoria_pico"] / 1e6, 1),
+            })
+        return filas
+
+    def jsonl(self):
+        """Historial de la sesión como líneas JSON (una ejecución por línea, de la más antigua a la más reciente)."""
+        return "".join(linea_json(ejecucion) for ejecucion in self.historial)
+
+
+_lock_memoria = threading.Lock()
+
+
+def perfilado_memoria_activo():
+    """Si el proceso está perfilando memoria (tracemalloc)."""
+    return tracemalloc.is_tracing()
+
+
+def activar_perfilado_memoria(activo):
+    """Inicia o detiene tracemalloc para todo el proceso: afecta a todas las sesiones, no solo a la que lo cambia.
+
+    Mientras está activo encarece todas las asignaciones del proceso.
+    """
+    with _lock_memoria:
+        if activo and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        elif not activo and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+
+def rss_pico():
+    """Memoria residente máxima del proceso en bytes (None donde no hay `resource`)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss viene en KiB en Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def linea_json(ejecucion):
+    return json.dumps(ejecucion, ensure_ascii=False, default=float) + "\n"
+
+
+def _valor_prometheus(valor):
+    """Valor de una muestra sin redondear: enteros con todos sus dígitos, el resto con `repr`."""
+    if math.isnan(valor):
+        return "NaN"
+    if math.isinf(valor):
+        return "+Inf" if valor > 0 else "-Inf"
+    if float(valor).is_integer():
+        return "%d" % valor
+    return repr(float(valor))
+
+
+def _etiquetas(**etiquetas):
+    partes = []
+    for nombre, valor in etiquetas.items():
+        valor = str(valor).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        partes.append(f'{nombre}="{valor}"')
+    return "{" + ",".join(partes) + "}"
+
+
+class MetricasProceso:
+    """Acumulado de todas las ejecuciones del proceso (todas las sesiones), para exportar como Prometheus.
+
+    Con `ruta_jsonl` cada ejecución se agrega además como una línea a ese archivo.
+    """
+
+    # nombre -> (tipo, ayuda)
+    DEFINICIONES = {
+        "desempeno_ejecuciones_total": ("counter", "Ejecuciones del reporte por tipo (completa o fragmento)."),
+        "desempeno_ejecucion_segundos_total": ("counter", "Tiempo acumulado de las ejecuciones por tipo."),
+        "desempeno_seccion_segundos_total": ("counter", "Tiempo acumulado por sección (cálculo + dibujo)."),
+        "desempeno_seccion_calculo_segundos_total": ("counter", "Tiempo acumulado de cálculos no cacheados por sección."),
+        "desempeno_seccion_etapa_segundos_total": ("counter", "Tiempo acumulado por etapa de dibujo de cada sección."),
+        "desempeno_seccion_cache_total": ("counter", "Ejecuciones de cada sección según su resultado de caché."),
+        "desempeno_seccion_filas_enviadas_total": ("counter", "Filas de tablas enviadas al navegador por sección."),
+        "desempeno_seccion_filas": ("gauge", "Filas procesadas por la sección en su última ejecución."),
+        "desempeno_seccion_memoria_pico_bytes": ("gauge", "Pico de memoria asignada por la sección (último perfilado)."),
+        "desempeno_rss_pico_bytes": ("gauge", "Memoria residente máxima del proceso."),
+    }
+    RESULTADO_CACHE = {CALCULADA: "fallo", REUTILIZADA: "acierto", OMITIDA: "omitida"}
+
+    def __init__(self, ruta_jsonl=None):
+        self.ruta_jsonl = ruta_jsonl
+        self._valores = defaultdict(float)
+        self._lock = threading.Lock()
+
+    def registrar(self, ejecucion):
+        with self._lock:
+            v = self._valores
+            tipo = "completa" if ejecucion["tipo"] == "Completa" else "fragmento"
+            v[("desempeno_ejecuciones_total", _etiquetas(tipo=tipo))] += 1
+            v[("desempeno_ejecucion_segundos_total", _etiquetas(tipo=tipo))] += ejecucion["segundos"]
+            for nombre, info in ejecucion["secciones"].items():
+                etiqueta = _etiquetas(seccion=nombre)
+                resultado = self.RESULTADO_CACHE[info["estado"]]
+                v[("desempeno_seccion_cache_total", _etiquetas(seccion=nombre, resultado=resultado))] += 1
+                if info["estado"] == OMITIDA:
+                    continue
+                v[("desempeno_seccion_segundos_total", etiqueta)] += info["segundos"]
+                v[("desempeno_seccion_calculo_segundos_total", etiqueta)] += info["calculo"]
+                v[("desempeno_seccion_filas_enviadas_total", etiqueta)] += info["filas_enviadas"]
+                for etapa, segundos in info["etapas"].items():
+                    v[("desempeno_seccion_etapa_segundos_total", _etiquetas(seccion=nombre, etapa=etapa))] += segundos
+                if info["filas"] is not None:
+                    v[("desempeno_seccion_filas", etiqueta)] = info["filas"]
+                if info["memoria_pico"] is not None:
+                    v[("desempeno_seccion_memoria_pico_bytes", etiqueta)] = info["memoria_pico"]
+            if ejecucion.get("rss_pico") is not None:
+                v[("desempeno_rss_pico_bytes", "")] = ejecucion["rss_pico"]
+            if self.ruta_jsonl:
+                with open(self.ruta_jsonl, "a", encoding="utf-8") as f:
+                    f.write(linea_json(ejecucion))
+
+    def texto_prometheus(self):
+        """Métricas en el formato de texto de Prometheus (versión 0.0.4)."""
+        with self._lock:
+            valores = sorted(self._valores.items())
+        lineas = []
+        for metrica, (tipo, ayuda) in self.DEFINICIONES.items():
+            muestras = [(etiquetas, valor) for (nombre, etiquetas), valor in valores if nombre == metrica]
+            if not muestras:
+                continue
+            lineas += [f"# HELP {metrica} {ayuda}", f"# TYPE {metrica} {tipo}"]
+            lineas += [f"{metrica}{etiquetas} {_valor_prometheus(valor)}" for etiquetas, valor in muestras]
+        return "\n".join(lineas) + "\n"
+
+
+METRICAS = MetricasProceso(os.environ.get("DESEMPENO_METRICAS_JSONL") or None)
+
+
+def servir_metricas(puerto, host="127.0.0.1", metricas=None):
+    """Publica `metricas` (por defecto las del proceso) en http://host:puerto/metrics desde un hilo aparte."""
+    metricas = METRICAS if metricas is None else metricas
+
+    class Manejador(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            cuerpo = metricas.texto_prometheus().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(cuerpo)))
+            self.end_headers()
+            self.wfile.write(cuerpo)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, puerto), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True, name="metricas-desempeno").start()
+    return servidor
@@ -0,0 +1,113 @@
+"""Índice precalculado de la jerarquía Dirección → Área → Sub-área.
+
+Las filas se ordenan por jerarquía, de modo que cada nodo del árbol es un tramo
+contiguo del DataFrame. La app guarda el dataset ya ordenado (`ordenar_por_jerarquia`)
+y el índice trabaja sobre ese mismo DataFrame; solo un DataFrame sin ordenar obliga a
+tomar una copia ordenada. Filtrar por un nodo es buscar su tramo en un
+diccionario y devolver un slice (vista), sin máscaras booleanas ni copias. Las
+listas de opciones de los selectores quedan ordenadas de antemano.
+"""
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+NIVELES = ["Dirección", "Área", "Sub-área"]
+TODAS = "Todas"
+
+
+def _codigos(df):
+    codigos, etiquetas = [], []
+    for nivel in NIVELES:
+        cod, uniq = pd.factorize(df[nivel], sort=True)
+        codigos.append(cod)
+        etiquetas.append(list(uniq))
+    # lexsort es estable: dentro de cada nodo se conserva el orden original del archivo.
+    return codigos, etiquetas, np.lexsort(codigos[::-1])
+
+
+def _es_identidad(orden):
+    return bool(np.array_equal(orden, np.arange(len(orden))))
+
+
+def ordenar_por_jerarquia(df):
+    """`df` con las filas ordenadas por Dirección/Área/Sub-área (el mismo objeto si ya lo estaban)."""
+    orden = _codigos(df)[2]
+    return df if _es_identidad(orden) else df.take(orden)
+
+
+class IndiceJerarquia:
+    """Árbol organizacional con opciones ordenadas y tramos de filas por nodo."""
+
+    def __init__(self, df):
+        codigos, etiquetas, orden = _codigos(df)
+        if _es_identidad(orden):
+            # Dataset ya ordenado: el índice no guarda una segunda copia.
+            self.df = df
+        else:
+            self.df = df.take(orden)
+            codigos = [cod[orden] for cod in codigos]
+
+        # Inicio de cada tramo: fila donde cambia cualquiera de los tres niveles.
+        n = len(self.df)
+        cambios = np.zeros(n, dtype=bool)
+        if n:
+            cambios[0] = True
+            for cod in codigos:
+                cambios[1:] |= cod[1:] != cod[:-1]
+        inicios = np.flatnonzero(cambios)
+        finales = np.append(inicios[1:], n)
+
+        self._tramos = {}
+        areas, subareas = {}, {}
+        for inicio, final in zip(inicios.tolist(), finales.tolist()):
+            nodo = tuple(
+                etiquetas[i][cod[inicio]] if cod[inicio] >= 0 else None
+                for i, cod in enumerate(codigos)
+            )
+            direccion, area, subarea = nodo
+            for clave in product(*[(valor, TODAS) for valor in nodo]):
+                # Un nivel sin valor (nulo) solo es alcanzable con "Todas".
+                if None in clave:
+                    continue
+                tramos = self._tramos.setdefault(clave, [])
+                if tramos and tramos[-1][1] == inicio:
+                    tramos[-1] = (tramos[-1][0], final)
+                else:
+                    tramos.append((inicio, final))
+            if area is not None:
+                for d in {direccion, TODAS} - {None}:
+                    areas.setdefault(d, set()).add(area)
+            if subarea is not None:
+                for d, a in product({direccion, TODAS} - {None}, {area, TODAS} - {None}):
+                    subareas.setdefault((d, a), set()).add(subarea)
+
+        self.direcciones = [e for e in etiquetas[0] if pd.notna(e)]
+        self._areas = {d: sorted(valores) for d, valores in areas.items()}
+        self._subareas = {k: sorted(valores) for k, valores in subareas.items()}
+
+    def opciones_area(self, direccion=TODAS):
+        """Áreas disponibles (ordenadas) bajo la Dirección seleccionada."""
+        return self._areas.get(direccion, [])
+
+    def opciones_subarea(self, direccion=TODAS, area=TODAS):
+        """Sub-áreas disponibles (ordenadas) bajo la Dirección y Área seleccionadas."""
+        return self._subareas.get((direccion, area), [])
+
+    def filtrar(self, direccion=TODAS, area=TODAS, subarea=TODAS):
+        """Filas del nodo seleccionado. Un tramo contiguo se devuelve como slice, sin copiar."""
+        tramos = self._tramos.get((direccion, area, subarea), [])
+        if len(tramos) == 1:
+            inicio, final = tramos[0]
+            return self.df.iloc[inicio:final]
+        if not tramos:
+            return self.df.iloc[0:0]
+        # Con "Todas" en un nivel superior la selección puede quedar en varios tramos.
+        return self.df.take(self.posiciones(direccion, area, subarea))
+
+    def posiciones(self, direccion=TODAS, area=TODAS, subarea=TODAS):
+        """Posiciones (en `self.df`) de las filas del nodo seleccionado."""
+        tramos = self._tramos.get((direccion, area, subarea), [])
+        if not tramos:
+            return np.empty(0, dtype=np.int64)
+        return np.concatenate([np.arange(i, f) for i, f in tramos])
@@ -0,0 +1,75 @@
+"""Tablas paginadas del lado del servidor: al navegador solo viaja la página visible.
+
+El orden por Nota_num_2024 se calcula una vez por dataset (índice preordenado); cada
+consulta toma las posiciones del nodo, las ordena por su rango en ese índice, aplica
+la búsqueda de texto y devuelve una página de tamaño acotado.
+"""
+import numpy as np
+import pandas as pd
+
+COLUMNA_ORDEN = "Nota_num_2024"
+COLUMNAS_BUSQUEDA = ["Evaluado", "Cargo"]
+TAMANOS_PAGINA = [25, 50, 100]
+
+
+def _texto_busqueda(df, columnas):
+    """Texto en minúsculas de las columnas de búsqueda, unido por fila."""
+    partes = [df[c].astype(object).fillna("").astype(str).str.lower() for c in columnas if c in df.columns]
+    if not partes:
+        return pd.Series("", index=df.index)
+    texto = partes[0]
+    for parte in partes[1:]:
+        texto = texto + " | " + parte
+    return texto
+
+
+class TablaPaginada:
+    """Índice de orden y de búsqueda sobre un DataFrame fijo; las consultas trabajan con posiciones."""
+
+    def __init__(self, df, columna_orden=COLUMNA_ORDEN, columnas_busqueda=COLUMNAS_BUSQUEDA):
+        self.df = df
+        if columna_orden in df.columns:
+            valores = df[columna_orden].to_numpy(dtype="float64", na_value=np.nan)
+        else:
+            valores = np.full(len(df), np.nan)
+        self._validos = ~np.isnan(valores)
+        # Descendente y estable; las filas sin nota van al final.
+        self._orden = np.lexsort((-np.where(self._validos, valores, 0), ~self._validos))
+        self._rango = np.empty(len(df), dtype=np.int64)
+        self._rango[self._orden] = np.arange(len(df))
+        self._texto = _texto_busqueda(df, columnas_busqueda).to_numpy(dtype=object)
+
+    def consultar(self, posiciones=None, busqueda="", ascendente=False, mascara=None):
+        """Posiciones (en el orden pedido) de las filas del nodo que pasan la máscara y la búsqueda."""
+        if posiciones is None:
+            candidatos = self._orden
+        else:
+            candidatos = self._orden[np.sort(self._rango[np.asarray(posiciones)])]
+        if mascara is not None:
+            candidatos = candidatos[np.asarray(mascara)[candidatos]]
+        busqueda = busqueda.strip().lower()
+        if busqueda:
+            coincide = pd.Series(self._texto[candidatos]).str.contains(busqueda, regex=False).to_numpy()
+            candidatos = candidatos[coincide]
+        if ascendente:
+            con_nota = int(self._validos[candidatos].sum())
+            candidatos = np.concatenate([candidatos[:con_nota][::-1], candidatos[con_nota:]])
+        return candidatos
+
+    def pagina(self, seleccion, pagina, tamano, columnas=None):
+        """Filas de la página `pagina` (desde 1) de una selección devuelta por `consultar`."""
+        inicio = (pagina - 1) * tamano
+        filas = self.df.take(seleccion[inicio:inicio + tamano])
+        if columnas is not None:
+            filas = filas[[c for c in columnas if c in filas.columns]]
+        return filas
+
+
+def paginar(df, pagina, tamano):
+    """Página de un DataFrame chico ya ordenado (p. ej. el ranking de líderes)."""
+    inicio = (pagina - 1) * tamano
+    return df.iloc[inicio:inicio + tamano]
+
+
+def total_paginas(total_filas, tamano):
+    return max(1, -(-total_filas // tamano))
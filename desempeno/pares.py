@@ -0,0 +1,201 @@
+"""Distribuciones precalculadas de cada competencia por nodo de la jerarquía (grupos de pares).
+
+Para cada patrón de nodo (Dirección/Área/Sub-área fijos o "Todas") y cada columna se
+ordenan las filas una sola vez por (grupo, valor): los valores de un nodo quedan en
+un tramo contiguo y ordenado, con sumas acumuladas. El percentil, el ranking, el
+promedio sin la propia persona y los cuartiles de un trabajador se responden con
+búsquedas binarias en su tramo, sin máscaras sobre el DataFrame. `percentiles_filas`
+clasifica todas las filas contra su grupo de una vez (reportes masivos).
+"""
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from desempeno.jerarquia import NIVELES, TODAS
+
+CUARTILES = (0.25, 0.5, 0.75)
+
+
+class _Distribucion:
+    """Valores ordenados por (grupo, valor) de una columna, con cortes y sumas acumuladas por grupo."""
+
+    def __init__(self, grupos, valores, n_grupos):
+        validos = ~np.isnan(valores)
+        grupos, valores = grupos[validos], valores[validos]
+        orden = np.lexsort((valores, grupos))
+        self.valores = valores[orden]
+        self.cortes = np.searchsorted(grupos[orden], np.arange(n_grupos + 1), side="left")
+        self.acumulado = np.concatenate([[0.0], np.cumsum(self.valores)])
+
+    def tramo(self, grupo):
+        return self.valores[self.cortes[grupo]:self.cortes[grupo + 1]]
+
+    def suma(self, grupo):
+        return self.acumulado[self.cortes[grupo + 1]] - self.acumulado[self.cortes[grupo]]
+
+
+def _kesimo(valores, excluidos, k):
+    """k-ésimo valor (desde 0) de `valores` (ordenados) sin los `excluidos` (ordenados, contenidos en `valores`)."""
+    posicion = k
+    while True:
+        siguiente = k + int(np.searchsorted(excluidos, valores[posicion], side="right"))
+        if siguiente == posicion:
+            return valores[posicion]
+        posicion = siguiente
+
+
+def _cuantil(valores, excluidos, q):
+    """Cuantil `q` (interpolación lineal, como pandas) de `valores` sin los `excluidos`."""
+    n = len(valores) - len(excluidos)
+    posicion = q * (n - 1)
+    inferior = int(np.floor(posicion))
+    bajo = _kesimo(valores, excluidos, inferior)
+    if inferior + 1 >= n:
+        return float(bajo)
+    alto = _kesimo(valores, excluidos, inferior + 1)
+    return float(bajo + (alto - bajo) * (posicion - inferior))
+
+
+class EstadisticasPares:
+    """Percentiles, rankings y cuartiles de cada columna numérica dentro de cada nodo organizacional."""
+
+    def __init__(self, df, columnas):
+        self.columnas = [c for c in columnas if c in df.columns]
+        self._indice = df.index
+        codigos, self._etiquetas = [], []
+        for nivel in NIVELES:
+            cod, uniq = pd.factorize(df[nivel], sort=True)
+            codigos.append(cod)
+            self._etiquetas.append({etiqueta: i for i, etiqueta in enumerate(uniq)})
+
+        # Un patrón por combinación de niveles fijos; el código de grupo combina los niveles fijos.
+        self._patrones = {}
+        tamanos = [len(e) + 1 for e in self._etiquetas]
+        for patron in product((True, False), repeat=len(NIVELES)):
+            combinado = np.zeros(len(df), dtype=np.int64)
+            for fijo, cod, tamano in zip(patron, codigos, tamanos):
+                # Los nulos (-1) solo son alcanzables con "Todas": se desplazan a 0 y se descartan abajo.
+                combinado = combinado * tamano + (cod + 1 if fijo else 0)
+            con_nulos = np.zeros(len(df), dtype=bool)
+            for fijo, cod in zip(patron, codigos):
+                if fijo:
+                    con_nulos |= cod < 0
+            grupos, por_fila = np.unique(combinado, return_inverse=True)
+            por_fila = np.where(con_nulos, len(grupos), por_fila)
+            self._patrones[patron] = {
+                "grupos": {int(g): i for i, g in enumerate(grupos)},
+                "por_fila": por_fila,
+                "distribuciones": {},
+                "n_filas": np.bincount(por_fila, minlength=len(grupos) + 1),
+            }
+        self._valores = {c: pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float) for c in self.columnas}
+        for patron, columna in product(self._patrones, self.columnas):
+            self._distribucion(patron, columna)
+
+    def _distribucion(self, patron, columna):
+        datos = self._patrones[patron]
+        distribucion = datos["distribuciones"].get(columna)
+        if distribucion is None:
+            # Los nulos de nivel caen en un grupo extra (el último), que nunca se consulta.
+            distribucion = _Distribucion(datos["por_fila"], self._valores[columna], len(datos["grupos"]) + 1)
+            datos["distribuciones"][columna] = distribucion
+        return distribucion
+
+    def _grupo(self, nodo):
+        """(patrón, índice de grupo) del nodo (Dirección, Área, Sub-área), o (patrón, None) si no existe."""
+        patron = tuple(valor != TODAS for valor in nodo)
+        combinado = 0
+        for fijo, valor, etiquetas in zip(patron, nodo, self._etiquetas):
+            codigo = etiquetas.get(valor) if fijo else -1
+            if codigo is None:
+                return patron, None
+            combinado = combinado * (len(etiquetas) + 1) + codigo + 1
+        return patron, self._patrones[patron]["grupos"].get(combinado)
+
+    def filas(self, nodo):
+        """Cantidad de filas (evaluaciones) del nodo."""
+        patron, grupo = self._grupo(nodo)
+        return 0 if grupo is None else int(self._patrones[patron]["n_filas"][grupo])
+
+    def valores(self, nodo, columna):
+        """Valores no nulos de la columna en el nodo, ordenados de menor a mayor (vista, no copia)."""
+        patron, grupo = self._grupo(nodo)
+        if grupo is None or columna not in self._valores:
+            return np.empty(0)
+        return self._distribucion(patron, columna).tramo(grupo)
+
+    def resumen(self, nodo, columna, valor=None, excluir=()):
+        """Distribución de la columna en el nodo y, si se da `valor`, su posición dentro de ella.
+
+        `excluir` son los valores propios del trabajador dentro del nodo (sus evaluaciones), que
+        se quitan del grupo para compararlo solo con sus pares. Devuelve un dict con n, promedio,
+        minimo, q1, mediana, q3, maximo y, con `valor`, percentil (0-100, rango medio) y
+        ranking (1 = mejor) sobre n; None si no quedan pares con datos.
+        """
+        patron, grupo = self._grupo(nodo)
+        if grupo is None or columna not in self._valores:
+            return None
+        distribucion = self._distribucion(patron, columna)
+        valores = distribucion.tramo(grupo)
+        excluidos = np.sort(np.asarray([v for v in excluir if pd.notna(v)], dtype=float))
+        # Solo se descuentan los valores que efectivamente están en el tramo.
+        if len(valores):
+            posiciones = np.minimum(np.searchsorted(valores, excluidos, side="left"), len(valores) - 1)
+            excluidos = excluidos[valores[posiciones] == excluidos]
+        else:
+            excluidos = excluidos[:0]
+        n = len(valores) - len(excluidos)
+        if n <= 0:
+            return None
+
+        cuartiles = [_cuantil(valores, excluidos, q) for q in CUARTILES]
+        resultado = {
+            "n": n,
+            "promedio": float((distribucion.suma(grupo) - excluidos.sum()) / n),
+            "minimo": _cuantil(valores, excluidos, 0.0),
+            "q1": cuartiles[0],
+            "mediana": cuartiles[1],
+            "q3": cuartiles[2],
+            "maximo": _cuantil(valores, excluidos, 1.0),
+        }
+        if valor is not None and pd.notna(valor):
+            menores = np.searchsorted(valores, valor, side="left") - np.searchsorted(excluidos, valor, side="left")
+            hasta = np.searchsorted(valores, valor, side="right") - np.searchsorted(excluidos, valor, side="right")
+            resultado["percentil"] = float(100 * (menores + (hasta - menores) / 2) / n)
+            resultado["ranking"] = int(n - hasta + 1)
+        return resultado
+
+    def percentiles_filas(self, columna, nivel="Sub-área"):
+        """Percentil (0-100, rango medio) y ranking de cada fila contra las demás filas de su grupo.
+
+        `nivel` fija el grupo: "Sub-área" (Dirección/Área/Sub-área), "Área" (Dirección/Área),
+        "Dirección" o None (la clínica completa). Se excluye la propia fila, no las demás
+        evaluaciones de la misma persona. Devuelve un DataFrame alineado con las filas
+        originales (NaN donde la fila no tiene valor o no tiene pares).
+        """
+        fijos = NIVELES.index(nivel) + 1 if nivel else 0
+        patron = tuple(i < fijos for i in range(len(NIVELES)))
+        datos = self._patrones[patron]
+        distribucion = self._distribucion(patron, columna)
+        valores = self._valores[columna]
+        grupos = datos["por_fila"]
+
+        # Clave monótona (grupo, valor): una sola búsqueda binaria vectorizada para todas las filas.
+        minimo = np.nanmin(valores) if np.isfinite(valores).any() else 0.0
+        escala = (np.nanmax(valores) - minimo + 1) if np.isfinite(valores).any() else 1.0
+        grupo_ordenado = np.repeat(np.arange(len(distribucion.cortes) - 1), np.diff(distribucion.cortes))
+        claves = grupo_ordenado * escala + (distribucion.valores - minimo)
+        propias = grupos * escala + (valores - minimo)
+        menores = np.searchsorted(claves, propias, side="left") - distribucion.cortes[grupos]
+        hasta = np.searchsorted(claves, propias, side="right") - distribucion.cortes[grupos]
+        # Sin la propia fila: un valor igual menos en el grupo.
+        n = (np.diff(distribucion.cortes)[grupos] - 1).astype(float)
+        iguales = hasta - menores - 1
+        validos = ~np.isnan(valores) & (n > 0) & (grupos < len(datos["grupos"]))
+        n[~validos] = np.nan
+        return pd.DataFrame({
+            "percentil": np.where(validos, 100 * (menores + iguales / 2) / np.where(validos, n, 1), np.nan),
+            "ranking": np.where(validos, n - (hasta - 1) + 1, np.nan),
+            "pares": n,
+        }, index=self._indice)
@@ -0,0 +1,102 @@
+"""Índice de personas por Número de Documento con un registro consolidado por persona.
+
+Una persona puede tener varias filas (varios evaluadores o rondas). Las filas se
+agrupan una sola vez por documento: todas las evaluaciones de una persona quedan
+en un tramo de posiciones y el consolidado (media, mínimo, máximo y cantidad por
+competencia) queda precalculado. Abrir la ficha de una persona es una búsqueda en
+un diccionario, sin recorrer el DataFrame.
+"""
+import numpy as np
+import pandas as pd
+
+from desempeno.constantes import COLUMNA_DOCUMENTO, COLUMNA_EVALUADOR, TODAS_COMPETENCIAS
+from desempeno.graficos import ANIOS_HISTORIAL
+
+ESTADISTICAS = {"mean": "media", "min": "minimo", "max": "maximo", "count": "cantidad"}
+
+
+class IndicePersonas:
+    """Evaluaciones y consolidado por persona; el nombre es una clave secundaria (puede repetirse)."""
+
+    def __init__(self, df):
+        self.df = df
+        # Sin columna de documento (exports antiguos) la persona se identifica por su nombre.
+        self.columna_clave = COLUMNA_DOCUMENTO if COLUMNA_DOCUMENTO in df.columns else "Evaluado"
+        codigos, documentos = pd.factorize(df[self.columna_clave])
+
+        orden = np.argsort(codigos, kind="stable")
+        orden = orden[codigos[orden] >= 0]
+        self._filas = orden
+        self._cortes = np.searchsorted(codigos[orden], np.arange(len(documentos) + 1))
+        self.documentos = list(documentos)
+        self._codigo = {documento: i for i, documento in enumerate(self.documentos)}
+
+        primeras = orden[self._cortes[:-1]]
+        self._primeras = primeras
+        self.nombres = df["Evaluado"].to_numpy(dtype=object)[primeras]
+        self._por_nombre = {}
+        for documento, nombre in zip(self.documentos, self.nombres):
+            self._por_nombre.setdefault(nombre, []).append(documento)
+
+        columnas = [c for c in TODAS_COMPETENCIAS + [f"Nota_num_{anio}" for anio in ANIOS_HISTORIAL]
+                    if c in df.columns]
+        grupos = df[columnas].groupby(codigos)
+        consolidado = grupos.agg(list(ESTADISTICAS)).rename(columns=ESTADISTICAS, level=1)
+        consolidado = consolidado.drop(index=-1, errors="ignore").reindex(range(len(self.documentos)))
+        # Persona × competencia × estadística, para leer una ficha sin indexar el DataFrame.
+        self._valores = consolidado.to_numpy(dtype="float64").reshape(len(self.documentos), len(columnas), -1)
+        self._n_evaluaciones = np.diff(self._cortes)
+        if COLUMNA_EVALUADOR in df.columns:
+            evaluadores = df[COLUMNA_EVALUADOR].groupby(codigos).nunique()
+            self._n_evaluadores = evaluadores.reindex(range(len(self.documentos)), fill_value=0).to_numpy()
+        else:
+            self._n_evaluadores = np.ones(len(self.documentos), dtype=np.int64)
+        consolidado[("Evaluaciones", "")] = self._n_evaluaciones
+        consolidado[("Evaluadores", "")] = self._n_evaluadores
+        consolidado.index = pd.Index(self.documentos, name=self.columna_clave)
+        self.consolidado = consolidado
+        self.competencias = columnas
+
+    def __len__(self):
+        return len(self.documentos)
+
+    def __contains__(self, documento):
+        return documento in self._codigo
+
+    def _tramo(self, documento):
+        codigo = self._codigo[documento]
+        return self._filas[self._cortes[codigo]:self._cortes[codigo + 1]]
+
+    def por_nombre(self, nombre):
+        """Documentos con ese nombre (más de uno si hay homónimos)."""
+        return self._por_nombre.get(nombre, [])
+
+    def nombre(self, documento):
+        return self.nombres[self._codigo[documento]]
+
+    def etiqueta(self, documento):
+        """Nombre para mostrar; los homónimos se distinguen por su documento."""
+        nombre = self.nombre(documento)
+        return f"{nombre} ({documento})" if len(self._por_nombre[nombre]) > 1 else nombre
+
+    def columna(self, nombre):
+        """Valor de la columna `nombre` en la primera evaluación de cada persona (orden de `documentos`)."""
+        return self.df[nombre].to_numpy(dtype=object)[self._primeras]
+
+    def registro(self, documento):
+        """Primera evaluación de la persona (datos de la ficha: cargo, área, categoría, notas)."""
+        return self.df.iloc[self._filas[self._cortes[self._codigo[documento]]]]
+
+    def evaluaciones(self, documento):
+        """Todas las evaluaciones de la persona (una fila por evaluador o ronda)."""
+        return self.df.take(self._tramo(documento))
+
+    def consolidado_de(self, documento):
+        """Competencia × (media, minimo, maximo, cantidad) de la persona, combinando evaluadores."""
+        return pd.DataFrame(self._valores[self._codigo[documento]],
+                            index=self.competencias, columns=list(ESTADISTICAS.values()))
+
+    def cantidad_evaluaciones(self, documento):
+        """(evaluaciones, evaluadores distintos) de la persona."""
+        codigo = self._codigo[documento]
+        return int(self._n_evaluaciones[codigo]), int(self._n_evaluadores[codigo])
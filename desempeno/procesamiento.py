@@ -0,0 +1,93 @@
+"""Normalización y limpieza del export de evaluaciones (sin dependencias de Streamlit)."""
+import re
+
+import numpy as np
+import pandas as pd
+
+from desempeno.constantes import TODAS_COMPETENCIAS
+from desempeno.esquema import aplicar_esquema
+from desempeno.ingesta import a_numerico
+
+# Versión de las reglas de procesamiento. Se debe incrementar cada vez que cambie
+# el resultado de procesar_datos, para invalidar los datos ya procesados en caché.
+VERSION_PROCESAMIENTO = 5
+
+FEEDBACK_COL_NAME_TARGET = "Estado Feedback"
+ESTADOS_FEEDBACK_EJEMPLO = ["Completado", "En Proceso", "Pendiente"]
+# Notas que se conservan como número: "Nota <año>" de todos los años, incluido el del reporte, y
+# "Nota" (un export de un solo año cargado sin año).
+PATRON_NOTA = re.compile(r"^Nota( \d{4})?$")
+AVISO_FEEDBACK = f"Columna '{FEEDBACK_COL_NAME_TARGET}' no encontrada. Se generarán datos de ejemplo."
+
+
+def normalizar_bloque(df_proc, anio=None):
+    """Normalización fila a fila (nombres, notas, competencias, nulos) sobre un DataFrame o un bloque del CSV.
+
+    Modifica `df_proc` en el lugar y lo devuelve. No depende de otras filas, así que
+    se puede aplicar bloque a bloque (ver `desempeno.streaming`).
+    """
+    df_proc.columns = df_proc.columns.str.strip()
+
+    if anio is not None:
+        for sin_anio, con_anio in [("Nota", f"Nota {anio}"), ("Categoría", f"Categoría {anio}"), ("Categoria", f"Categoría {anio}")]:
+            if sin_anio in df_proc.columns and con_anio not in df_proc.columns:
+                df_proc.rename(columns={sin_anio: con_anio}, inplace=True)
+
+    # --- 1. Normalización de Títulos de Columna (Case-Insensitive para Feedback) ---
+    # Crea un mapeo de columnas en minúsculas para búsqueda
+    lower_case_cols_map = {col.lower(): col for col in df_proc.columns}
+    original_feedback_col = lower_case_cols_map.get(FEEDBACK_COL_NAME_TARGET.lower())
+
+    # Si se encuentra, renómbrala a la versión estándar esperada
+    if original_feedback_col and original_feedback_col != FEEDBACK_COL_NAME_TARGET:
+        df_proc.rename(columns={original_feedback_col: FEEDBACK_COL_NAME_TARGET}, inplace=True)
+        # Nota: La advertencia sobre la columna no encontrada se evitará si el renombrado es exitoso.
+
+    # Mismo tipo (float64) en los dos caminos de ingesta: el parseo completo infiere estas notas
+    # numéricas, pero el parseo por bloques deja como texto todo lo que no es competencia.
+    for col in df_proc.columns:
+        if PATRON_NOTA.match(col):
+            df_proc[col] = a_numerico(df_proc[col]).astype("float64")
+
+    # Conversión de notas a numérico
+    # (a_numerico acepta la coma decimal del export, p. ej. "3,04")
+    df_proc["Nota_num_2024"] = a_numerico(df_proc.get("Nota 2024", pd.Series(dtype='float64')))
+    df_proc["Nota_num_2023"] = a_numerico(df_proc.get("Nota 2023", pd.Series(dtype='float64')))
+    df_proc["Nota_num_2022"] = a_numerico(df_proc.get("Nota 2022", pd.Series(dtype='float64')))
+
+    # Se asegura de convertir a número todas las competencias (ya vienen numéricas si el archivo está limpio).
+    for comp in TODAS_COMPETENCIAS:
+        if comp in df_proc.columns:
+            df_proc[comp] = pd.to_numeric(df_proc[comp], errors="coerce")
+
+    # Rellenar valores nulos
+    for col in ["Dirección", "Área", "Sub-área", "Evaluado", "Cargo", "Categoría 2024"]:
+        if col in df_proc.columns:
+            df_proc[col] = df_proc[col].fillna("Sin Asignar")
+
+    return df_proc
+
+
+def procesar_datos(df, anio=None):
+    """Normaliza el DataFrame crudo. Devuelve (df_proc, avisos) con los avisos para el usuario.
+
+    Con `anio`, un export de un solo año (columnas "Nota"/"Categoría" sin año) se
+    interpreta como las columnas "Nota <anio>"/"Categoría <anio>" del reporte.
+    """
+    avisos = []
+
+    # Normalización y Limpieza
+    df.columns = df.columns.str.strip()
+    df_proc = normalizar_bloque(df.copy(), anio)
+
+    # Columna de Feedback: Usar "Estado Feedback" o generar una columna de ejemplo si no existe
+    # Usamos la variable TARGET para el chequeo final.
+    if FEEDBACK_COL_NAME_TARGET not in df_proc.columns:
+        np.random.seed(42)
+        avisos.append(AVISO_FEEDBACK)
+        df_proc[FEEDBACK_COL_NAME_TARGET] = np.random.choice(ESTADOS_FEEDBACK_EJEMPLO, size=len(df_proc))
+
+    # Tipos compactos (category / float32). El resumen de memoria viaja con el DataFrame.
+    df_proc.attrs["memoria"] = aplicar_esquema(df_proc)
+
+    return df_proc, avisos
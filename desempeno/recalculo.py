@@ -0,0 +1,241 @@
+"""Recálculo vectorizado de la nota desde la matriz de competencias y validación contra el export.
+
+Las competencias se cargan una vez en una matriz (filas x competencias) con ceros en
+los nulos y su máscara de presencia. Un perfil de ponderación es un vector de pesos
+por competencia más el peso de Metas; cada fila toma el perfil de su cargo. Con los
+perfiles como matriz, las sumas ponderadas de todas las filas son productos
+matriciales, así que un escenario de ponderación se recalcula para toda la
+población de una vez.
+
+La regla por defecto (`PERFILES_ORIGEN`) está ajustada al export 2024 del sistema de
+origen: la nota de competencias es 50 % el promedio de los valores corporativos y
+50 % el promedio de las demás competencias evaluadas; con Metas, estas pesan 15 %
+(30 % en la Evaluación Urgencia); la nota se trunca a centésimas. De las 1.461 filas
+del export 2024 con nota y competencias evaluadas, reproduce exactamente 1.442
+(98,7 %) y todas las categorías; 8 quedan fuera de la tolerancia, casos sueltos que
+el sistema de origen calculó de otra forma. Las 9 filas con nota pero sin
+competencias no se pueden recalcular y se informan aparte, no como diferencias.
+
+Uso (resumen de la validación de un export):
+    python -m desempeno.recalculo archivo.csv [--anio 2024] [--tolerancia 0.05]
+"""
+import argparse
+import re
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from desempeno.constantes import (
+    CATEGORIAS_ORDEN, COLUMNA_RONDA, COMPETENCIAS_VALORES, CORTES_CATEGORIA, TODAS_COMPETENCIAS
+)
+from desempeno.cubo import COLUMNA_CATEGORIA, COLUMNA_NOTA
+from desempeno.ingesta import leer_csv
+from desempeno.procesamiento import procesar_datos
+
+COLUMNA_METAS = "Metas"
+# Pesos de la regla del sistema de origen (ajustados al export 2024)
+PESO_METAS = 0.15
+PESO_METAS_URGENCIA = 0.3
+PESO_VALORES = 0.5
+RONDA_URGENCIA = "Evaluación Urgencia"
+# Diferencia tolerada entre la nota del export y la recalculada.
+TOLERANCIA_NOTA = 0.05
+
+
+def indice_categoria(notas):
+    """Posición en CATEGORIAS_ORDEN de la categoría de cada nota, según CORTES_CATEGORIA (NaN → "Pendiente")."""
+    notas = np.asarray(notas, dtype="float64")
+    cortes = [corte for corte, _ in CORTES_CATEGORIA][::-1]
+    etiquetas = ["No Cumple"] + [nombre for _, nombre in CORTES_CATEGORIA][::-1] + ["Pendiente"]
+    posiciones = np.array([CATEGORIAS_ORDEN.index(e) for e in etiquetas], dtype=np.int64)
+    indices = np.searchsorted(cortes, notas, side="right")
+    indices[np.isnan(notas)] = len(etiquetas) - 1
+    return posiciones[indices]
+
+
+def categoria_de_nota(notas):
+    """Categoría según los cortes de CORTES_CATEGORIA (NaN → "Pendiente")."""
+    return np.array(CATEGORIAS_ORDEN, dtype=object)[indice_categoria(notas)]
+
+
+def truncar_centesimas(notas):
+    """Nota truncada a 2 decimales, como en el export (3.4556 → 3.45); el margen absorbe el error de punto flotante."""
+    return np.floor(np.asarray(notas, dtype="float64") * 100 + 1e-6) / 100
+
+
+@dataclass(frozen=True)
+class PerfilPesos:
+    """Pesos de un grupo de cargos. Las competencias no nombradas pesan `peso_base`.
+
+    Con `peso_valores`, la nota de competencias combina dos promedios ponderados: el de
+    COMPETENCIAS_VALORES (con ese peso) y el de las demás; si una fila no tiene uno de los
+    dos bloques, cuenta solo el otro. Sin él, es un solo promedio ponderado.
+    `pesos_metas_ronda` reemplaza `peso_metas` según el "Tipo de Evaluación" de la fila.
+    `patron_cargo` es una expresión regular sobre "Cargo" (sin distinguir mayúsculas); el
+    primer perfil cuyo patrón coincide se aplica, y el perfil sin patrón es el de los demás.
+    """
+    nombre: str
+    pesos: dict = field(default_factory=dict)
+    peso_base: float = 1.0
+    peso_metas: float = PESO_METAS
+    patron_cargo: str = None
+    peso_valores: float = None
+    pesos_metas_ronda: dict = field(default_factory=dict)
+
+    def vector(self, competencias):
+        return np.array([self.pesos.get(c, self.peso_base) for c in competencias], dtype="float64")
+
+
+PERFILES_ORIGEN = (
+    PerfilPesos("General", peso_valores=PESO_VALORES, pesos_metas_ronda={RONDA_URGENCIA: PESO_METAS_URGENCIA}),
+)
+
+
+class MatrizCompetencias:
+    """Competencias, Metas, Nota y Categoría del export como arreglos, para recalcular y validar en bloque."""
+
+    def __init__(self, df, columna_nota=COLUMNA_NOTA, columna_categoria=COLUMNA_CATEGORIA):
+        self.indice = df.index
+        self.competencias = [c for c in TODAS_COMPETENCIAS if c in df.columns]
+        matriz = df[self.competencias].to_numpy(dtype="float64", na_value=np.nan)
+        self.presentes = ~np.isnan(matriz)
+        self.valores = np.where(self.presentes, matriz, 0.0)
+        self._presentes_f = self.presentes.astype("float64")
+
+        metas = df[COLUMNA_METAS].astype(object) if COLUMNA_METAS in df.columns else pd.Series(np.nan, index=df.index)
+        self.metas = pd.to_numeric(metas, errors="coerce").to_numpy(dtype="float64")
+        self.nota = (pd.to_numeric(df[columna_nota], errors="coerce").to_numpy(dtype="float64")
+                     if columna_nota in df.columns else np.full(len(df), np.nan))
+        self.categoria = (df[columna_categoria].astype(object).to_numpy()
+                          if columna_categoria in df.columns else np.full(len(df), None, dtype=object))
+
+        # Cargos factorizados: asignar perfiles evalúa cada patrón sobre los cargos distintos, no sobre las filas.
+        cargos = df["Cargo"].astype(object).fillna("") if "Cargo" in df.columns else pd.Series("", index=df.index)
+        self._codigos_cargo, self._cargos = pd.factorize(cargos)
+        self._asignaciones = {}
+        rondas = df[COLUMNA_RONDA].astype(object) if COLUMNA_RONDA in df.columns else pd.Series(None, index=df.index)
+        self._codigos_ronda, self._rondas = pd.factorize(rondas)
+        self._en_valores = np.array([c in COMPETENCIAS_VALORES for c in self.competencias], dtype=bool)
+
+    def __len__(self):
+        return len(self.valores)
+
+    def asignar_perfiles(self, perfiles):
+        """Índice de perfil de cada fila (el primero cuyo patrón coincide con el cargo; si no, el perfil sin patrón)."""
+        # La asignación depende solo de los patrones: un escenario que cambia pesos la reutiliza.
+        patrones = tuple(p.patron_cargo for p in perfiles)
+        if patrones not in self._asignaciones:
+            self._asignaciones[patrones] = self._asignar(perfiles)
+        return self._asignaciones[patrones]
+
+    def _asignar(self, perfiles):
+        por_defecto = next((i for i, p in enumerate(perfiles) if p.patron_cargo is None), None)
+        asignados = np.full(len(self._cargos), -1 if por_defecto is None else por_defecto, dtype=np.int64)
+        libres = np.ones(len(self._cargos), dtype=bool)
+        for i, perfil in enumerate(perfiles):
+            if perfil.patron_cargo is None:
+                continue
+            patron = re.compile(perfil.patron_cargo, re.IGNORECASE)
+            coincide = np.array([bool(patron.search(str(c))) for c in self._cargos], dtype=bool) & libres
+            asignados[coincide] = i
+            libres &= ~coincide
+        return asignados[self._codigos_cargo] if len(self._codigos_cargo) else np.empty(0, dtype=np.int64)
+
+    def _promedio(self, pesos, seleccion):
+        """Promedio ponderado de cada fila con los pesos de su perfil (NaN si no tiene competencias con peso)."""
+        # Suma ponderada y suma de pesos presentes de cada fila bajo cada perfil: (filas x perfiles).
+        suma = np.take_along_axis(self.valores @ pesos.T, seleccion, axis=1)[:, 0]
+        peso = np.take_along_axis(self._presentes_f @ pesos.T, seleccion, axis=1)[:, 0]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(peso > 0, suma / peso, np.nan)
+
+    def notas(self, perfiles=PERFILES_ORIGEN):
+        """(nota, perfil por fila) de todas las filas con los perfiles dados (NaN sin competencias o sin perfil)."""
+        perfiles = list(perfiles)
+        pesos = np.vstack([p.vector(self.competencias) for p in perfiles])
+        por_fila = self.asignar_perfiles(perfiles)
+        seleccion = np.clip(por_fila, 0, None)[:, None]
+
+        # Perfiles con bloque de valores: un promedio por bloque, combinados con `peso_valores`.
+        en_bloque = np.array([p.peso_valores is not None for p in perfiles], dtype=bool)[:, None] & self._en_valores
+        valores = self._promedio(np.where(en_bloque, pesos, 0.0), seleccion)
+        resto = self._promedio(np.where(en_bloque, 0.0, pesos), seleccion)
+        peso_valores = np.array([p.peso_valores or 0.0 for p in perfiles], dtype="float64")[seleccion[:, 0]]
+        promedio = np.where(np.isnan(valores), resto,
+                            np.where(np.isnan(resto), valores, peso_valores * valores + (1 - peso_valores) * resto))
+        promedio[por_fila < 0] = np.nan
+
+        # Peso de Metas del perfil, o el de la ronda de la fila si el perfil lo define.
+        peso_metas = np.array([[p.pesos_metas_ronda.get(r, p.peso_metas) for r in self._rondas] + [p.peso_metas]
+                               for p in perfiles], dtype="float64")
+        peso_metas = peso_metas[seleccion[:, 0], self._codigos_ronda]
+        peso_metas = np.where(np.isnan(self.metas), 0.0, peso_metas)
+        return truncar_centesimas((1 - peso_metas) * promedio + peso_metas * np.nan_to_num(self.metas)), por_fila
+
+    def recalcular(self, perfiles=PERFILES_ORIGEN):
+        """(nota, categoría, perfil por fila) de todas las filas; sin competencias evaluadas, NaN y "Pendiente"."""
+        nota, por_fila = self.notas(perfiles)
+        return nota, categoria_de_nota(nota), por_fila
+
+    def validar(self, perfiles=PERFILES_ORIGEN, tolerancia=TOLERANCIA_NOTA):
+        """Filas cuya nota o categoría del export no coincide con el recálculo (o la categoría con su propia nota).
+
+        Las filas con nota en el export pero sin competencias evaluadas van en "Nota sin competencias".
+        """
+        nota, categoria, _ = self.recalcular(perfiles)
+        diferencia = self.nota - nota
+        nota_difiere = np.abs(diferencia) > tolerancia + 1e-9
+        # Una nota del export sin competencias no tiene recálculo: se informa aparte, no como diferencia.
+        sin_competencias = np.isnan(nota) & ~np.isnan(self.nota)
+        categoria_export = pd.Series(self.categoria).fillna("Pendiente").to_numpy(dtype=object)
+        categoria_difiere = (categoria_export != categoria) & ~sin_competencias
+        categoria_inconsistente = categoria_export != categoria_de_nota(self.nota)
+        return pd.DataFrame({
+            "Nota": self.nota,
+            "Nota recalculada": nota,
+            "Diferencia": np.round(diferencia, 2),
+            "Categoría": categoria_export,
+            "Categoría recalculada": categoria,
+            "Nota difiere": nota_difiere,
+            "Nota sin competencias": sin_competencias,
+            "Categoría difiere": categoria_difiere,
+            "Categoría inconsistente con Nota": categoria_inconsistente,
+        }, index=self.indice)
+
+    def comparar_escenario(self, perfiles, base=PERFILES_ORIGEN, mascara=None):
+        """Matriz de transición de categorías (filas: base, columnas: escenario) y cambio de nota promedio.
+
+        `mascara` (booleana, alineada con las filas) limita la comparación a un subconjunto (p. ej. un nodo).
+        """
+        nota_base, _ = self.notas(base)
+        nota_nueva, _ = self.notas(perfiles)
+        if mascara is not None:
+            nota_base, nota_nueva = nota_base[mascara], nota_nueva[mascara]
+        origen, destino = indice_categoria(nota_base), indice_categoria(nota_nueva)
+        k = len(CATEGORIAS_ORDEN)
+        transicion = np.bincount(origen * k + destino, minlength=k * k).reshape(k, k)
+        transicion = pd.DataFrame(transicion, index=pd.Index(CATEGORIAS_ORDEN, name="Base"),
+                                  columns=pd.Index(CATEGORIAS_ORDEN, name="Escenario"))
+        cambio = float(np.nanmean(nota_nueva) - np.nanmean(nota_base)) if np.isfinite(nota_base).any() else np.nan
+        return transicion, cambio
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Valida la Nota y la Categoría de un export contra el recálculo.")
+    parser.add_argument("archivo")
+    parser.add_argument("--anio", type=int, default=2024)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_NOTA)
+    args = parser.parse_args()
+
+    df_proc, _ = procesar_datos(leer_csv(args.archivo), args.anio)
+    validacion = MatrizCompetencias(df_proc).validar(tolerancia=args.tolerancia)
+    recalculables = validacion["Nota"].notna() & validacion["Nota recalculada"].notna()
+    exactas = (validacion.loc[recalculables, "Nota"] == validacion.loc[recalculables, "Nota recalculada"]).sum()
+    print(f"Filas: {len(validacion):,} · con nota y competencias: {recalculables.sum():,} · "
+          f"notas idénticas al recálculo: {exactas:,} ({exactas / max(recalculables.sum(), 1):.1%})")
+    for marca in ["Nota difiere", "Categoría difiere", "Categoría inconsistente con Nota", "Nota sin competencias"]:
+        print(f"{marca}: {validacion[marca].sum():,} ({validacion[marca].mean():.1%} de las filas)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""Generación en lote (sin interfaz) de reportes HTML por Sub-área y por líder.
+
+Los datos se cargan y procesan una sola vez en el proceso principal y se dejan en
+un archivo Feather temporal; los procesos del pool lo abren con memory-map (con
+`fork` lo heredan directamente), construyen el cubo una vez y reparten los nodos.
+
+Uso:
+    python -m desempeno.reportes archivo.csv --salida reportes/ [--jobs 4] [--anio 2024]
+"""
+import argparse
+import html
+import multiprocessing
+import os
+import re
+import shutil
+import tempfile
+import time
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor
+
+import pyarrow as pa
+import pyarrow.feather as feather
+
+from desempeno.cache_disco import escribir_feather_atomico
+from desempeno.constantes import COLORES_CATEGORIAS
+from desempeno.cubo import CuboKPI
+from desempeno.graficos import (
+    figura_categorias, figura_evolucion, figura_feedback, figura_radar, notas_historicas, tabla_categorias
+)
+from desempeno.ingesta import leer_csv
+from desempeno.jerarquia import TODAS, IndiceJerarquia
+from desempeno.procesamiento import procesar_datos
+
+# Estado de cada proceso del pool: se inicializa una vez, no por reporte.
+_ESTADO = {}
+
+
+def _inicializar(ruta_datos):
+    """Carga el dataset compartido (si no vino heredado por fork) y construye el cubo."""
+    if "df" not in _ESTADO:
+        _ESTADO["df"] = feather.read_table(ruta_datos, memory_map=True).to_pandas()
+    if "cubo" not in _ESTADO:
+        _ESTADO["cubo"] = CuboKPI(_ESTADO["df"])
+    if "personas" not in _ESTADO:
+        # Primera fila de cada persona, igual que la vista individual del reporte.
+        df = _ESTADO["df"]
+        _ESTADO["personas"] = df.drop_duplicates("Evaluado").set_index("Evaluado")
+
+
+def nombre_archivo(texto):
+    """Nombre de archivo ASCII seguro a partir de un nombre de nodo o persona."""
+    ascii_ = unicodedata.normalize("NFKD", str(texto)).encode("ascii", "ignore").decode("ascii")
+    return re.sub(r"[^A-Za-z0-9]+", "-", ascii_).strip("-").lower() or "sin-nombre"
+
+
+def _html(titulo, bloques):
+    """Documento HTML con los bloques dados; plotly.js se carga una vez desde el CDN."""
+    partes = []
+    plotlyjs = "cdn"
+    for bloque in bloques:
+        if isinstance(bloque, str):
+            partes.append(bloque)
+        else:
+            partes.append(bloque.to_html(full_html=False, include_plotlyjs=plotlyjs))
+            plotlyjs = False
+    return (f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(titulo)}</title></head>"
+            f"<body><h1>{html.escape(titulo)}</h1>{''.join(partes)}</body></html>")
+
+
+def _reporte_subarea(nodo):
+    cubo = _ESTADO["cubo"]
+    direccion, area, subarea = nodo
+    kpis = cubo.kpis(*nodo)
+    promedio = kpis["promedio_nota"]
+    resumen = (f"<p>Total de Evaluados: {kpis['total_evaluados']:,} · "
+               f"Nota Promedio (2024): {f'{promedio:.2f}' if promedio == promedio else 'N/A'} · "
+               f"% Destacado o Superior: {kpis['porc_destacado_o_mas']:.1f}%</p>")
+    ranking = cubo.ranking_lideres(*nodo)
+    competencias = cubo.competencias_liderazgo
+    fig_radar = figura_radar(competencias, [
+        ("Promedio Clínica", cubo.promedios(competencias), COLORES_CATEGORIAS["Destacado"]),
+        (f"Promedio Dirección: {direccion}", cubo.promedios(competencias, direccion), COLORES_CATEGORIAS["Cumple"]),
+        (f"Promedio Sub-área: {subarea}", cubo.promedios(competencias, *nodo), COLORES_CATEGORIAS["Excepcional"]),
+    ])
+    bloques = [
+        f"<h2>{html.escape(direccion)} / {html.escape(area)}</h2>", resumen,
+        figura_categorias(tabla_categorias(cubo.distribucion_categorias(*nodo))),
+        figura_feedback(cubo.distribucion_feedback(*nodo)),
+        fig_radar,
+        "<h2>Ranking de Líderes (Nota 2024 recibida)</h2>",
+        ranking.round(2).to_html(index=False) if len(ranking) else "<p>Sin líderes en la Sub-área.</p>",
+    ]
+    return _html(f"Reporte de Desempeño 2024 - {subarea}", bloques)
+
+
+def _reporte_lider(lider):
+    cubo = _ESTADO["cubo"]
+    fila = _ESTADO["personas"].loc[lider]
+    direccion = fila.get("Dirección")
+    competencias = cubo.competencias_liderazgo
+    bloques = [
+        f"<h2>{html.escape(str(fila.get('Cargo', '')))} · {html.escape(str(direccion))}</h2>",
+        figura_radar(competencias, [
+            ("Promedio Clínica", cubo.promedios(competencias), COLORES_CATEGORIAS["Destacado"]),
+            (f"Promedio Dirección: {direccion}", cubo.promedios(competencias, direccion), COLORES_CATEGORIAS["Cumple"]),
+            (f"Líder: {lider}", cubo.promedio_persona(lider), COLORES_CATEGORIAS["Excepcional"]),
+        ]),
+    ]
+    notas_hist = notas_historicas(fila)
+    if not notas_hist.empty:
+        bloques.append(figura_evolucion(lider, notas_hist))
+    return _html(f"Reporte de Liderazgo 2024 - {lider}", bloques)
+
+
+def _generar(tarea, salida):
+    tipo, objetivo, ruta_relativa = tarea
+    contenido = (_reporte_subarea if tipo == "subarea" else _reporte_lider)(objetivo)
+    ruta = os.path.join(salida, ruta_relativa)
+    os.makedirs(os.path.dirname(ruta), exist_ok=True)
+    with open(ruta, "w", encoding="utf-8") as f:
+        f.write(contenido)
+    return ruta
+
+
+def _generar_lote(tareas, salida):
+    return [_generar(tarea, salida) for tarea in tareas]
+
+
+def tareas_reportes(df, cubo):
+    """Una tarea (tipo, objetivo, ruta relativa) por Sub-área (hoja de la jerarquía) y una por líder."""
+    indice = IndiceJerarquia(df)
+    tareas, usadas = [], set()
+
+    def agregar(tipo, objetivo, *partes):
+        ruta = os.path.join(*[nombre_archivo(p) for p in partes])
+        # Nombres distintos pueden coincidir al pasarlos a ASCII ("Médico" / "Medico").
+        unica, n = ruta, 1
+        while unica in usadas:
+            n += 1
+            unica = f"{ruta}-{n}"
+        usadas.add(unica)
+        tareas.append((tipo, objetivo, unica + ".html"))
+
+    for direccion in indice.direcciones:
+        for area in indice.opciones_area(direccion):
+            for subarea in indice.opciones_subarea(direccion, area):
+                agregar("subarea", (direccion, area, subarea), "subareas", direccion, area, subarea)
+    for lider in cubo.nombres_lideres(TODAS):
+        agregar("lider", lider, "lideres", lider)
+    return tareas
+
+
+def generar_reportes(df, salida, jobs=None, tamano_lote=8):
+    """Genera todos los reportes en `salida` con `jobs` procesos. Devuelve las rutas escritas."""
+    jobs = jobs or os.cpu_count() or 1
+    directorio_tmp = tempfile.mkdtemp(prefix="desempeno-")
+    try:
+        ruta_datos = os.path.join(directorio_tmp, "datos.feather")
+        escribir_feather_atomico(pa.Table.from_pandas(df, preserve_index=False), ruta_datos)
+        # El proceso principal también queda inicializado: con fork los hijos lo heredan sin copiar.
+        _ESTADO["df"] = df
+        _inicializar(ruta_datos)
+        tareas = tareas_reportes(df, _ESTADO["cubo"])
+        lotes = [tareas[i:i + tamano_lote] for i in range(0, len(tareas), tamano_lote)]
+
+        if jobs == 1:
+            return [ruta for lote in lotes for ruta in _generar_lote(lote, salida)]
+
+        metodos = multiprocessing.get_all_start_methods()
+        contexto = multiprocessing.get_context("fork" if "fork" in metodos else None)
+        with ProcessPoolExecutor(max_workers=jobs, mp_context=contexto,
+                                 initializer=_inicializar, initargs=(ruta_datos,)) as pool:
+            resultados = pool.map(_generar_lote, lotes, [salida] * len(lotes))
+            return [ruta for lote in resultados for ruta in lote]
+    finally:
+        shutil.rmtree(directorio_tmp, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera reportes HTML por Sub-área y por líder.")
+    parser.add_argument("archivo")
+    parser.add_argument("--salida", default="reportes")
+    parser.add_argument("--jobs", type=int, default=None, help="Procesos en paralelo (por defecto, uno por CPU).")
+    parser.add_argument("--anio", type=int, default=None,
+                        help="Año de un export sin año en las columnas (Nota/Categoría).")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    df, avisos = procesar_datos(leer_csv(args.archivo), anio=args.anio)
+    for aviso in avisos:
+        print(f"Aviso: {aviso}")
+    carga = time.perf_counter() - inicio
+
+    inicio = time.perf_counter()
+    rutas = generar_reportes(df, args.salida, args.jobs)
+    duracion = time.perf_counter() - inicio
+    print(f"{len(rutas)} reportes en {duracion:.1f} s ({len(rutas) / duracion:.1f} reportes/s); "
+          f"carga y procesamiento {carga:.2f} s")
+
+
+if __name__ == "__main__":
+    main()
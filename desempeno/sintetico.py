@@ -0,0 +1,376 @@
+"""Generador de exports sintéticos con el esquema del CSV de evaluaciones.
+
+Reproduce las 47 columnas separadas por ";" del export anual: RUT con dígito
+verificador, nombres con tildes (y homónimos), bloques de competencias según el rol
+(10 o 14 competencias por fila, como en el export real), coma decimal en la nota,
+filas "Pendiente" y personas con más de un evaluador. La estructura Dirección /
+Área / Sub-área tiene las cardinalidades del export 2024 (10 / 37 / ~200) y el
+efecto de cada evaluador (más o menos exigente) queda en las notas. Con `historial`
+agrega Nota/Categoría de los dos años anteriores.
+
+La Nota sigue la regla observada en el export 2024 (50 % valores corporativos y 50 %
+el resto de las competencias; Metas 15 %, 30 % en la Evaluación Urgencia; truncada a
+centésimas), escrita aquí sin usar `desempeno.recalculo`, y una fracción
+`PROPORCION_IRREGULAR` de filas trae una nota calculada de otra forma, como los casos
+sueltos del export real: la validación del recálculo tiene discrepancias que encontrar.
+
+Cada tramo fijo de `FILAS_TRAMO` filas se genera con su propia semilla y los bloques
+se recortan de esos tramos: escala a millones de filas con memoria acotada y el
+resultado no depende del tamaño de bloque elegido.
+
+Uso:
+    python -m desempeno.sintetico salida.csv --filas 1000000 [--anio 2024] [--historial] [--semilla 0]
+"""
+import argparse
+import time
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from desempeno.constantes import CATEGORIAS_ORDEN, COMPETENCIAS_EXPORT, COMPETENCIAS_VALORES, CORTES_CATEGORIA
+
+# Competencias que en el export real traen un espacio final en el encabezado.
+_CON_ESPACIO_FINAL = {
+    "Adaptación al equipo", "Aceptación de Feedback", "Aprendizaje de nuevas tareas",
+    "Sigue instrucciones complejas", "Cumplimiento de normas internas",
+    "Lenguaje/ Forma de comunicación", "Independencia en la ejecución de tareas",
+    "Tiempo empleado en la ejecución de tareas",
+}
+COLUMNAS_IDENTIFICACION = [
+    "Número de Documento", "Evaluado", "Cargo", "Dirección", "Área", "Sub-área",
+    "Tipo de Evaluación", "Rut Evaluador", "Cargo Evaluador", "Evaluador",
+]
+
+_BASE = COMPETENCIAS_VALORES
+# (perfil, peso, competencias evaluadas, cargos). Bloques y pesos tomados del export 2024.
+PERFILES_ROL = [
+    ("operativo", 0.33, _BASE + ["Iniciativa", "Capacidad de trabajo bajo presión", "Adaptabilidad",
+                                 "Discreción y Franqueza", "Responsabilidad y Puntualidad"],
+     ["Auxiliar de Limpieza", "Auxiliar de Servicio", "Camillero", "Auxiliar de Alimentación", "Guardia"]),
+    ("administrativo", 0.20, _BASE + ["Iniciativa", "Orientación a resultados", "Capacidad de trabajo bajo presión",
+                                      "Capacidad de análisis y criterio", "Adaptabilidad"],
+     ["Administrativo(a)", "Recepcionista", "Secretaria(o)", "Analista", "Asistente Administrativo"]),
+    ("clinico", 0.22, ["Liderazgo Magnético"] + _BASE + ["Iniciativa", "Capacidad de trabajo bajo presión",
+                                                         "Capacidad de análisis y criterio",
+                                                         "Cuidado por la intimidad del paciente"],
+     ["Técnico Enfermería Nivel Superior", "Enfermera(o)", "Matrona(ón)", "Tecnólogo Médico", "Kinesiólogo(a)"]),
+    ("profesional", 0.10, _BASE + ["Orientación a resultados", "Capacidad de trabajo bajo presión",
+                                   "Capacidad de análisis y criterio", "Adaptabilidad",
+                                   "Cuidado por la intimidad del paciente"],
+     ["Químico Farmacéutico", "Ingeniero(a) de Proyectos", "Nutricionista", "Psicólogo(a)", "Médico Cirujano"]),
+    ("lider", 0.13, ["Humildad", "Resolutividad", "Formador de Personas", "Liderazgo Magnético",
+                     "Visión Estratégica", "Generación de Redes y Relaciones Efectivas"]
+     + _BASE + ["Iniciativa", "Orientación a resultados", "Negociación"],
+     ["Jefe de Servicio", "Coordinador(a)", "Supervisor(a)", "Subgerente", "Director(a) Técnico"]),
+]
+PROPORCION_PENDIENTE = 0.02
+PROPORCION_SEGUNDA_EVALUACION = 0.04
+# Filas cuya nota no sigue la regla (en el export 2024, ~0.5 %, con diferencias de hasta 0.3)
+PROPORCION_IRREGULAR = 0.01
+# Regla de la nota del export 2024
+PESO_VALORES = 0.5
+PESOS_METAS = {"Evaluación Urgencia": 0.3}
+PESO_METAS = 0.15
+# Filas generadas con cada semilla (fijo: los bloques se arman con tramos completos).
+FILAS_TRAMO = 10_000
+
+DIRECCIONES = [
+    ("Dirección de Cuidado al Paciente", 5, 0.48), ("Dirección Médica", 5, 0.20),
+    ("Dirección de Desarrollo", 6, 0.12), ("Dirección de Operaciones", 6, 0.08),
+    ("Dirección de Administración y Finanzas", 5, 0.04), ("Dirección Comercial", 3, 0.03),
+    ("Dirección de Personas", 3, 0.02), ("Dirección de Comunicaciones", 2, 0.01),
+    ("Dirección Experiencia del Paciente", 1, 0.01), ("Dirección General", 1, 0.01),
+]
+AREAS = [
+    "Subgerencia Enfermería Hospitalización", "Subgerencia Enfermería Ambulatorio", "Subgerencia de Pabellón",
+    "Subgerencia de Oncología y Hospitalización", "Subgerencia Enfermería Innovación y Desarrollo",
+    "Subdirección de Servicios Clínicos y Asuntos Médicos", "Subdirección Médica de Calidad",
+    "Subdirección de Gestión y Proyectos Médicos", "Auditoría Médica", "Docencia e Investigación",
+    "Subgerencia de Servicios Base", "Subgerencia de Unidades de Apoyo y Urgencia", "Subgerencia de Centro Médico",
+    "Subgerencia de Ingeniería", "Equipos Médicos", "Gerencia de Tecnología",
+    "Subgerencia de Abastecimiento", "Administración Edificio", "Prevención de Riesgos", "Contratos",
+    "Subgerencia Ciclo de Ingresos", "Contabilidad", "Finanzas", "Subgerencia de Control de Gestión",
+    "Seguros", "Subgerencia Comercial", "Subgerencia de Ventas y Marketing",
+    "Subgerencia de Acreditación y Pagos Médicos", "Subgerencia de Desarrollo de Personas",
+    "Subgerencia de Gestión de Personas", "Desarrollo", "Subgerencia de Comunicación Digital",
+    "Subgerencia de Comunicación Institucional", "Acompañamiento Del Paciente y Familia",
+    "Dirección General", "BI", "Calidad y Seguridad del Paciente",
+]
+_CALIFICADORES = ["", " Adulto", " Pediátrico", " Ambulatorio", " Hospitalizado", " Norte", " Sur", " Oriente"]
+_UNIDADES = [
+    "Limpieza", "Pabellón", "Unidad de Paciente Crítico Adulto", "Centro Médico", "Urgencia", "Farmacia",
+    "Imagenología", "Laboratorio Clínico", "Pediatría", "Neonatología", "Maternidad", "Cardiología",
+    "Oncología", "Traumatología", "Urología", "Medicina Interna", "Cirugía", "Esterilización",
+    "Alimentación", "Mantención", "Recaudación", "Contabilidad", "Remuneraciones", "Selección",
+    "Capacitación", "Admisión", "Call Center", "Soporte TI", "Desarrollo TI", "Compras", "Bodega",
+    "Hospitalización Médico Quirúrgica", "Diálisis", "Endoscopía", "Kinesiología", "Nutrición",
+]
+NOMBRES = [
+    "María", "José", "Juan", "Ana", "Camila", "Sebastián", "Valentina", "Matías", "Javiera", "Benjamín",
+    "Catalina", "Tomás", "Fernanda", "Martín", "Constanza", "Andrés", "Ignacio", "Francisca", "Nicolás",
+    "Paula", "Cristóbal", "Daniela", "Joaquín", "Bárbara", "Ángela", "Sofía", "Renée", "Óscar", "Inés",
+    "Raúl", "Verónica", "Mónica", "Héctor", "Iván", "Elizabeth", "Carolina", "Patricio", "Lucía", "Rocío",
+]
+APELLIDOS = [
+    "González", "Muñoz", "Rojas", "Díaz", "Pérez", "Soto", "Contreras", "Silva", "Martínez", "Sepúlveda",
+    "Morales", "Rodríguez", "López", "Fuentes", "Hernández", "Torres", "Araya", "Flores", "Espinoza",
+    "Valenzuela", "Castillo", "Tapia", "Reyes", "Gutiérrez", "Castro", "Pizarro", "Álvarez", "Vásquez",
+    "Sánchez", "Fernández", "Ramírez", "Carrasco", "Gómez", "Cortés", "Herrera", "Núñez", "Jara",
+    "Guzmán", "Aranís", "Zúñiga", "Peña", "Ibáñez", "Cáceres", "Galmez", "Oyarzún",
+]
+
+
+def columnas_export(anio=2024, historial=False):
+    """Encabezado del export: 47 columnas (51 con el historial de dos años).
+
+    Como el export real, un solo año trae "Nota"/"Categoría" sin año; con historial
+    todas las columnas de nota llevan su año.
+    """
+    competencias = [c + " " if c in _CON_ESPACIO_FINAL else c for c in COMPETENCIAS_EXPORT]
+    sufijo = f" {anio}" if historial else ""
+    columnas = COLUMNAS_IDENTIFICACION + competencias + [
+        "Metas", f"Nota{sufijo}", f"Categoría{sufijo}", "Estado feedback", "Respuesta feedback"
+    ]
+    if historial:
+        for previo in (anio - 2, anio - 1):
+            columnas += [f"Nota {previo}", f"Categoría {previo}"]
+    return columnas
+
+
+def rut(numeros):
+    """RUT chileno con puntos y dígito verificador (módulo 11) para un arreglo de números."""
+    numeros = np.asarray(numeros, dtype=np.int64)
+    suma = np.zeros(len(numeros), dtype=np.int64)
+    resto = numeros.copy()
+    factor = 2
+    while resto.any():
+        suma += (resto % 10) * factor
+        resto //= 10
+        factor = 2 if factor == 7 else factor + 1
+    digito = 11 - suma % 11
+    verificador = np.where(digito == 11, "0", np.where(digito == 10, "k", digito.astype(str)))
+    cuerpo = pd.Series(numeros).map("{:,}".format).str.replace(",", ".", regex=False)
+    return (cuerpo + "-" + verificador).to_numpy(dtype=object)
+
+
+def _formatear_nota(notas):
+    texto = pd.Series(np.round(notas, 2)).astype(str).str.replace(r"\.0$", "", regex=True).str.replace(".", ",", regex=False)
+    return texto.where(~np.isnan(notas), "").to_numpy(dtype=object)
+
+
+@dataclass
+class Organizacion:
+    """Sub-áreas (con su Dirección, Área y peso) y evaluadores por Sub-área."""
+    subareas: pd.DataFrame
+    evaluadores: pd.DataFrame
+
+    @classmethod
+    def generar(cls, filas, semilla=0):
+        rng = np.random.default_rng([semilla, 0])
+        # Nombres de Sub-área distintos: unidad + calificador, en orden aleatorio.
+        unidades = [u + c for c in _CALIFICADORES for u in _UNIDADES]
+        unidades = [unidades[i] for i in rng.permutation(len(unidades))]
+        areas = iter(AREAS)
+        registros = []
+        for direccion, n_areas, peso_direccion in DIRECCIONES:
+            for _ in range(n_areas):
+                area = next(areas)
+                # Sub-áreas por Área con cola larga (mediana 4, algunas con más de 20).
+                n_sub = int(np.clip(rng.geometric(0.18), 1, 27))
+                pesos = rng.lognormal(0, 0.8, n_sub)
+                for peso in pesos:
+                    unidad = unidades[len(registros) % len(unidades)]
+                    registros.append((direccion, area, unidad, peso_direccion / n_areas * peso / pesos.sum()))
+        subareas = pd.DataFrame(registros, columns=["Dirección", "Área", "Sub-área", "peso"])
+        subareas["peso"] /= subareas["peso"].sum()
+
+        # Un evaluador cada ~9 filas esperadas de la Sub-área (al menos uno).
+        n_eval = np.maximum(1, np.round(subareas["peso"].to_numpy() * filas / 9).astype(int))
+        sub_de_evaluador = np.repeat(np.arange(len(subareas)), n_eval)
+        total = len(sub_de_evaluador)
+        evaluadores = pd.DataFrame({
+            "subarea": sub_de_evaluador,
+            "Rut Evaluador": rut(rng.integers(5_000_000, 25_000_000, total)),
+            "Evaluador": (pd.Series(rng.choice(APELLIDOS, total)) + ", "
+                          + pd.Series(rng.choice(NOMBRES, total)) + " "
+                          + pd.Series(rng.choice(NOMBRES, total))).to_numpy(dtype=object),
+            "Cargo Evaluador": subareas["Sub-área"].to_numpy(dtype=object)[sub_de_evaluador],
+            # Exigencia del evaluador: desplaza todas las notas que pone.
+            "efecto": rng.normal(0, 0.25, total),
+        })
+        inicio = np.concatenate([[0], np.cumsum(n_eval)[:-1]])
+        subareas["primer_evaluador"] = inicio
+        subareas["n_evaluadores"] = n_eval
+        return cls(subareas=subareas, evaluadores=evaluadores)
+
+
+def categoria(notas):
+    """Categoría de cada nota según CORTES_CATEGORIA ("Pendiente" sin nota)."""
+    notas = np.asarray(notas, dtype="float64")
+    condiciones = [np.isnan(notas)] + [notas >= corte for corte, _ in CORTES_CATEGORIA]
+    etiquetas = [CATEGORIAS_ORDEN[-1]] + [nombre for _, nombre in CORTES_CATEGORIA]
+    return np.select(condiciones, np.array(etiquetas, dtype=object), default="No Cumple")
+
+
+def _promedio(bloque):
+    """Promedio de las competencias evaluadas de cada fila (NaN si no tiene ninguna)."""
+    evaluadas = (~np.isnan(bloque)).sum(axis=1)
+    return np.nansum(bloque, axis=1) / np.where(evaluadas > 0, evaluadas, np.nan)
+
+
+def nota_export(matriz, metas, rondas):
+    """Nota con la regla del export: promedio de los dos bloques de competencias y Metas, truncada a centésimas."""
+    en_valores = np.array([c in COMPETENCIAS_VALORES for c in COMPETENCIAS_EXPORT], dtype=bool)
+    valores, resto = _promedio(matriz[:, en_valores]), _promedio(matriz[:, ~en_valores])
+    competencias = np.where(np.isnan(valores), resto,
+                            np.where(np.isnan(resto), valores, PESO_VALORES * valores + (1 - PESO_VALORES) * resto))
+    peso_metas = np.array([PESOS_METAS.get(r, PESO_METAS) for r in rondas], dtype="float64")
+    nota = np.where(np.isnan(metas), competencias, (1 - peso_metas) * competencias + peso_metas * metas)
+    return np.floor(nota * 100 + 1e-6) / 100
+
+
+def generar_tramo(org, tramo, semilla=0, anio=2024, historial=False):
+    """Las `FILAS_TRAMO` filas del tramo `tramo` como DataFrame de texto/números listo para escribir."""
+    rng = np.random.default_rng([semilla, tramo + 1])
+    filas = FILAS_TRAMO
+    primera_persona = tramo * FILAS_TRAMO
+    # Cota superior de personas; las que no alcanzan a tener fila se descartan al truncar.
+    repeticiones = 1 + (rng.random(filas) < PROPORCION_SEGUNDA_EVALUACION)
+    persona = np.repeat(np.arange(filas), repeticiones)[:filas]
+    n_personas = int(persona[-1]) + 1 if filas else 0
+    segunda = np.zeros(len(persona), dtype=bool)
+    segunda[1:] = persona[1:] == persona[:-1]
+    n = len(persona)
+
+    # Atributos por persona (se repiten en sus filas)
+    subarea_p = rng.choice(len(org.subareas), n_personas, p=org.subareas["peso"].to_numpy())
+    pesos_perfil = np.array([peso for _, peso, _, _ in PERFILES_ROL])
+    perfil_p = rng.choice(len(PERFILES_ROL), n_personas, p=pesos_perfil / pesos_perfil.sum())
+    efecto_p = rng.normal(0, 0.35, n_personas)
+    documento_p = rut(10_000_000 + (primera_persona + np.arange(n_personas)) * 7 + rng.integers(0, 7, n_personas))
+    nombre_p = (pd.Series(rng.choice(NOMBRES, n_personas)) + " " + pd.Series(rng.choice(NOMBRES, n_personas))
+                + " " + pd.Series(rng.choice(APELLIDOS, n_personas)))
+    unidad_p = org.subareas["Sub-área"].to_numpy(dtype=object)[subarea_p]
+    titulo_p = np.array([PERFILES_ROL[k][3][i] for k, i in zip(perfil_p, rng.integers(0, 5, n_personas))], dtype=object)
+    # Los líderes y parte del resto llevan la unidad en el cargo (alta cardinalidad, como el export real).
+    con_unidad = (perfil_p == len(PERFILES_ROL) - 1) | (rng.random(n_personas) < 0.3)
+    cargo_p = np.where(con_unidad, titulo_p + " " + unidad_p, titulo_p)
+
+    subarea = subarea_p[persona]
+    perfil = perfil_p[persona]
+    # Evaluador dentro de la Sub-área; la segunda evaluación usa el siguiente evaluador de la unidad.
+    primer = org.subareas["primer_evaluador"].to_numpy()[subarea]
+    cantidad = org.subareas["n_evaluadores"].to_numpy()[subarea]
+    evaluador = primer + (rng.integers(0, 1 << 30, n) + segunda) % cantidad
+    evaluadores = org.evaluadores.iloc[evaluador]
+
+    datos = {
+        "Número de Documento": documento_p[persona],
+        "Evaluado": nombre_p.to_numpy(dtype=object)[persona],
+        "Cargo": cargo_p[persona],
+        "Dirección": org.subareas["Dirección"].to_numpy(dtype=object)[subarea],
+        "Área": org.subareas["Área"].to_numpy(dtype=object)[subarea],
+        "Sub-área": org.subareas["Sub-área"].to_numpy(dtype=object)[subarea],
+        "Tipo de Evaluación": np.where(
+            segunda, "Evaluación 02",
+            rng.choice(np.array(["Evaluación 01", "Evaluación 02", "Evaluación Urgencia", ""], dtype=object),
+                       n, p=[0.71, 0.22, 0.04, 0.03])),
+        "Rut Evaluador": evaluadores["Rut Evaluador"].to_numpy(),
+        "Cargo Evaluador": evaluadores["Cargo Evaluador"].to_numpy(),
+        "Evaluador": evaluadores["Evaluador"].to_numpy(),
+    }
+
+    # Competencias: solo las del bloque del rol; escala 1 a 5 con efecto persona + evaluador.
+    pendiente = rng.random(n) < PROPORCION_PENDIENTE
+    base = 3.15 + efecto_p[persona] + evaluadores["efecto"].to_numpy()
+    matriz = np.full((n, len(COMPETENCIAS_EXPORT)), np.nan)
+    for k, (_, _, competencias, _) in enumerate(PERFILES_ROL):
+        filas_rol = np.flatnonzero((perfil == k) & ~pendiente)
+        columnas = [COMPETENCIAS_EXPORT.index(c) for c in competencias]
+        valores = base[filas_rol, None] + rng.normal(0, 0.55, (len(filas_rol), len(columnas)))
+        matriz[np.ix_(filas_rol, columnas)] = np.clip(np.rint(valores), 1, 5)
+    for j, comp in enumerate(COMPETENCIAS_EXPORT):
+        datos[comp] = pd.array(matriz[:, j], dtype="Int8")
+
+    metas = rng.choice(np.array(["Sin metas", "1", "2", "3", "4", "5"], dtype=object), n,
+                       p=[0.65, 0.01, 0.07, 0.21, 0.05, 0.01])
+    valor_metas = pd.to_numeric(pd.Series(metas), errors="coerce").to_numpy()
+    nota = nota_export(matriz, valor_metas, datos["Tipo de Evaluación"])
+    # Casos sueltos que el sistema de origen calculó de otra forma: la nota se corre entre 0.1 y 0.3.
+    irregular = rng.random(n) < PROPORCION_IRREGULAR
+    desvio = rng.choice([-1, 1], n) * rng.uniform(0.1, 0.3, n)
+    nota = np.where(irregular, np.clip(np.round(nota + desvio, 2), 1, 5), nota)
+    nota = np.where(pendiente, np.nan, nota)
+    datos["Metas"] = metas
+    texto_nota = _formatear_nota(nota)
+    datos["Nota"] = np.where(pendiente, "Pendiente", texto_nota)
+    datos["Categoría"] = categoria(nota)
+    datos["Estado feedback"] = rng.choice(np.array(["Recibido", "No recibido"], dtype=object), n, p=[0.68, 0.32])
+    datos["Respuesta feedback"] = rng.choice(np.array(["Pendiente", "Conforme", "No conforme"], dtype=object),
+                                             n, p=[0.66, 0.32, 0.02])
+    if historial:
+        previa = nota
+        for ausencia in (0.15, 0.25):
+            previa = np.clip(np.round(np.where(np.isnan(previa), 3.1, previa) + rng.normal(0, 0.35, n), 2), 1, 5)
+            previa[rng.random(n) < ausencia] = np.nan
+            datos[f"Nota previa {ausencia}"] = _formatear_nota(previa)
+            datos[f"Categoría previa {ausencia}"] = np.where(np.isnan(previa), "", categoria(previa))
+
+    df = pd.DataFrame(datos)
+    # Orden y nombres del export; el historial va del año más antiguo al más reciente.
+    orden = list(df.columns[:len(COLUMNAS_IDENTIFICACION) + len(COMPETENCIAS_EXPORT)]) + [
+        "Metas", "Nota", "Categoría", "Estado feedback", "Respuesta feedback"
+    ]
+    if historial:
+        orden += ["Nota previa 0.25", "Categoría previa 0.25", "Nota previa 0.15", "Categoría previa 0.15"]
+    df = df[orden]
+    df.columns = columnas_export(anio, historial)
+    return df
+
+
+def generar_bloque(org, inicio, filas, semilla=0, anio=2024, historial=False):
+    """Filas [inicio, inicio + filas) del export: los tramos que las cubren, recortados."""
+    primero, ultimo = inicio // FILAS_TRAMO, (inicio + filas - 1) // FILAS_TRAMO
+    tramos = [generar_tramo(org, tramo, semilla, anio, historial) for tramo in range(primero, ultimo + 1)]
+    df = pd.concat(tramos, ignore_index=True) if len(tramos) > 1 else tramos[0]
+    desde = inicio - primero * FILAS_TRAMO
+    return df.iloc[desde:desde + filas].reset_index(drop=True)
+
+
+def generar_df(filas, semilla=0, anio=2024, historial=False, tamano_bloque=100_000):
+    """Export sintético completo en memoria (para benchmarks sin pasar por disco)."""
+    return pd.concat(list(_bloques(filas, semilla, anio, historial, tamano_bloque)), ignore_index=True)
+
+
+def _bloques(filas, semilla, anio, historial, tamano_bloque):
+    org = Organizacion.generar(filas, semilla)
+    for inicio in range(0, filas, tamano_bloque):
+        yield generar_bloque(org, inicio, min(tamano_bloque, filas - inicio), semilla, anio, historial)
+
+
+def generar_csv(ruta, filas, semilla=0, anio=2024, historial=False, tamano_bloque=100_000):
+    """Escribe el export sintético en `ruta` (UTF-8 con BOM, ";" y coma decimal), bloque a bloque."""
+    with open(ruta, "w", encoding="utf-8-sig", newline="") as f:
+        for i, bloque in enumerate(_bloques(filas, semilla, anio, historial, tamano_bloque)):
+            bloque.to_csv(f, sep=";", index=False, header=i == 0, lineterminator="\n")
+    return ruta
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Genera un export sintético de evaluaciones de desempeño.")
+    parser.add_argument("salida")
+    parser.add_argument("--filas", type=int, default=100_000)
+    parser.add_argument("--anio", type=int, default=2024)
+    parser.add_argument("--historial", action="store_true", help="Agrega Nota/Categoría de los dos años anteriores.")
+    parser.add_argument("--semilla", type=int, default=0)
+    parser.add_argument("--bloque", type=int, default=100_000, help="Filas por bloque generado.")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    generar_csv(args.salida, args.filas, args.semilla, args.anio, args.historial, args.bloque)
+    print(f"{args.filas:,} filas en {args.salida} ({time.perf_counter() - inicio:.1f} s)")
+
+
+if __name__ == "__main__":
+    main()
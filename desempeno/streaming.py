@@ -0,0 +1,146 @@
+"""Ingesta por bloques con memoria acotada para exports muy grandes.
+
+El CSV se lee en bloques de `tamano_bloque` filas. Cada bloque recibe la misma
+normalización que `procesar_datos` y se vuelca de inmediato a un archivo Arrow IPC
+(Feather, que luego se lee con memory-map) y a los agregados de hojas del cubo, que
+se acumulan sumando. El pico de memoria depende del tamaño del bloque y no del
+archivo. Los tipos compactos (category) se aplican al leer el archivo resultante.
+
+Uso:
+    python -m desempeno.streaming archivo.csv --salida datos.feather [--bloque 50000] [--anio 2024]
+"""
+import argparse
+import json
+import os
+import time
+from dataclasses import dataclass, field
+
+import numpy as np
+import pyarrow as pa
+
+from desempeno.cache_disco import CLAVE_AVISOS, archivo_atomico
+from desempeno.constantes import TODAS_COMPETENCIAS
+from desempeno.cubo import COLUMNA_NOTA, agregar_hojas, combinar_hojas
+from desempeno.esquema import DTYPE_COMPETENCIAS
+from desempeno.ingesta import FormatoCSV, a_numerico, formato_de, leer_csv_por_bloques
+from desempeno.procesamiento import (
+    AVISO_FEEDBACK, ESTADOS_FEEDBACK_EJEMPLO, FEEDBACK_COL_NAME_TARGET, normalizar_bloque
+)
+
+TAMANO_BLOQUE = int(os.environ.get("DESEMPENO_TAMANO_BLOQUE", "50000"))
+
+
+class ArchivoVacioError(ValueError):
+    """El CSV no trae filas (solo encabezado o vacío)."""
+
+
+@dataclass
+class ResumenBloques:
+    """Resultado de una ingesta por bloques: conteos, avisos y agregados de hojas acumulados."""
+    filas: int = 0
+    bloques: int = 0
+    bytes_leidos: int = 0
+    avisos: list = field(default_factory=list)
+    hojas: object = None
+
+
+def preparar_bloque(bloque, formato, anio=None, rng=None, avisos=None):
+    """Normaliza un bloque de `leer_csv_por_bloques`; mismo resultado que `procesar_datos` sin el esquema compacto."""
+    bloque.columns = bloque.columns.str.strip()
+    # Competencias que vinieron como texto (reintento) se convierten respetando la coma decimal del archivo.
+    for comp in TODAS_COMPETENCIAS:
+        if comp in bloque.columns:
+            bloque[comp] = a_numerico(bloque[comp], formato.decimal).astype(DTYPE_COMPETENCIAS)
+    normalizar_bloque(bloque, anio)
+    if FEEDBACK_COL_NAME_TARGET not in bloque.columns:
+        # Un solo generador para todo el archivo: la secuencia es la misma que en procesar_datos.
+        rng = rng if rng is not None else np.random.RandomState(42)
+        if avisos is not None and AVISO_FEEDBACK not in avisos:
+            avisos.append(AVISO_FEEDBACK)
+        bloque[FEEDBACK_COL_NAME_TARGET] = rng.choice(ESTADOS_FEEDBACK_EJEMPLO, size=len(bloque))
+    return bloque
+
+
+def _volcar(fuente, ruta, formato, tamano_bloque, anio, al_bloque, tipar_competencias=True):
+    resumen = ResumenBloques()
+    rng = np.random.RandomState(42)
+    escritor = esquema = None
+    try:
+        for bloque, bytes_leidos in leer_csv_por_bloques(fuente, tamano_bloque, formato, tipar_competencias,
+                                                         con_posicion=True):
+            bloque = preparar_bloque(bloque, formato, anio, rng, resumen.avisos)
+            tabla = pa.Table.from_pandas(bloque, preserve_index=False)
+            if escritor is None:
+                metadata = dict(tabla.schema.metadata or {})
+                metadata[CLAVE_AVISOS] = json.dumps(resumen.avisos).encode("utf-8")
+                esquema = tabla.schema.with_metadata(metadata)
+                escritor = pa.ipc.new_file(ruta, esquema)
+            # Bloques con columnas enteramente vacías pueden inferir otro tipo: se fuerza el del primero.
+            escritor.write_table(tabla.replace_schema_metadata(esquema.metadata).cast(esquema))
+            resumen.hojas = combinar_hojas([resumen.hojas, agregar_hojas(bloque)])
+            resumen.filas += len(bloque)
+            resumen.bloques += 1
+            resumen.bytes_leidos = bytes_leidos
+            if al_bloque is not None:
+                al_bloque(resumen)
+    finally:
+        if escritor is not None:
+            escritor.close()
+    if escritor is None:
+        raise ArchivoVacioError("El archivo no contiene filas de evaluaciones.")
+    return resumen
+
+
+def procesar_por_bloques(fuente, ruta_destino, tamano_bloque=TAMANO_BLOQUE, anio=None, formato=None, al_bloque=None):
+    """Procesa `fuente` (ruta, bytes o archivo subido) bloque a bloque y escribe el resultado en `ruta_destino`.
+
+    `al_bloque(resumen)` se llama después de cada bloque (progreso). Devuelve el `ResumenBloques`.
+    """
+    formato = formato or formato_de(fuente)
+    with archivo_atomico(ruta_destino) as tmp:
+        try:
+            return _volcar(fuente, tmp, formato, tamano_bloque, anio, al_bloque)
+        except ArchivoVacioError:
+            raise
+        except UnicodeDecodeError:
+            # El encoding se detecta en la muestra; un byte inválido más adelante obliga a reempezar en Latin-1.
+            formato = FormatoCSV(encoding="latin-1", sep=formato.sep, decimal=formato.decimal)
+            return _volcar(fuente, tmp, formato, tamano_bloque, anio, al_bloque)
+        except ValueError:
+            # Alguna competencia trae texto no numérico: se reempieza leyéndolas como texto (coerce al normalizar).
+            return _volcar(fuente, tmp, formato, tamano_bloque, anio, al_bloque, tipar_competencias=False)
+
+
+def _memoria_pico_mb():
+    try:
+        import resource
+    except ImportError:
+        return float("nan")
+    # ru_maxrss viene en KiB en Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Procesa un export grande por bloques con memoria acotada.")
+    parser.add_argument("archivo")
+    parser.add_argument("--salida", required=True, help="Archivo Feather de salida.")
+    parser.add_argument("--bloque", type=int, default=TAMANO_BLOQUE, help="Filas por bloque.")
+    parser.add_argument("--anio", type=int, default=None,
+                        help="Año de un export sin año en las columnas (Nota/Categoría).")
+    args = parser.parse_args()
+
+    inicio = time.perf_counter()
+    resumen = procesar_por_bloques(args.archivo, args.salida, args.bloque, args.anio)
+    duracion = time.perf_counter() - inicio
+    for aviso in resumen.avisos:
+        print(f"Aviso: {aviso}")
+
+    total = resumen.hojas.sum()
+    n_nota = total[("n", COLUMNA_NOTA)] if ("n", COLUMNA_NOTA) in total.index else 0
+    promedio = total[("suma", COLUMNA_NOTA)] / n_nota if n_nota else float("nan")
+    print(f"{resumen.filas:,} filas en {resumen.bloques} bloques, {duracion:.1f} s; "
+          f"memoria pico {_memoria_pico_mb():.0f} MB; nota promedio 2024 {promedio:.2f}")
+
+
+if __name__ == "__main__":
+    main()
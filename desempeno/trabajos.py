@@ -0,0 +1,122 @@
+"""Ingesta en segundo plano con progreso y resultados parciales.
+
+Cada archivo se procesa en un hilo propio (`TrabajoIngesta`); la página consulta su
+progreso (bytes y filas leídos) y las hojas del cubo acumuladas hasta el último
+bloque, con las que muestra KPIs parciales mientras el parseo continúa. `ColaIngestas`
+lleva los trabajos en curso por clave de contenido: una segunda subida del mismo
+archivo (de la misma u otra sesión) se suma al trabajo en curso en vez de repetirlo.
+Un trabajo exitoso deja la cola al terminar (su resultado queda guardado); uno fallido
+queda, con su error, hasta que una sesión lo lee y lo retira.
+"""
+import threading
+import time
+
+ESPERANDO = "esperando"
+PROCESANDO = "procesando"
+TERMINADO = "terminado"
+FALLIDO = "fallido"
+
+
+class TrabajoIngesta:
+    """Carga de un archivo en un hilo. `cargar(al_bloque)` devuelve el resultado; `al_bloque(resumen)` informa avance.
+
+    `al_terminar(trabajo)` se llama cuando el trabajo ya figura como terminado (con su resultado o error).
+    """
+
+    def __init__(self, clave, cargar, total_bytes=None, al_terminar=None):
+        self.clave = clave
+        self.total_bytes = total_bytes
+        self.estado = ESPERANDO
+        self.resultado = None
+        self.error = None
+        self.inicio = None
+        self.segundos = None
+        self._cargar = cargar
+        self._al_terminar = al_terminar
+        self._progreso = {"filas": 0, "bloques": 0, "bytes_leidos": 0, "hojas": None}
+        self._lock = threading.Lock()
+        self._hecho = threading.Event()
+
+    def al_bloque(self, resumen):
+        """Callback de `procesar_por_bloques`: guarda el avance y las hojas acumuladas (se reemplazan, no se mutan)."""
+        with self._lock:
+            self._progreso = {"filas": resumen.filas, "bloques": resumen.bloques,
+                              "bytes_leidos": resumen.bytes_leidos, "hojas": resumen.hojas}
+
+    def ejecutar(self):
+        self.inicio = time.perf_counter()
+        self.estado = PROCESANDO
+        try:
+            self.resultado = self._cargar(self.al_bloque)
+            self.estado = TERMINADO
+        except Exception as e:
+            self.error = e
+            self.estado = FALLIDO
+        finally:
+            self.segundos = time.perf_counter() - self.inicio
+            self._hecho.set()
+        if self._al_terminar is not None:
+            self._al_terminar(self)
+
+    def iniciar(self):
+        threading.Thread(target=self.ejecutar, daemon=True, name=f"ingesta-{self.clave[:12]}").start()
+        return self
+
+    @property
+    def terminado(self):
+        return self._hecho.is_set()
+
+    def esperar(self, timeout=None):
+        """Espera a que termine (hasta `timeout` segundos). Devuelve si terminó."""
+        return self._hecho.wait(timeout)
+
+    def progreso(self):
+        """Copia del avance: filas, bloques, bytes_leidos, total_bytes, fraccion (o None), segundos y hojas."""
+        with self._lock:
+            progreso = dict(self._progreso)
+        progreso["total_bytes"] = self.total_bytes
+        progreso["fraccion"] = (min(progreso["bytes_leidos"] / self.total_bytes, 1.0)
+                                if self.total_bytes else None)
+        progreso["segundos"] = (self.segundos if self.segundos is not None
+                                else time.perf_counter() - self.inicio if self.inicio is not None else 0.0)
+        return progreso
+
+
+class ColaIngestas:
+    """Trabajos de ingesta por clave de contenido (en curso o fallidos sin leer); los duplicados se unen al existente."""
+
+    def __init__(self):
+        self._trabajos = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._trabajos)
+
+    def iniciar(self, clave, cargar, total_bytes=None):
+        """Trabajo de `clave`: el que está en la cola (en curso o fallido) o uno nuevo ya iniciado.
+
+        Devuelve (trabajo, nuevo).
+        """
+        with self._lock:
+            trabajo = self._trabajos.get(clave)
+            if trabajo is not None:
+                return trabajo, False
+            trabajo = TrabajoIngesta(clave, cargar, total_bytes, al_terminar=self._terminado)
+            self._trabajos[clave] = trabajo
+        return trabajo.iniciar(), True
+
+    def _terminado(self, trabajo):
+        # Ya figura como terminado: quien lo tome de la cola de aquí en más ve su resultado.
+        # Uno exitoso deja la cola (la próxima subida usa el resultado guardado); uno fallido espera a `retirar`.
+        if trabajo.error is None:
+            self.retirar(trabajo)
+
+    def retirar(self, trabajo):
+        """Quita `trabajo` de la cola (la sesión ya leyó su error): la próxima subida del archivo reintenta."""
+        with self._lock:
+            if self._trabajos.get(trabajo.clave) is trabajo:
+                del self._trabajos[trabajo.clave]
+
+    def en_curso(self):
+        with self._lock:
+            return [t for t in self._trabajos.values() if not t.terminado]
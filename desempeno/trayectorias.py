@@ -0,0 +1,127 @@
+"""Clasificación vectorizada de trayectorias de desempeño entre años.
+
+Las columnas "Categoría <año>" se convierten en una matriz de códigos (filas x años)
+y cada regla se evalúa para todo el DataFrame de una vez con máscaras `isin` y
+diferencias entre años, sin recorrer filas en Python. La última columna de la matriz
+es siempre la del año del reporte (sin valores si el archivo no la trae): las reglas
+"consistentes" exigen la categoría de ese año, no la del último año presente.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+
+from desempeno.constantes import ANIO_REPORTE
+from desempeno.esquema import CATEGORIAS_DESEMPENO
+
+CATEGORIAS_TOP = ["Excepcional", "Destacado"]
+CATEGORIAS_BAJO = ["No Cumple", "Cumple Parcialmente"]
+
+# Puntaje ordinal por categoría (mayor es mejor). Pendiente/Sin Asignar no puntúan.
+PUNTAJE_CATEGORIA = {
+    "Excepcional": 5, "Destacado": 4, "Cumple": 3, "Cumple Parcialmente": 2, "No Cumple": 1
+}
+
+_PATRON_COLUMNA = re.compile(r"^Categoría (\d{4})$")
+
+
+def columnas_por_anio(df):
+    """Columnas "Categoría <año>" presentes, ordenadas por año: {año: columna}."""
+    anios = {}
+    for col in df.columns:
+        coincidencia = _PATRON_COLUMNA.match(col)
+        if coincidencia:
+            anios[int(coincidencia.group(1))] = col
+    return dict(sorted(anios.items()))
+
+
+def matriz_codigos(df, columnas):
+    """Matriz (filas x años) de códigos sobre CATEGORIAS_DESEMPENO; -1 para valores faltantes o desconocidos.
+
+    Una columna None (año que el archivo no trae) queda entera en -1.
+    """
+    matriz = np.full((len(df), len(columnas)), -1, dtype=np.int8)
+    for j, col in enumerate(columnas):
+        if col is None:
+            continue
+        serie = df[col]
+        if not (isinstance(serie.dtype, pd.CategoricalDtype)
+                and list(serie.cat.categories[:len(CATEGORIAS_DESEMPENO)]) == CATEGORIAS_DESEMPENO):
+            serie = serie.astype(pd.CategoricalDtype(CATEGORIAS_DESEMPENO))
+        codigos = serie.cat.codes.to_numpy()
+        # Las categorías inesperadas agregadas por el esquema quedan fuera de la escala.
+        matriz[:, j] = np.where(codigos < len(CATEGORIAS_DESEMPENO), codigos, -1)
+    return matriz
+
+
+def _codigos(categorias):
+    return [CATEGORIAS_DESEMPENO.index(c) for c in categorias]
+
+
+def consistente(categorias):
+    """Regla: el año del reporte (última columna) está en `categorias` y al menos uno de los años anteriores también."""
+    codigos = _codigos(categorias)
+
+    def regla(matriz, puntajes):
+        en_grupo = np.isin(matriz, codigos)
+        if en_grupo.shape[1] < 2:
+            return np.zeros(len(matriz), dtype=bool)
+        return en_grupo[:, -1] & en_grupo[:, :-1].any(axis=1)
+    return regla
+
+
+def _diferencias(puntajes):
+    """Cambios de puntaje entre años consecutivos (NaN si falta alguno de los dos años)."""
+    if puntajes.shape[1] < 2:
+        return np.empty((len(puntajes), 0))
+    return np.diff(puntajes, axis=1)
+
+
+def mejora(matriz, puntajes):
+    """Regla: nunca baja entre años evaluados y sube al menos una vez."""
+    dif = _diferencias(puntajes)
+    return ~(dif < 0).any(axis=1) & (dif > 0).any(axis=1)
+
+
+def declive(matriz, puntajes):
+    """Regla: nunca sube entre años evaluados y baja al menos una vez."""
+    dif = _diferencias(puntajes)
+    return ~(dif > 0).any(axis=1) & (dif < 0).any(axis=1)
+
+
+def volatil(matriz, puntajes):
+    """Regla: sube y baja en distintos años."""
+    dif = _diferencias(puntajes)
+    return (dif > 0).any(axis=1) & (dif < 0).any(axis=1)
+
+
+REGLAS = {
+    "mejores": consistente(CATEGORIAS_TOP),
+    "descendentes": consistente(CATEGORIAS_BAJO),
+    "mejora": mejora,
+    "declive": declive,
+    "volatil": volatil,
+}
+
+
+def clasificar_trayectorias(df, reglas=None, anios=None, anio_reporte=ANIO_REPORTE):
+    """Evalúa las reglas de trayectoria para todas las filas de una vez.
+
+    Devuelve un DataFrame booleano con una columna por regla y el mismo índice que `df`.
+    `anios` restringe (y ordena) los años anteriores considerados; por defecto, todos los
+    presentes antes de `anio_reporte`, que va siempre al final.
+    """
+    reglas = REGLAS if reglas is None else reglas
+    columnas = columnas_por_anio(df)
+    if anios is None:
+        anios = [anio for anio in columnas if anio < anio_reporte]
+    anios = [anio for anio in anios if anio in columnas and anio != anio_reporte] + [anio_reporte]
+
+    matriz = matriz_codigos(df, [columnas.get(anio) for anio in anios])
+    tabla_puntajes = np.array(
+        [PUNTAJE_CATEGORIA.get(c, np.nan) for c in CATEGORIAS_DESEMPENO] + [np.nan], dtype=float
+    )
+    # El código -1 (faltante) indexa la última posición de la tabla: NaN.
+    puntajes = tabla_puntajes[matriz]
+
+    return pd.DataFrame({nombre: regla(matriz, puntajes) for nombre, regla in reglas.items()}, index=df.index)
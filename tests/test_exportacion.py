@@ -0,0 +1,44 @@
+import os
+import threading
+
+import pandas as pd
+
+from desempeno.exportacion import CacheExportaciones
+
+
+def _vista(filas=20_000):
+    return pd.DataFrame({"Evaluado": [f"Persona {i}" for i in range(filas)], "Nota 2024": [3.25] * filas})
+
+
+def test_exportacion_mayor_que_el_limite_se_entrega_completa(tmp_path):
+    df = _vista()
+    exportaciones = CacheExportaciones(str(tmp_path), max_bytes=100_000)
+    contenido = exportaciones.leer("k", "CSV", df)
+    assert len(contenido) > 100_000
+    assert contenido.decode("utf-8-sig").count("\n") == len(df) + 1
+    # La poda no elimina la exportación recién escrita aunque sola supere el límite.
+    assert os.path.exists(exportaciones.ruta("k", "CSV"))
+
+
+def test_exportacion_recien_escrita_desplaza_a_las_anteriores(tmp_path):
+    df = _vista()
+    exportaciones = CacheExportaciones(str(tmp_path), max_bytes=100_000)
+    exportaciones.leer("k1", "CSV", df)
+    exportaciones.leer("k2", "CSV", df)
+    assert not os.path.exists(exportaciones.ruta("k1", "CSV"))
+    assert os.path.exists(exportaciones.ruta("k2", "CSV"))
+
+
+def test_pedidos_simultaneos_escriben_una_vez(tmp_path):
+    df = _vista(2_000)
+    exportaciones = CacheExportaciones(str(tmp_path))
+    resultados = []
+    hilos = [threading.Thread(target=lambda: resultados.append(exportaciones.leer("k", "Parquet", df)))
+             for _ in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    assert exportaciones.generadas == 1
+    assert len(set(resultados)) == 1
+    assert exportaciones._escribiendo == {}
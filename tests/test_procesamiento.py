@@ -0,0 +1,37 @@
+import pandas as pd
+import pytest
+
+from desempeno import cache_disco
+from desempeno.ingesta import leer_csv
+from desempeno.procesamiento import procesar_datos
+from desempeno.streaming import procesar_por_bloques
+
+ENCABEZADO = ("Número de Documento;Evaluado;Cargo;Dirección;Área;Sub-área;Tipo de Evaluación;Evaluador;"
+              "Trabajo en equipo;Iniciativa;Metas;{nota};{categoria};Nota 2023;Categoría 2023;Nota 2022;Categoría 2022")
+FILAS = [
+    "1-9;Ana Soto;Analista;Dirección Médica;Finanzas;Contabilidad;Evaluación 01;Juan Pérez;4;3;Sin metas;3,5;Cumple;"
+    "3,2;Cumple;4,1;Destacado",
+    "2-7;José Díaz;Guardia;Dirección Médica;Finanzas;Contabilidad;Evaluación 02;Juan Pérez;5;4;3;4,2;Destacado;"
+    "2,9;Cumple;;",
+    "3-5;Inés Núñez;Camillero;Dirección General;BI;Desarrollo;Evaluación 01;Raúl Tapia;3;3;Sin metas;3;Cumple;"
+    "3,6;Destacado;3,4;Cumple",
+]
+
+
+def _export(ruta, nota, categoria):
+    ruta.write_text("\n".join([ENCABEZADO.format(nota=nota, categoria=categoria)] + FILAS) + "\n", encoding="utf-8-sig")
+    return str(ruta)
+
+
+@pytest.mark.parametrize("nota, categoria, anio", [("Nota 2024", "Categoría 2024", None), ("Nota", "Categoría", 2024)])
+def test_bloques_y_completo_dan_los_mismos_tipos_sin_pendientes(tmp_path, nota, categoria, anio):
+    ruta = _export(tmp_path / "export.csv", nota, categoria)
+    completo, _ = procesar_datos(leer_csv(ruta), anio=anio)
+    procesar_por_bloques(ruta, cache_disco.ruta_entrada("k", str(tmp_path)), tamano_bloque=2, anio=anio)
+    por_bloques, _ = cache_disco.leer("k", str(tmp_path))
+
+    assert list(por_bloques.columns) == list(completo.columns)
+    pd.testing.assert_series_equal(por_bloques.dtypes, completo.dtypes)
+    for columna in ["Nota 2024", "Nota 2023", "Nota 2022"]:
+        assert por_bloques[columna].dtype == "float64"
+    assert por_bloques["Nota 2024"].tolist() == [3.5, 4.2, 3.0]
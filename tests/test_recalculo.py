@@ -0,0 +1,30 @@
+from pathlib import Path
+
+import pytest
+
+from desempeno.ingesta import leer_csv
+from desempeno.procesamiento import procesar_datos
+from desempeno.recalculo import MatrizCompetencias
+
+EXPORT_2024 = Path(__file__).resolve().parent.parent / "Desempeño  2024.csv"
+
+
+@pytest.fixture(scope="module")
+def validacion():
+    df, _ = procesar_datos(leer_csv(str(EXPORT_2024)), anio=2024)
+    return MatrizCompetencias(df).validar()
+
+
+def test_regla_de_origen_reproduce_el_export_2024(validacion):
+    recalculables = validacion["Nota"].notna() & validacion["Nota recalculada"].notna()
+    exactas = (validacion.loc[recalculables, "Nota"] == validacion.loc[recalculables, "Nota recalculada"]).sum()
+    assert recalculables.sum() == 1461
+    assert exactas == 1442
+    assert validacion["Nota difiere"].sum() == 8
+    assert validacion["Categoría difiere"].sum() == 0
+
+
+def test_notas_sin_competencias_se_informan_aparte(validacion):
+    sin_competencias = validacion["Nota sin competencias"]
+    assert sin_competencias.sum() == 9
+    assert not (validacion["Nota difiere"] | validacion["Categoría difiere"])[sin_competencias].any()
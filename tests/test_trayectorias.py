@@ -0,0 +1,40 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+
+from desempeno.trayectorias import CATEGORIAS_BAJO, CATEGORIAS_TOP, clasificar_trayectorias
+
+VALORES = ["Excepcional", "Destacado", "Cumple", "Cumple Parcialmente", "No Cumple", "Pendiente", None]
+
+
+def _todas_las_combinaciones():
+    filas = list(itertools.product(VALORES, repeat=3))
+    return pd.DataFrame(filas, columns=["Categoría 2022", "Categoría 2023", "Categoría 2024"])
+
+
+def _regla_fila(df, grupo):
+    """La regla original, fila a fila: 2024 en el grupo y 2023 o 2022 también."""
+    return df.apply(lambda row: row.get("Categoría 2024") in grupo
+                    and (row.get("Categoría 2023") in grupo or row.get("Categoría 2022") in grupo), axis=1)
+
+
+def test_consistentes_igual_a_la_regla_fila_a_fila():
+    df = _todas_las_combinaciones()
+    trayectorias = clasificar_trayectorias(df)
+    np.testing.assert_array_equal(trayectorias["mejores"], _regla_fila(df, CATEGORIAS_TOP))
+    np.testing.assert_array_equal(trayectorias["descendentes"], _regla_fila(df, CATEGORIAS_BAJO))
+
+
+def test_sin_anio_del_reporte_no_hay_consistentes():
+    df = _todas_las_combinaciones().drop(columns="Categoría 2024")
+    trayectorias = clasificar_trayectorias(df)
+    assert not trayectorias["mejores"].any()
+    assert not trayectorias["descendentes"].any()
+
+
+def test_anios_posteriores_al_reporte_no_cuentan():
+    df = _todas_las_combinaciones()
+    df["Categoría 2025"] = "Destacado"
+    trayectorias = clasificar_trayectorias(df)
+    np.testing.assert_array_equal(trayectorias["mejores"], _regla_fila(df, CATEGORIAS_TOP))